@@ -16,6 +16,7 @@ from server_fhe_race import (
     get_car_velocity_kmh,
     race_winner,
     train_car_random_subset,
+    collect_garbage,
     N,
     PRINT_LOG
 )
@@ -26,6 +27,7 @@ TRAIN_COST = 1
 RACE_COST = 1
 RACE_REWARD = 100
 NUM_AI_OPPONENTS = 5
+GC_KEEP_GENERATIONS = 5  # Most recent generations kept per lineage (plus pinned cars)
 
 class ProgressDialog:
     """A progress dialog with indeterminate progress bar"""
@@ -663,6 +665,9 @@ class F1AIGame:
         self.selected_car_index = len(self.garage) - 1
         self.player_car_id = new_car_id
         
+        # Drop old generations the player can no longer benefit from
+        self.collect_garbage()
+        
         # Update displays
         self.update_garage_display()
         self.car_info_label.configure(text=f"Gen {new_generation} | ID: ...{new_car_id[-8:]}")
@@ -687,6 +692,23 @@ class F1AIGame:
         self.test_button.configure(state='normal')
         self.update_status("Ready to race!")
     
+    def collect_garbage(self):
+        """Free ciphertexts of garage cars outside the retention window"""
+        pinned = [self.player_car_id] + [car["id"] for car in self.ai_cars]
+        if self.garage:
+            pinned.append(max(self.garage, key=lambda c: c['velocity'])['id'])
+        
+        report = collect_garbage(pinned=pinned, keep_last=GC_KEEP_GENERATIONS)
+        if not report['collected']:
+            return
+        
+        collected = set(report['collected'])
+        self.garage = [car for car in self.garage if car['id'] not in collected]
+        self.selected_car_index = next(
+            i for i, car in enumerate(self.garage) if car['id'] == self.player_car_id)
+        self.log_message(f"♻️ Retired {len(collected)} old car(s), "
+                         f"freed ~{report['bytes_reclaimed_approx'] / 2**20:.1f} MiB")
+    
     def test_speed(self):
         """Test current car speed"""
         self.test_button.configure(state='disabled')
@@ -8,7 +8,7 @@ from openfhe import *
 import numpy as np
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # ----- Minimal logging -----
 PRINT_LOG = True
@@ -174,6 +174,9 @@ class CarRecord:
     name: str
     t_ct: List
     W_ct: List[List]
+    lineage: str = ""                # car_id of the generation-0 ancestor
+    generation: int = 0
+    parent_id: Optional[str] = None
 
 CAR_DB: Dict[str, CarRecord] = {}
 _car_seq = 0
@@ -209,7 +212,7 @@ def create_car(name: str) -> str:
             for j in range(N):
                 W_ct[i][j] = FHE.cc.EvalAdd(W_ct[i][j], Wk_ct[i][j])
 
-    CAR_DB[car_id] = CarRecord(name=name, t_ct=t_ct, W_ct=W_ct)
+    CAR_DB[car_id] = CarRecord(name=name, t_ct=t_ct, W_ct=W_ct, lineage=car_id)
     log("Car created (ciphertexts stored only).", car_id)
     return car_id
 
@@ -304,10 +307,76 @@ def train_car_random_subset(
     CAR_DB[new_id] = CarRecord(
         name=car.name,
         t_ct=new_t_ct,
-        W_ct=[row[:] for row in car.W_ct]
+        W_ct=[row[:] for row in car.W_ct],
+        lineage=car.lineage or car_id,
+        generation=car.generation + 1,
+        parent_id=car_id,
     )
     log(f"Training applied to indices {clean_indices} (hidden deltas). New car created.", new_id)
 
     if return_delta_ct:
         return new_id, delta_ct
-    return new_id
\ No newline at end of file
+    return new_id
+
+# ==========================================================
+# ----- (5) GARBAGE COLLECTION OF ORPHANED GENERATIONS -----
+# ==========================================================
+def _approx_ciphertext_bytes() -> int:
+    """
+    Rough size of one BFV ciphertext: 2 polynomials of ring dimension
+    entries, one 64-bit word per RNS tower (DEPTH + 1 towers).
+    """
+    return 2 * int(FHE.cc.GetRingDimension()) * (DEPTH + 1) * 8
+
+def _record_ciphertexts(car: CarRecord) -> List:
+    return list(car.t_ct) + [ct for row in car.W_ct for ct in row]
+
+def collect_garbage(pinned: Iterable[str] = (), keep_last: int = 1) -> dict:
+    """
+    Drop cars that are neither pinned nor among the last `keep_last`
+    generations of their lineage.
+
+    Trained cars share W ciphertexts with their ancestors, so a ciphertext
+    is only counted as reclaimed when no surviving car still references it.
+    Safe to call periodically from long-running sessions.
+    """
+    if keep_last < 0:
+        raise ValueError("keep_last must be >= 0")
+
+    # ---- Roots: pinned cars + retention window per lineage ----
+    live = {cid for cid in pinned if cid in CAR_DB}
+    # Every car of a kept generation survives, siblings included
+    by_lineage: Dict[str, List[Tuple[int, str]]] = {}
+    for cid, car in CAR_DB.items():
+        by_lineage.setdefault(car.lineage or cid, []).append((car.generation, cid))
+    for members in by_lineage.values():
+        if keep_last:
+            kept = set(sorted({generation for generation, _ in members})[-keep_last:])
+            live.update(cid for generation, cid in members if generation in kept)
+
+    dead = [cid for cid in CAR_DB if cid not in live]
+    if not dead:
+        return {"collected": [], "cars_remaining": len(CAR_DB),
+                "ciphertexts_reclaimed": 0, "bytes_reclaimed_approx": 0}
+
+    # ---- Mark ciphertexts still reachable from surviving cars ----
+    reachable = {id(ct) for cid in live for ct in _record_ciphertexts(CAR_DB[cid])}
+    freed = set()
+    for cid in dead:
+        for ct in _record_ciphertexts(CAR_DB[cid]):
+            if id(ct) not in reachable:
+                freed.add(id(ct))
+
+    # ---- Sweep ----
+    for cid in dead:
+        del CAR_DB[cid]
+
+    report = {
+        "collected": dead,
+        "cars_remaining": len(CAR_DB),
+        "ciphertexts_reclaimed": len(freed),
+        "bytes_reclaimed_approx": len(freed) * _approx_ciphertext_bytes(),
+    }
+    log(f"GC: dropped {len(dead)} car(s), reclaimed {len(freed)} ciphertexts "
+        f"(~{report['bytes_reclaimed_approx'] / 2**20:.1f} MiB).")
+    return report
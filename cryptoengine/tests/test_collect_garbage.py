@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("openfhe")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server_fhe_race as fhe
+from server_fhe_race import CAR_DB, CarRecord, collect_garbage
+
+fhe.PRINT_LOG = False
+
+
+@pytest.fixture(autouse=True)
+def empty_db():
+    CAR_DB.clear()
+    yield
+    CAR_DB.clear()
+
+
+def _car(cid, generation=0, parent=None, lineage="ROOT", W_ct=None):
+    """A record with placeholder ciphertexts; collection only tracks their identity."""
+    CAR_DB[cid] = CarRecord(
+        name="car",
+        t_ct=[object()],
+        W_ct=W_ct if W_ct is not None else [[object()]],
+        lineage=lineage if cid != lineage else "",
+        generation=generation,
+        parent_id=parent,
+    )
+    return CAR_DB[cid]
+
+
+def test_keeps_every_sibling_of_the_kept_generations():
+    _car("ROOT")
+    _car("A", 1, "ROOT")
+    _car("B", 1, "ROOT")
+    _car("A1", 2, "A")
+    _car("A2", 2, "A")
+    _car("B1", 2, "B")
+
+    report = collect_garbage(keep_last=2)
+
+    assert sorted(report["collected"]) == ["ROOT"]
+    assert sorted(CAR_DB) == ["A", "A1", "A2", "B", "B1"]
+
+
+def test_pinned_cars_survive_outside_the_window():
+    _car("ROOT")
+    _car("A", 1, "ROOT")
+    _car("A1", 2, "A")
+
+    collect_garbage(pinned=["ROOT", "MISSING"], keep_last=1)
+
+    assert sorted(CAR_DB) == ["A1", "ROOT"]
+
+
+def test_keep_last_zero_drops_everything_unpinned():
+    _car("ROOT")
+    _car("A", 1, "ROOT")
+
+    report = collect_garbage(pinned=["A"], keep_last=0)
+
+    assert report["collected"] == ["ROOT"] and list(CAR_DB) == ["A"]
+
+
+def test_shared_w_ciphertexts_are_not_counted_as_reclaimed():
+    root = _car("ROOT")
+    _car("A", 1, "ROOT", W_ct=[row[:] for row in root.W_ct])
+
+    report = collect_garbage(keep_last=1)
+
+    # Only the root's own t ciphertext is freed; its W row lives on in A
+    assert report["collected"] == ["ROOT"]
+    assert report["ciphertexts_reclaimed"] == 1
+
+
+def test_negative_window_is_rejected():
+    with pytest.raises(ValueError):
+        collect_garbage(keep_last=-1)
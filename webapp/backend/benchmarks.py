@@ -0,0 +1,206 @@
+"""Micro-benchmarks for the racing service hot paths at several fleet sizes.
+
+For each fleet size a throwaway database and RacingService are filled with
+that many cars (ten per wallet), then every benchmark is timed on randomly
+chosen cars and wallets. Each result is the median time per call over
+``--repeat`` runs plus the peak memory one call allocates; each fleet also
+reports the in-memory bytes per car of the car store and leaderboard.
+
+    python benchmarks.py --save benchmarks.baseline.json
+    python benchmarks.py --baseline benchmarks.baseline.json --max-regression 25
+    python benchmarks.py --sizes 1000000 --only calculate_speed,find_opponents
+"""
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+CARS_PER_WALLET = 10
+
+def build_service(size: int, workdir: str):
+    """A RacingService over a fresh database holding ``size`` cars; returns it with its car ids and wallets."""
+    from services.persistence import RacingRepository
+    from services.racing_service import RacingService
+
+    repository = RacingRepository(os.path.join(workdir, f"fleet-{size}.db"), batch_size=4096)
+    service = RacingService(repository, matchmaking={'lobby_window': 0})
+    wallets = [f"rBENCH{i:08d}" for i in range(max(1, size // CARS_PER_WALLET))]
+    car_ids = [f"CAR-{i:012x}" for i in range(size)]
+    owners = [wallets[i % len(wallets)] for i in range(size)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for car_id, wallet_address in zip(car_ids, owners):
+        service.cars.add(car_id, wallet_address)
+    speeds = service.cars.compute_speeds(service.cars.live_slots())
+    service.leaderboard.reset(zip(car_ids, owners, speeds.tolist()))
+    footprint = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    for car_id in car_ids:
+        repository.insert_car(service.cars[car_id])
+    repository.flush()
+    return service, car_ids, wallets, footprint / max(1, size)
+
+def benchmarks(service, car_ids: List[str], wallets: List[str]) -> Dict[str, Tuple[Callable, Callable, int]]:
+    """Name -> (operation, input factory, calls per run)."""
+    cars = service.cars
+
+    def new_car(_):
+        return f"CAR-{random.getrandbits(64):016x}"
+
+    def add_car(car_id):
+        cars.add(car_id, wallets[0])
+        del cars[car_id]
+
+    def some_car(_):
+        return random.choice(car_ids)
+
+    def some_wallet(_):
+        return random.choice(wallets)
+
+    def some_speed(_):
+        return random.uniform(150, 350)
+
+    def garage_page(wallet):
+        return service.get_garage(wallet, limit=20)
+
+    def latest_garage(wallet):
+        return service.get_garage(wallet, latest_only=True)
+
+    async def enter_race(car_id):
+        return await service.enter_race(car_id, cars[car_id].wallet_address, payment_tx="BENCH")
+
+    return {
+        'add_car': (add_car, new_car, 2000),
+        'generate_car_id': (service._generate_car_id, some_wallet, 2000),
+        'calculate_speed': (lambda car_id: cars[car_id].calculate_speed(), some_car, 2000),
+        'train': (lambda car_id: cars[car_id].train(), some_car, 2000),
+        'rank_update': (lambda car_id: service._rank(cars[car_id]), some_car, 2000),
+        'find_opponents': (lambda speed: service._find_opponents(speed, 7, 25.0, (), ()), some_speed, 2000),
+        'get_garage': (garage_page, some_wallet, 200),
+        'get_garage_latest': (latest_garage, some_wallet, 200),
+        'enter_race': (enter_race, some_car, 200),
+        'rebuild_leaderboard': (lambda _: service.rebuild_leaderboard(), lambda _: None, 1),
+    }
+
+async def measure(operation: Callable, make_input: Callable, calls: int, repeat: int) -> Dict[str, float]:
+    is_async = inspect.iscoroutinefunction(operation)
+
+    async def run(inputs):
+        started = time.perf_counter()
+        if is_async:
+            for value in inputs:
+                await operation(value)
+        else:
+            for value in inputs:
+                operation(value)
+        return time.perf_counter() - started
+
+    await run([make_input(i) for i in range(min(calls, 10))])
+    per_call = []
+    for _ in range(repeat):
+        inputs = [make_input(i) for i in range(calls)]
+        per_call.append(await run(inputs) / calls)
+
+    value = make_input(0)
+    gc.collect()
+    tracemalloc.start()
+    await run([value])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'median_us': round(statistics.median(per_call) * 1e6, 3),
+        'min_us': round(min(per_call) * 1e6, 3),
+        'peak_kib': round(peak / 1024, 2),
+    }
+
+def report(results: dict, baseline: Optional[dict]) -> List[Tuple[str, float]]:
+    """Print one table per fleet size; returns each benchmark's median change against the baseline, in percent."""
+    changes = []
+    for size, fleet in results['fleets'].items():
+        base = (baseline or {}).get('fleets', {}).get(size, {})
+        print(f"\n{int(size):,} cars: {fleet['bytes_per_car']:.0f} bytes/car in memory"
+              f", built in {fleet['build_seconds']:.1f}s")
+        print(f"{'benchmark':<22} {'median us':>20} {'min us':>12} {'peak KiB':>10}")
+        for name, r in fleet['benchmarks'].items():
+            previous = base.get('benchmarks', {}).get(name, {}).get('median_us')
+            median = f"{r['median_us']:.2f}"
+            if previous:
+                change = (r['median_us'] - previous) / previous * 100
+                changes.append((f"{name}@{size}", change))
+                median += f" ({change:+.0f}%)"
+            print(f"{name:<22} {median:>20} {r['min_us']:>12.2f} {r['peak_kib']:>10.2f}")
+    return changes
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Comma-separated fleet sizes (up to 1000000)")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the chosen cars and wallets")
+    parser.add_argument("--save", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="Exit non-zero if any median is this many percent above the baseline")
+    args = parser.parse_args()
+
+    # The service module opens its own database on import; keep it out of the way
+    workdir = tempfile.mkdtemp(prefix="benchmarks-")
+    os.environ["RACING_DB_PATH"] = os.path.join(workdir, "racing.db")
+    os.environ["TRACING_ENABLED"] = "False"
+    random.seed(args.seed)
+    only = set(args.only.split(",")) if args.only else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'fleets': {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        started = time.perf_counter()
+        service, car_ids, wallets, bytes_per_car = build_service(size, workdir)
+        fleet = {
+            'bytes_per_car': round(bytes_per_car, 1),
+            'build_seconds': round(time.perf_counter() - started, 2),
+            'benchmarks': {},
+        }
+        for name, (operation, make_input, calls) in benchmarks(service, car_ids, wallets).items():
+            if only is None or name in only:
+                fleet['benchmarks'][name] = await measure(operation, make_input, calls, args.repeat)
+        service.close()
+        results['fleets'][str(size)] = fleet
+
+    changes = report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_regression is not None:
+        failed = [(name, pct) for name, pct in changes if pct > args.max_regression]
+        for name, pct in failed:
+            print(f"Regression on {name}: {pct:+.0f}% (limit {args.max_regression:+.0f}%)")
+        if failed:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import List
 
 class Settings:
@@ -15,10 +16,99 @@ class Settings:
     
     TESTNET_URL: str = os.getenv("TESTNET_URL", "https://s.altnet.rippletest.net:51234/")
     TESTNET_WSS: str = os.getenv("TESTNET_WSS", "wss://s.altnet.rippletest.net:51233")
+    # "simulator" swaps the XRPL node for an in-process ledger (see services/ledger_simulator.py)
     NETWORK: str = os.getenv("NETWORK", "testnet")
+    SIMULATOR_LATENCY: float = float(os.getenv("SIMULATOR_LATENCY", "0"))
+    SIMULATOR_JITTER: float = float(os.getenv("SIMULATOR_JITTER", "0"))
+    SIMULATOR_FAILURE_RATE: float = float(os.getenv("SIMULATOR_FAILURE_RATE", "0"))
+    SIMULATOR_DROP_RATE: float = float(os.getenv("SIMULATOR_DROP_RATE", "0"))
+    SIMULATOR_CLOSE_INTERVAL: float = float(os.getenv("SIMULATOR_CLOSE_INTERVAL", "1.0"))
+    SIMULATOR_SEED: int = int(os.getenv("SIMULATOR_SEED", "0"))
+    
+    LEDGER_TIMEOUT: float = float(os.getenv("LEDGER_TIMEOUT", "10"))
+    # Expected seconds per ledger close; bounds how long POST /payment waits for validation
+    LEDGER_CLOSE_TIME: float = float(os.getenv("LEDGER_CLOSE_TIME", "4"))
+    LEDGER_MAX_CONNECTIONS: int = int(os.getenv("LEDGER_MAX_CONNECTIONS", "20"))
+    LEDGER_MAX_CONCURRENCY: int = int(os.getenv("LEDGER_MAX_CONCURRENCY", "10"))
+    
+    ACCOUNT_STREAM_ENABLED: bool = os.getenv("ACCOUNT_STREAM_ENABLED", "True") == "True"
+    ACCOUNT_CACHE_TTL: float = float(os.getenv("ACCOUNT_CACHE_TTL", "5"))
+    ACCOUNT_CACHE_MAX_AGE: float = float(os.getenv("ACCOUNT_CACHE_MAX_AGE", "60"))
+    ACCOUNT_CACHE_SIZE: int = int(os.getenv("ACCOUNT_CACHE_SIZE", "10000"))
+    
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+    HEALTH_PROBE_TIMEOUT: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+    HEALTH_READY_MAX_AGE: float = float(os.getenv("HEALTH_READY_MAX_AGE", "30"))
+    
+    WALLET_POOL_LOW: int = int(os.getenv("WALLET_POOL_LOW", "5"))
+    WALLET_POOL_HIGH: int = int(os.getenv("WALLET_POOL_HIGH", "20"))
+    WALLET_POOL_CONCURRENCY: int = int(os.getenv("WALLET_POOL_CONCURRENCY", "2"))
+    
+    PAYMENT_POLL_INTERVAL: float = float(os.getenv("PAYMENT_POLL_INTERVAL", "1.0"))
+    PAYMENT_MAX_INFLIGHT: int = int(os.getenv("PAYMENT_MAX_INFLIGHT", "50"))
+    FEE_VERIFY_TIMEOUT: float = float(os.getenv("FEE_VERIFY_TIMEOUT", "120"))
+    
+    RACING_DB_PATH: str = os.getenv("RACING_DB_PATH", "data/racing.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "4"))
+    DB_BATCH_SIZE: int = int(os.getenv("DB_BATCH_SIZE", "256"))
+    DB_FLUSH_INTERVAL: float = float(os.getenv("DB_FLUSH_INTERVAL", "0.05"))
+    RACE_RETENTION_DAYS: float = float(os.getenv("RACE_RETENTION_DAYS", "90"))
+    RACE_MAX_ROWS: int = int(os.getenv("RACE_MAX_ROWS", "1000000"))
+    RACE_COMPACT_INTERVAL: float = float(os.getenv("RACE_COMPACT_INTERVAL", "3600"))
+    LEADERBOARD_REFRESH_INTERVAL: float = float(os.getenv("LEADERBOARD_REFRESH_INTERVAL", "5"))
+    # Cars kept hydrated in memory per worker; the least recently used are evicted beyond it
+    CAR_CACHE_SIZE: int = int(os.getenv("CAR_CACHE_SIZE", "100000"))
+    MATCH_LOBBY_WINDOW: float = float(os.getenv("MATCH_LOBBY_WINDOW", "0.25"))
+    MATCH_SPEED_BAND: float = float(os.getenv("MATCH_SPEED_BAND", "15"))
+    MATCH_MIN_RACERS: int = int(os.getenv("MATCH_MIN_RACERS", "4"))
+    MATCH_MAX_RACERS: int = int(os.getenv("MATCH_MAX_RACERS", "8"))
+    
+    # "plaintext" or "fhe"; fhe enables the encrypted /race/fhe endpoints
+    RACING_ENGINE: str = os.getenv("RACING_ENGINE", "plaintext")
+    FHE_ENGINE_PATH: str = os.getenv(
+        "FHE_ENGINE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "cryptoengine")
+    )
+    FHE_WORKERS: int = int(os.getenv("FHE_WORKERS", "1"))
+    FHE_MAX_PENDING: int = int(os.getenv("FHE_MAX_PENDING", "16"))
+    
+    # Token buckets for racing actions; costs per action are in services/rate_limiter.py
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True") == "True"
+    RATE_LIMIT_WALLET_RATE: float = float(os.getenv("RATE_LIMIT_WALLET_RATE", "2"))
+    RATE_LIMIT_WALLET_BURST: float = float(os.getenv("RATE_LIMIT_WALLET_BURST", "20"))
+    RATE_LIMIT_GLOBAL_RATE: float = float(os.getenv("RATE_LIMIT_GLOBAL_RATE", "500"))
+    RATE_LIMIT_GLOBAL_BURST: float = float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "1000"))
+    
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "True") == "True"
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "data/traces.jsonl")
+    
+    # Bearer token for /admin endpoints; they are disabled while unset
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+    
+    # Per-wallet event streams: events a client may fall behind before it is dropped
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+    EVENT_MAX_SUBSCRIBERS: int = int(os.getenv("EVENT_MAX_SUBSCRIBERS", "10000"))
+    EVENT_KEEPALIVE: float = float(os.getenv("EVENT_KEEPALIVE", "15"))
+    # With several workers, how often each picks up events the others published
+    EVENT_RELAY_INTERVAL: float = float(os.getenv("EVENT_RELAY_INTERVAL", "0.1"))
+    
+    # Most cars one /race/batch request may name (or a garage may hold for a garage-wide test)
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "100"))
     
     API_PREFIX: str = "/api/v1"
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Same variable uvicorn reads for --workers, so both always agree
+    WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "1"))
 
 settings = Settings()
+
+# prometheus_client picks per-process or shared-file storage when it is
+# first imported, so this runs before it is. Workers find the same
+# directory through their common parent, the uvicorn supervisor.
+if settings.WORKERS > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), f"prometheus-{os.getppid()}")
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
@@ -0,0 +1,229 @@
+"""Replay player sessions against the API and report latency percentiles.
+
+Each session creates a wallet and a car, trains it ``--trains`` times,
+tests its speed, enters a race and sells it. By default the app runs in
+this process against the ledger simulator, with a throwaway database; pass
+``--url`` to drive a running server over HTTP instead.
+
+Sessions arrive as a Poisson process at ``--rate`` per second, at most
+``--concurrency`` at a time. With ``--rate 0`` the harness is a closed
+loop of ``--concurrency`` back-to-back players.
+
+    python loadtest.py --sessions 200 --concurrency 20 --save baseline.json
+    python loadtest.py --sessions 200 --concurrency 20 --baseline baseline.json --max-regression 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.sessions_completed = 0
+        self.sessions_failed = 0
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[dict]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies[label].append(time.perf_counter() - started)
+            self.errors[label][type(e).__name__] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[label][str(response.status_code)] += 1
+            return None
+        return response.json()
+
+async def run_session(client: httpx.AsyncClient, recorder: Recorder, trains: int) -> None:
+    wallet = await recorder.call(client, "POST /wallet/create", "POST", "/wallet/create", json={})
+    if wallet is None:
+        recorder.sessions_failed += 1
+        return
+    address, seed = wallet['address'], wallet['seed']
+
+    car = await recorder.call(client, "POST /race/car/create", "POST", "/race/car/create",
+                              json={'wallet_address': address, 'wallet_seed': seed})
+    if car is None:
+        recorder.sessions_failed += 1
+        return
+    car_id = car['car_id']
+
+    for _ in range(trains):
+        attributes = random.sample(range(10), random.randint(1, 4))
+        trained = await recorder.call(client, "POST /race/train", "POST", "/race/train", json={
+            'car_id': car_id, 'wallet_address': address, 'wallet_seed': seed, 'attribute_indices': attributes
+        })
+        if trained is not None:
+            car_id = trained['car_id']
+
+    await recorder.call(client, "POST /race/test", "POST", "/race/test",
+                        json={'car_id': car_id, 'wallet_address': address})
+    await recorder.call(client, "POST /race/enter", "POST", "/race/enter",
+                        json={'car_id': car_id, 'wallet_address': address, 'wallet_seed': seed})
+    await recorder.call(client, "GET /race/garage/{address}", "GET", f"/race/garage/{address}",
+                        params={'latest_only': 'true'})
+    sold = await recorder.call(client, "POST /race/car/sell", "POST", "/race/car/sell",
+                               json={'car_id': car_id, 'wallet_address': address})
+    if sold is None:
+        recorder.sessions_failed += 1
+    else:
+        recorder.sessions_completed += 1
+
+async def drive(client: httpx.AsyncClient, recorder: Recorder, sessions: int, concurrency: int,
+                rate: float, trains: int) -> None:
+    if rate <= 0:
+        remaining = iter(range(sessions))
+
+        async def player():
+            for _ in remaining:
+                await run_session(client, recorder, trains)
+
+        await asyncio.gather(*(player() for _ in range(concurrency)))
+        return
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def admitted():
+        try:
+            await run_session(client, recorder, trains)
+        finally:
+            slots.release()
+
+    tasks = []
+    for _ in range(sessions):
+        await asyncio.sleep(random.expovariate(rate))
+        await slots.acquire()
+        tasks.append(asyncio.create_task(admitted()))
+    await asyncio.gather(*tasks)
+
+def summarize(recorder: Recorder, elapsed: float, options: dict) -> dict:
+    endpoints = {}
+    for label, samples in sorted(recorder.latencies.items()):
+        ms = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        endpoints[label] = {
+            'requests': len(samples),
+            'errors': dict(recorder.errors.get(label, {})),
+            'throughput': round(len(samples) / elapsed, 2),
+            'mean_ms': round(float(ms.mean()), 2),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(float(ms.max()), 2),
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'options': options,
+        'elapsed_seconds': round(elapsed, 3),
+        'sessions_completed': recorder.sessions_completed,
+        'sessions_failed': recorder.sessions_failed,
+        'requests': total,
+        'throughput': round(total / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return ""
+    return f" ({(current - previous) / previous * 100:+.0f}%)"
+
+def report(summary: dict, baseline: Optional[dict]) -> List[Tuple[str, float]]:
+    """Print the summary; returns each endpoint's p95 change against the baseline, in percent."""
+    base_endpoints = baseline['endpoints'] if baseline else {}
+    print(f"{summary['sessions_completed']} sessions completed, {summary['sessions_failed']} failed, "
+          f"{summary['requests']} requests in {summary['elapsed_seconds']}s = "
+          f"{summary['throughput']} req/s"
+          + (_delta(summary['throughput'], baseline['throughput']) if baseline else ""))
+    print(f"{'endpoint':<30} {'reqs':>6} {'err':>5} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16} {'max ms':>9}")
+
+    regressions = []
+    for label, e in summary['endpoints'].items():
+        base = base_endpoints.get(label, {})
+        columns = [f"{e[key]:.1f}{_delta(e[key], base.get(key, 0))}" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        errors = sum(e['errors'].values())
+        print(f"{label:<30} {e['requests']:>6} {errors:>5} {columns[0]:>16} {columns[1]:>16} {columns[2]:>16} {e['max_ms']:>9.1f}")
+        if base.get('p95_ms'):
+            regressions.append((label, (e['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100))
+    return regressions
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Base URL of a running server; omit to run the app in-process on the simulator")
+    parser.add_argument("--sessions", type=int, default=100, help="Player sessions to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Most sessions in flight at once")
+    parser.add_argument("--rate", type=float, default=0.0, help="Session arrivals per second (0: closed loop)")
+    parser.add_argument("--trains", type=int, default=5, help="Trainings per session")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the API rate limiter on when in-process")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible sessions")
+    parser.add_argument("--save", help="Write the summary as JSON to this file")
+    parser.add_argument("--baseline", help="Summary JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="Exit non-zero if any endpoint's p95 is this many percent above the baseline")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits)
+    else:
+        workdir = tempfile.mkdtemp(prefix="loadtest-")
+        os.environ["NETWORK"] = "simulator"
+        os.environ["RACING_DB_PATH"] = os.path.join(workdir, "racing.db")
+        os.environ["TRACE_EXPORT_PATH"] = os.path.join(workdir, "traces.jsonl")
+        if not args.rate_limit:
+            os.environ["RATE_LIMIT_ENABLED"] = "False"
+        import main as app
+        await app.startup_event()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://loadtest", timeout=60)
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    try:
+        await drive(client, recorder, args.sessions, args.concurrency, args.rate, args.trains)
+    finally:
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+        if app is not None:
+            await app.shutdown_event()
+
+    summary = summarize(recorder, elapsed, {
+        'target': args.url or 'in-process',
+        'sessions': args.sessions,
+        'concurrency': args.concurrency,
+        'rate': args.rate,
+        'trains': args.trains,
+    })
+    regressions = report(summary, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.max_regression is not None:
+        failed = [(label, pct) for label, pct in regressions if pct > args.max_regression]
+        for label, pct in failed:
+            print(f"p95 regression on {label}: {pct:+.0f}% (limit {args.max_regression:+.0f}%)")
+        if failed:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -2,9 +2,23 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
 from config import settings
 from routes import wallet_router, payment_router, health_router
 from routes.racing import router as racing_router
+from routes.metrics import router as metrics_router
+from routes.admin import router as admin_router
+from services.racing_service import racing_service
+from services.xrpl_client import ledger_client
+from services.account_cache import account_cache
+from services.payment_pipeline import payment_pipeline
+from services.fee_verifier import fee_verifier
+from services.wallet_pool import wallet_pool
+from services.health_prober import health_prober
+from services.fhe_engine import fhe_engine
+from services.event_hub import event_hub
+from services.metrics import MetricsMiddleware, clear_multiprocess_dir, mark_worker_dead
+from services.tracing import TracingMiddleware, tracer
 import logging
 
 logging.basicConfig(
@@ -27,9 +41,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+class EventStreamAwareGZipMiddleware(GZipMiddleware):
+    # Streamed gzip output is only flushed when the compressor's buffer
+    # fills, which would hold Server-Sent Events back indefinitely
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "text/event-stream" in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=1000)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -46,22 +72,48 @@ app.include_router(health_router)
 app.include_router(wallet_router)
 app.include_router(payment_router)
 app.include_router(racing_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Network: {settings.NETWORK}")
     logger.info(f"Debug mode: {settings.DEBUG}")
+    logger.info(f"Workers: {settings.WORKERS}")
+    tracer.start()
+    await health_prober.start()
+    await account_cache.start()
+    await payment_pipeline.start()
+    await fee_verifier.start()
+    await wallet_pool.start()
+    await fhe_engine.start()
+    await event_hub.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down API")
+    event_hub.close()
+    await event_hub.stop()
+    await fhe_engine.stop()
+    await wallet_pool.stop()
+    await fee_verifier.stop()
+    await payment_pipeline.stop()
+    await account_cache.stop()
+    await health_prober.stop()
+    racing_service.close()
+    await ledger_client.aclose()
+    tracer.stop()
+    mark_worker_dead()
 
 if __name__ == "__main__":
     import uvicorn
+    if settings.WORKERS > 1:
+        clear_multiprocess_dir()
     uvicorn.run(
-        app, 
-        host=settings.HOST, 
+        "main:app",
+        host=settings.HOST,
         port=settings.PORT,
+        workers=settings.WORKERS,
         log_level="info"
     )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Annotated, Optional
 
 class WalletCreateRequest(BaseModel):
     seed: str = Field(default="", description="Optional seed for wallet import")
@@ -35,16 +35,37 @@ class PaymentRequest(BaseModel):
 
 class PaymentResponse(BaseModel):
     status: str
+    # Follow a "pending" payment at /payment/jobs/{tracking_id}
+    tracking_id: Optional[str] = None
     transaction_hash: Optional[str] = None
     result: Optional[str] = None
     validated: bool
     fee: Optional[str] = None
     
+class PaymentJobResponse(BaseModel):
+    tracking_id: str
+    status: str
+    sender: str
+    destination: str
+    amount: float
+    sequence: Optional[int] = None
+    transaction_hash: Optional[str] = None
+    result: Optional[str] = None
+    validated: bool
+    fee: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: Optional[str] = None
+    
 class HealthResponse(BaseModel):
     status: str
     testnet_connected: bool
     ledger: Optional[int] = None
     network: str
+    latency_ms: Optional[float] = None
+    checked_at: Optional[str] = None
+    staleness_seconds: Optional[float] = None
+    error: Optional[str] = None
     
 class ErrorResponse(BaseModel):
     detail: str
@@ -60,17 +81,35 @@ class CarCreateRequest(BaseModel):
             raise ValueError('Invalid XRP address format')
         return v
 
+class PaidCarCreateRequest(BaseModel):
+    wallet_address: str = Field(..., description="Owner's wallet address")
+    tx_hash: str = Field(..., pattern=r'^[0-9A-Fa-f]{64}$', description="Hash of the client-signed 1 XRP fee payment")
+    
+    @validator('wallet_address')
+    def validate_wallet_address(cls, v):
+        if not v.startswith('r'):
+            raise ValueError('Invalid XRP address format')
+        return v
+
 class CarResponse(BaseModel):
     car_id: str
     wallet_address: str
     training_count: int
     created_at: str
     last_trained: Optional[str] = None
+    parent_id: Optional[str] = None
+    lineage_id: Optional[str] = None
+    generation: int = 0
     
 class GarageResponse(BaseModel):
     wallet_address: str
     cars: list[CarResponse]
     total_cars: int
+    next_cursor: Optional[str] = None
+
+class LineageResponse(BaseModel):
+    lineage_id: str
+    cars: list[CarResponse]
 
 class TrainCarRequest(BaseModel):
     car_id: str
@@ -78,6 +117,12 @@ class TrainCarRequest(BaseModel):
     wallet_seed: str = Field(..., description="Owner's wallet seed for payment")
     attribute_indices: Optional[list[int]] = None
     
+class PaidTrainCarRequest(BaseModel):
+    car_id: str
+    wallet_address: str
+    tx_hash: str = Field(..., pattern=r'^[0-9A-Fa-f]{64}$', description="Hash of the client-signed 1 XRP fee payment")
+    attribute_indices: Optional[list[int]] = None
+    
 class TrainCarResponse(BaseModel):
     success: bool
     car_id: str
@@ -103,16 +148,61 @@ class EnterRaceRequest(BaseModel):
     wallet_address: str
     wallet_seed: str = Field(..., description="Owner's wallet seed for payment (1 XRP entry fee)")
     
+class PaidEnterRaceRequest(BaseModel):
+    car_id: str
+    wallet_address: str
+    tx_hash: str = Field(..., pattern=r'^[0-9A-Fa-f]{64}$', description="Hash of the client-signed 1 XRP entry fee payment")
+    
 class RaceResponse(BaseModel):
     success: bool
     race_id: str
+    heat_id: Optional[str] = None
     car_id: str
     your_rank: int
     winner_car_id: str
     total_participants: int
+    real_opponents: int = 0
     prize_awarded: bool
     message: str
 
+class FeeJobResponse(BaseModel):
+    tracking_id: str
+    action: str
+    status: str
+    tx_hash: str
+    wallet_address: str
+    amount: float
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: Optional[str] = None
+
+class EngineJobResponse(BaseModel):
+    job_id: str
+    action: str
+    status: str
+    wallet_address: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: Optional[str] = None
+
+class RaceRecord(BaseModel):
+    race_id: str
+    heat_id: Optional[str] = None
+    car_id: str
+    your_rank: int
+    winner_car_id: str
+    total_participants: int
+    real_opponents: int = 0
+    prize_awarded: bool
+    timestamp: str
+    payment_tx: Optional[str] = None
+
+class RaceHistoryResponse(BaseModel):
+    races: list[RaceRecord]
+    next_cursor: Optional[str] = None
+
 class SellCarRequest(BaseModel):
     car_id: str
     wallet_address: str
@@ -121,3 +211,81 @@ class SellCarResponse(BaseModel):
     success: bool
     message: str
     refund_amount: float
+
+class BatchTrainItem(BaseModel):
+    car_id: str
+    attribute_indices: Optional[list[int]] = None
+
+class BatchTrainRequest(BaseModel):
+    wallet_address: str
+    wallet_seed: str = Field(..., description="Owner's wallet seed for payment (1 XRP per trained car)")
+    items: list[BatchTrainItem] = Field(..., min_length=1)
+
+class BatchTestSpeedRequest(BaseModel):
+    wallet_address: str
+    car_ids: Optional[list[str]] = Field(None, min_length=1, description="Cars to test; the whole garage if omitted")
+
+class BatchSellRequest(BaseModel):
+    wallet_address: str
+    car_ids: list[str] = Field(..., min_length=1)
+
+class BatchItemResult(BaseModel):
+    car_id: str
+    success: bool
+    message: str
+    new_car_id: Optional[str] = None
+    training_count: Optional[int] = None
+    trained_attributes: Optional[list[str]] = None
+    improved: Optional[bool] = None
+    speed: Optional[float] = None
+    refund_amount: Optional[float] = None
+
+class BatchResponse(BaseModel):
+    success: bool
+    message: str
+    succeeded: int
+    failed: int
+    results: list[BatchItemResult]
+    refund_amount: Optional[float] = None
+
+class WhatIfRequest(BaseModel):
+    car_id: str
+    wallet_address: str
+    perturbations: Optional[list[list[Annotated[int, Field(ge=-999, le=999)]]]] = Field(
+        default=None,
+        max_length=4096,
+        description="Flag delta vectors (10 values each); omit to evaluate every attribute subset"
+    )
+    delta: int = Field(default=20, ge=-999, le=999, description="Delta applied per trained attribute in subset mode")
+    
+    @validator('perturbations')
+    def validate_perturbations(cls, v):
+        if v and any(len(row) != 10 for row in v):
+            raise ValueError('Each perturbation must have exactly 10 deltas')
+        return v
+
+class WhatIfResponse(BaseModel):
+    car_id: str
+    base_speed: float
+    speeds: list[float]
+    subsets: Optional[list[int]] = None
+    best_index: int
+    best_speed: float
+    best_attributes: list[str]
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    car_id: str
+    wallet_address: str
+    speed: float
+
+class LeaderboardResponse(BaseModel):
+    total_cars: int
+    entries: list[LeaderboardEntry]
+
+class CarStandingResponse(BaseModel):
+    car_id: str
+    rank: int
+    speed: float
+    percentile: float
+    total_cars: int
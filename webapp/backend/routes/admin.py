@@ -0,0 +1,57 @@
+import asyncio
+import hmac
+import time
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from config import settings
+from services.profiler import ProfilerBusyError, profiler
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+def _require_admin(authorization: Optional[str]) -> None:
+    # Admin endpoints do not exist unless a token is configured
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+@router.get("/profile", response_class=PlainTextResponse, include_in_schema=False)
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    thread: Optional[str] = None,
+    authorization: Optional[str] = Header(None)
+):
+    """Sample this worker's threads for ``seconds`` and return collapsed stacks for a flame graph."""
+    _require_admin(authorization)
+    try:
+        # Sampled from a separate thread so the event loop keeps serving (and shows up in the profile)
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, profiler.capture, seconds, interval_ms / 1000, thread
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+    filename = f"profile-{int(time.time())}.collapsed"
+    return PlainTextResponse(result['collapsed'], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Profile-Samples": str(result['samples']),
+        "X-Profile-Duration": str(result['duration']),
+    })
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
 from models import HealthResponse
-import xrpl
-from xrpl.clients import JsonRpcClient
 from config import settings
+from services.health_prober import health_prober
 
 router = APIRouter(tags=["Health"])
 
@@ -12,23 +12,30 @@ router = APIRouter(tags=["Health"])
     status_code=status.HTTP_200_OK
 )
 async def health_check():
-    try:
-        client = JsonRpcClient(settings.TESTNET_URL)
-        server_info = client.request(xrpl.models.requests.ServerInfo())
-        
-        return {
-            "status": "healthy",
-            "testnet_connected": True,
-            "ledger": server_info.result.get('info', {}).get('validated_ledger', {}).get('seq'),
-            "network": settings.NETWORK
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "testnet_connected": False,
-            "network": settings.NETWORK,
-            "error": str(e)
-        }
+    # Served from the background prober's snapshot; never calls the ledger
+    snapshot = health_prober.snapshot()
+    if snapshot['checked_at'] is None:
+        health = "starting"
+    else:
+        health = "healthy" if snapshot['testnet_connected'] else "unhealthy"
+    
+    return {
+        "status": health,
+        "network": settings.NETWORK,
+        **snapshot
+    }
+
+@router.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    ready = health_prober.is_ready()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not_ready", **health_prober.snapshot()}
+    )
 
 @router.get("/")
 async def root():
@@ -39,10 +46,15 @@ async def root():
         "endpoints": {
             "GET /": "API info",
             "GET /health": "Health check",
+            "GET /health/live": "Liveness probe",
+            "GET /health/ready": "Readiness probe (503 until the ledger answered recently)",
+            "GET /metrics": "Prometheus metrics",
             "POST /wallet/create": "Create new wallet",
             "GET /wallet/{address}/balance": "Get wallet balance",
             "GET /wallet/{address}/info": "Get account info",
             "POST /payment": "Send XRP payment",
+            "POST /payment/async": "Submit XRP payment, returns a tracking id",
+            "GET /payment/jobs/{tracking_id}": "Payment status (GET .../events streams updates)",
             "GET /payment/{address}/history": "Get transaction history",
             "GET /docs": "API documentation"
         }
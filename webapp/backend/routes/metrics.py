@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from services.fhe_engine import fhe_engine
+from services.metrics import MULTIPROCESS_DIR
+from services.racing_service import racing_service
+import asyncio
+import time
+from typing import Optional
+
+router = APIRouter(tags=["Metrics"])
+
+class RacingCollector:
+    """Reads sizes at scrape time instead of on every request.
+
+    The stored row counts are full table scans, so they are taken in a
+    thread by ``refresh`` and reused for ``counts_ttl`` seconds. With
+    several workers only the worker serving the scrape reports these; the
+    database and the leaderboard look the same from every worker, and the
+    encrypted engine runs with a single worker.
+    """
+
+    def __init__(self, counts_ttl: float = 30.0):
+        self.counts_ttl = counts_ttl
+        self._counts = None
+        self._counted_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            if self._counts is None or time.monotonic() - self._counted_at > self.counts_ttl:
+                self._counts = await asyncio.to_thread(racing_service.repository.counts)
+                self._counted_at = time.monotonic()
+
+    def describe(self):
+        # Skips the registry's trial collection at import
+        return []
+
+    def collect(self):
+        if self._counts is not None:
+            yield GaugeMetricFamily('racing_cars_stored', 'Cars in the database', value=self._counts['cars'])
+            yield GaugeMetricFamily('racing_garages', 'Wallets owning at least one car', value=self._counts['wallets'])
+            yield GaugeMetricFamily('racing_races_stored', 'Races kept in the history', value=self._counts['races'])
+        yield GaugeMetricFamily('racing_leaderboard_size', 'Cars on the leaderboard', value=len(racing_service.leaderboard))
+        yield GaugeMetricFamily('fhe_engine_active_jobs', 'Encrypted engine jobs queued or running', value=fhe_engine.active_jobs)
+
+def scrape_registry(collector: RacingCollector, multiprocess_dir: Optional[str] = MULTIPROCESS_DIR) -> CollectorRegistry:
+    """The process registry, or with several workers one merging every worker's metric files."""
+    if not multiprocess_dir:
+        REGISTRY.register(collector)
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=multiprocess_dir)
+    registry.register(collector)
+    return registry
+
+racing_collector = RacingCollector()
+registry = scrape_registry(racing_collector)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    await racing_collector.refresh()
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
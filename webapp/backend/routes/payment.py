@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, status
-from models import PaymentRequest, PaymentResponse, ErrorResponse
+from routes.sse import job_events
+from models import PaymentRequest, PaymentResponse, PaymentJobResponse, ErrorResponse
 from services import PaymentService
 import xrpl.transaction
 
@@ -17,7 +18,7 @@ payment_service = PaymentService()
 )
 async def send_payment(payment: PaymentRequest):
     try:
-        result = payment_service.send_payment(
+        result = await payment_service.send_payment(
             sender_seed=payment.sender_seed,
             destination=payment.destination,
             amount=payment.amount
@@ -34,6 +35,61 @@ async def send_payment(payment: PaymentRequest):
             detail=f"Payment processing error: {str(e)}"
         )
 
+@router.post(
+    "/async",
+    response_model=PaymentJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        400: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    }
+)
+async def submit_payment(payment: PaymentRequest):
+    try:
+        job = await payment_service.submit_payment(
+            sender_seed=payment.sender_seed,
+            destination=payment.destination,
+            amount=payment.amount
+        )
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid payment: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Payment processing error: {str(e)}"
+        )
+
+@router.get(
+    "/jobs/{tracking_id}",
+    response_model=PaymentJobResponse,
+    responses={404: {"model": ErrorResponse}}
+)
+async def get_payment_job(tracking_id: str):
+    job = payment_service.get_job(tracking_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown tracking id"
+        )
+    return job.to_dict()
+
+@router.get(
+    "/jobs/{tracking_id}/events",
+    responses={404: {"model": ErrorResponse}}
+)
+async def stream_payment_job(tracking_id: str):
+    job = payment_service.get_job(tracking_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown tracking id"
+        )
+    return job_events(payment_service.pipeline.jobs, job)
+
 @router.get(
     "/{address}/history",
     responses={500: {"model": ErrorResponse}}
@@ -42,7 +98,7 @@ async def get_transaction_history(address: str, limit: int = 10):
     try:
         if limit > 50:
             limit = 50
-        result = payment_service.get_transaction_history(address, limit)
+        result = await payment_service.get_transaction_history(address, limit)
         return {"transactions": result}
     except Exception as e:
         raise HTTPException(
@@ -1,21 +1,100 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from models import (
     CarCreateRequest, CarResponse, GarageResponse,
     TrainCarRequest, TrainCarResponse,
     TestSpeedRequest, TestSpeedResponse,
     EnterRaceRequest, RaceResponse,
-    SellCarRequest, SellCarResponse
+    SellCarRequest, SellCarResponse,
+    BatchTrainRequest, BatchTestSpeedRequest, BatchSellRequest, BatchResponse,
+    WhatIfRequest, WhatIfResponse,
+    PaidCarCreateRequest, PaidTrainCarRequest, PaidEnterRaceRequest, FeeJobResponse, EngineJobResponse,
+    LeaderboardResponse, CarStandingResponse, RaceHistoryResponse, LineageResponse,
+    ErrorResponse
 )
-from services.racing_service import racing_service
+from config import settings
+from routes.sse import event_stream, format_event, job_events
+from services.racing_service import racing_service, RacingService
+from services.event_hub import SubscriberLimitError, event_hub
+from services.fee_verifier import fee_verifier
+from services.fhe_engine import EngineBusyError
+from services.rate_limiter import rate_limiter
+import asyncio
 import logging
+import math
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/race", tags=["racing"])
 
+def _admit(action: str, wallet_address: str, units: int = 1) -> None:
+    """Reject with 429 before doing any work if the wallet or the server is over its limit."""
+    admitted, retry_after = rate_limiter.acquire(action, wallet_address, units)
+    if not admitted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded, retry in {retry_after:.1f}s",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+def _train_result(base_car_id, attribute_indices, car, message) -> dict:
+    if attribute_indices:
+        trained_attrs = [car.ATTRIBUTE_NAMES[i] for i in attribute_indices if 0 <= i < 10]
+    else:
+        trained_attrs = car.ATTRIBUTE_NAMES.copy()
+    
+    logger.info(f"Trained car {base_car_id} -> New car {car.car_id} - Training #{car.training_count} - Attributes: {trained_attrs}")
+    
+    return {
+        'success': True,
+        'car_id': car.car_id,
+        'training_count': car.training_count,
+        'message': message,
+        'payment_required': True,
+        'trained_attributes': trained_attrs,
+        'speed': car.last_speed  # Return the new car's speed
+    }
+
+# Racing calls run on the service thread (racing_service.offload) and must
+# turn car views into dicts there; the loop may not read the car cache.
+
+def _create_car(wallet_address: str, wallet_seed: Optional[str] = None, payment_tx: Optional[str] = None):
+    success, car, message = racing_service.create_car(wallet_address, wallet_seed, payment_tx)
+    return success, car.to_dict_safe() if success else None, message
+
+def _train_car(car_id: str, wallet_address: str, wallet_seed: Optional[str] = None,
+               attribute_indices: Optional[list] = None, payment_tx: Optional[str] = None):
+    success, message, car, _ = racing_service.train_car(car_id, wallet_address, wallet_seed, attribute_indices, payment_tx)
+    return success, message, _train_result(car_id, attribute_indices, car, message) if success else None
+
+def _garage(wallet_address: str, latest_only: bool = False, cursor: Optional[str] = None, limit: Optional[int] = None):
+    cars, next_cursor = racing_service.get_garage(wallet_address, latest_only, cursor, limit)
+    return [car.to_dict_safe() for car in cars], next_cursor
+
+def _lineage(car_id: str):
+    cars = racing_service.get_lineage(car_id)
+    return None if cars is None else [car.to_dict_safe() for car in cars]
+
+def _race_result(race_result: dict) -> dict:
+    logger.info(f"Race completed - Car {race_result['car_id']} placed #{race_result['your_rank']} - Payment: {race_result.get('payment_tx', 'N/A')}")
+    
+    return {
+        'success': True,
+        'race_id': race_result['race_id'],
+        'heat_id': race_result['heat_id'],
+        'car_id': race_result['car_id'],
+        'your_rank': race_result['your_rank'],
+        'winner_car_id': race_result['winner_car_id'],
+        'total_participants': race_result['total_participants'],
+        'real_opponents': race_result['real_opponents'],
+        'prize_awarded': race_result['prize_awarded'],
+        'message': f"You placed #{race_result['your_rank']}! {'🎉 You won!' if race_result['prize_awarded'] else ''}"
+    }
+
 @router.post("/car/create", response_model=CarResponse, status_code=status.HTTP_201_CREATED)
 async def create_car(request: CarCreateRequest):
+    _admit('create_car', request.wallet_address)
     try:
-        success, car, message = racing_service.create_car(request.wallet_address, request.wallet_seed)
+        success, car, message = await racing_service.offload(_create_car, request.wallet_address, request.wallet_seed)
         
         if not success:
             logger.warning(f"Car creation failed for {request.wallet_address}: {message}")
@@ -24,8 +103,8 @@ async def create_car(request: CarCreateRequest):
                 detail=message
             )
         
-        logger.info(f"Created car {car.car_id} for {request.wallet_address}. Payment: {message}")
-        return car.to_dict_safe()
+        logger.info(f"Created car {car['car_id']} for {request.wallet_address}. Payment: {message}")
+        return car
     except HTTPException:
         raise
     except Exception as e:
@@ -36,14 +115,21 @@ async def create_car(request: CarCreateRequest):
         )
 
 @router.get("/garage/{wallet_address}", response_model=GarageResponse)
-async def get_garage(wallet_address: str):
+async def get_garage(wallet_address: str, latest_only: bool = False, cursor: Optional[str] = None,
+                     limit: Optional[int] = Query(None, ge=1, le=100)):
     try:
-        cars = racing_service.get_garage(wallet_address)
+        cars, next_cursor = await racing_service.offload(_garage, wallet_address, latest_only, cursor, limit)
         return {
             'wallet_address': wallet_address,
-            'cars': [car.to_dict_safe() for car in cars],
-            'total_cars': len(cars)
+            'cars': cars,
+            'total_cars': len(cars),
+            'next_cursor': next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error fetching garage: {str(e)}")
         raise HTTPException(
@@ -51,10 +137,25 @@ async def get_garage(wallet_address: str):
             detail=f"Failed to fetch garage: {str(e)}"
         )
 
+@router.get("/car/{car_id}/lineage", response_model=LineageResponse)
+async def get_lineage(car_id: str):
+    cars = await racing_service.offload(_lineage, car_id)
+    if cars is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return {
+        'lineage_id': cars[0]['lineage_id'] if cars else car_id,
+        'cars': cars
+    }
+
 @router.post("/train", response_model=TrainCarResponse)
 async def train_car(request: TrainCarRequest):
+    _admit('train_car', request.wallet_address)
     try:
-        success, message, car, changes = racing_service.train_car(
+        success, message, result = await racing_service.offload(
+            _train_car,
             request.car_id,
             request.wallet_address,
             request.wallet_seed,
@@ -68,22 +169,7 @@ async def train_car(request: TrainCarRequest):
                 detail=message
             )
         
-        if request.attribute_indices:
-            trained_attrs = [car.ATTRIBUTE_NAMES[i] for i in request.attribute_indices if 0 <= i < 10]
-        else:
-            trained_attrs = car.ATTRIBUTE_NAMES.copy()
-        
-        logger.info(f"Trained car {request.car_id} -> New car {car.car_id} - Training #{car.training_count} - Attributes: {trained_attrs}")
-        
-        return {
-            'success': True,
-            'car_id': car.car_id,
-            'training_count': car.training_count,
-            'message': message,
-            'payment_required': True,
-            'trained_attributes': trained_attrs,
-            'speed': car.last_speed  # Return the new car's speed
-        }
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -95,8 +181,10 @@ async def train_car(request: TrainCarRequest):
 
 @router.post("/test", response_model=TestSpeedResponse)
 async def test_speed(request: TestSpeedRequest):
+    _admit('test_speed', request.wallet_address)
     try:
-        success, improved, message, speed_value = racing_service.test_speed(
+        success, improved, message, speed_value = await racing_service.offload(
+            racing_service.test_speed,
             request.car_id,
             request.wallet_address
         )
@@ -125,10 +213,64 @@ async def test_speed(request: TestSpeedRequest):
             detail=f"Failed to test speed: {str(e)}"
         )
 
+@router.post("/what-if", response_model=WhatIfResponse)
+async def what_if(request: WhatIfRequest):
+    _admit('what_if', request.wallet_address)
+    try:
+        success, message, result = await racing_service.offload(
+            racing_service.what_if,
+            request.car_id,
+            request.wallet_address,
+            request.perturbations,
+            request.delta
+        )
+        
+        if not success:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=message
+            )
+        
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error evaluating what-if scenarios: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to evaluate scenarios: {str(e)}"
+        )
+
+@router.get("/limits")
+async def get_rate_limits():
+    return rate_limiter.stats()
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0)):
+    try:
+        return racing_service.get_leaderboard(limit, offset)
+    except Exception as e:
+        logger.error(f"Error fetching leaderboard: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch leaderboard: {str(e)}"
+        )
+
+@router.get("/leaderboard/{car_id}", response_model=CarStandingResponse)
+async def get_car_standing(car_id: str):
+    standing = racing_service.get_car_standing(car_id)
+    if standing is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Car not found"
+        )
+    return standing
+
 @router.post("/enter", response_model=RaceResponse)
 async def enter_race(request: EnterRaceRequest):
+    _admit('enter_race', request.wallet_address)
     try:
-        success, race_result = racing_service.enter_race(
+        success, race_result = await racing_service.enter_race(
             request.car_id,
             request.wallet_address,
             request.wallet_seed
@@ -141,18 +283,7 @@ async def enter_race(request: EnterRaceRequest):
                 detail=error_msg
             )
         
-        logger.info(f"Race completed - Car {request.car_id} placed #{race_result['your_rank']} - Payment: {race_result.get('payment_tx', 'N/A')}")
-        
-        return {
-            'success': True,
-            'race_id': race_result['race_id'],
-            'car_id': race_result['car_id'],
-            'your_rank': race_result['your_rank'],
-            'winner_car_id': race_result['winner_car_id'],
-            'total_participants': race_result['total_participants'],
-            'prize_awarded': race_result['prize_awarded'],
-            'message': f"You placed #{race_result['your_rank']}! {'🎉 You won!' if race_result['prize_awarded'] else ''}"
-        }
+        return _race_result(race_result)
     except HTTPException:
         raise
     except Exception as e:
@@ -162,10 +293,39 @@ async def enter_race(request: EnterRaceRequest):
             detail=f"Failed to enter race: {str(e)}"
         )
 
+async def _race_history(car_id=None, wallet_address=None, cursor=None, limit=20) -> dict:
+    try:
+        races, next_cursor = await asyncio.to_thread(racing_service.get_race_history, car_id, wallet_address, cursor, limit)
+        return {'races': races, 'next_cursor': next_cursor}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error fetching race history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch race history: {str(e)}"
+        )
+
+@router.get("/history", response_model=RaceHistoryResponse)
+async def get_race_history(cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+    return await _race_history(cursor=cursor, limit=limit)
+
+@router.get("/history/car/{car_id}", response_model=RaceHistoryResponse)
+async def get_car_race_history(car_id: str, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+    return await _race_history(car_id=car_id, cursor=cursor, limit=limit)
+
+@router.get("/history/wallet/{wallet_address}", response_model=RaceHistoryResponse)
+async def get_wallet_race_history(wallet_address: str, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+    return await _race_history(wallet_address=wallet_address, cursor=cursor, limit=limit)
+
 @router.post("/car/sell", response_model=SellCarResponse)
 async def sell_car(request: SellCarRequest):
     try:
-        success, message, refund_amount = racing_service.sell_car(
+        success, message, refund_amount = await racing_service.offload(
+            racing_service.sell_car,
             request.car_id,
             request.wallet_address
         )
@@ -193,3 +353,362 @@ async def sell_car(request: SellCarRequest):
             detail=f"Failed to sell car: {str(e)}"
         )
 
+
+# ----- batches -----
+# Many cars of one wallet per request, with a result per car. Failed items
+# do not fail the request; each is charged to the rate limiter like a single call.
+
+def _check_batch_size(count: int) -> None:
+    if count > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_MAX_ITEMS} cars per batch"
+        )
+
+def _batch_response(success: bool, message: str, results: list, **extra) -> dict:
+    succeeded = sum(1 for result in results if result['success'])
+    return {
+        'success': success,
+        'message': message,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results,
+        **extra
+    }
+
+@router.post("/batch/train", response_model=BatchResponse, responses={400: {"model": ErrorResponse}})
+async def train_cars(request: BatchTrainRequest):
+    _check_batch_size(len(request.items))
+    _admit('train_car', request.wallet_address, len(request.items))
+    try:
+        success, results, message = await racing_service.offload(
+            racing_service.train_cars,
+            request.wallet_address,
+            [(item.car_id, item.attribute_indices) for item in request.items],
+            request.wallet_seed
+        )
+        
+        logger.info(f"Batch training for {request.wallet_address}: {message}")
+        return _batch_response(success, message, results)
+    except Exception as e:
+        logger.error(f"Error training cars: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to train cars: {str(e)}"
+        )
+
+@router.post("/batch/test", response_model=BatchResponse, responses={400: {"model": ErrorResponse}})
+async def test_speeds(request: BatchTestSpeedRequest):
+    car_ids = request.car_ids
+    if car_ids is None:
+        cars, next_cursor = await racing_service.offload(_garage, request.wallet_address,
+                                                         limit=settings.BATCH_MAX_ITEMS)
+        if next_cursor is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Garage holds more than {settings.BATCH_MAX_ITEMS} cars; pass car_ids in batches"
+            )
+        car_ids = [car['car_id'] for car in cars]
+    _check_batch_size(len(car_ids))
+    _admit('test_speed', request.wallet_address, max(1, len(car_ids)))
+    try:
+        success, results = await racing_service.offload(racing_service.test_speeds, request.wallet_address, car_ids)
+        
+        message = f"Tested {sum(1 for result in results if result['success'])} of {len(car_ids)} cars"
+        logger.info(f"Batch speed test for {request.wallet_address}: {message}")
+        return _batch_response(success, message, results)
+    except Exception as e:
+        logger.error(f"Error testing speeds: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to test speeds: {str(e)}"
+        )
+
+@router.post("/batch/sell", response_model=BatchResponse, responses={400: {"model": ErrorResponse}})
+async def sell_cars(request: BatchSellRequest):
+    _check_batch_size(len(request.car_ids))
+    try:
+        success, results, refund_amount = await racing_service.offload(
+            racing_service.sell_cars, request.wallet_address, request.car_ids
+        )
+        
+        message = f"Sold {sum(1 for result in results if result['success'])} of {len(request.car_ids)} cars for {refund_amount} XRP"
+        logger.info(f"Batch sale for {request.wallet_address}: {message}")
+        return _batch_response(success, message, results, refund_amount=refund_amount)
+    except Exception as e:
+        logger.error(f"Error selling cars: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sell cars: {str(e)}"
+        )
+
+
+# ----- live events -----
+# One Server-Sent Events stream per wallet instead of polling the garage:
+# car.created/trained/tested/sold, race.entered/finished, fee_job, payment,
+# payment.received and engine_job, in the order they happened.
+
+@router.get(
+    "/events/{wallet_address}",
+    responses={503: {"model": ErrorResponse}}
+)
+async def stream_wallet_events(wallet_address: str):
+    if event_hub.subscriber_count >= event_hub.max_subscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event streams open, please retry later",
+            headers={"Retry-After": "5"}
+        )
+    
+    async def events():
+        try:
+            subscription = event_hub.subscribe(wallet_address)
+        except SubscriberLimitError:
+            return
+        try:
+            # Anything that happened before this event must be read from the garage
+            yield format_event('ready', {'wallet_address': wallet_address})
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=settings.EVENT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield format_event(message['event'], message['data'], message['id'])
+                if message['event'] == 'lagged':
+                    break
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return event_stream(events())
+
+
+# ----- client-paid actions -----
+# The client submits the fee payment itself and sends its hash; the action
+# runs in the background once the payment is verified on the ledger.
+
+def _submit_paid(action: str, tx_hash: str, wallet_address: str, run) -> dict:
+    try:
+        job = fee_verifier.submit(action, tx_hash, wallet_address, RacingService.FEE_XRP, run)
+        logger.info(f"Queued {action} for {wallet_address} pending payment {job.tx_hash}")
+        return job.to_dict()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+async def _require_ownership(car_id: str, wallet_address: str) -> None:
+    owned, message = await racing_service.offload(racing_service.check_ownership, car_id, wallet_address)
+    if not owned:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=message
+        )
+
+@router.post(
+    "/car/create/paid",
+    response_model=FeeJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}}
+)
+async def create_car_paid(request: PaidCarCreateRequest):
+    _admit('create_car', request.wallet_address)
+    async def run(payment_tx: str) -> dict:
+        success, car, message = await racing_service.offload(_create_car, request.wallet_address, payment_tx=payment_tx)
+        if not success:
+            raise ValueError(message)
+        logger.info(f"Created car {car['car_id']} for {request.wallet_address}. Payment: {message}")
+        return car
+    
+    return _submit_paid('create_car', request.tx_hash, request.wallet_address, run)
+
+@router.post(
+    "/train/paid",
+    response_model=FeeJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}}
+)
+async def train_car_paid(request: PaidTrainCarRequest):
+    _admit('train_car', request.wallet_address)
+    await _require_ownership(request.car_id, request.wallet_address)
+    
+    async def run(payment_tx: str) -> dict:
+        success, message, result = await racing_service.offload(
+            _train_car,
+            request.car_id,
+            request.wallet_address,
+            attribute_indices=request.attribute_indices,
+            payment_tx=payment_tx
+        )
+        if not success:
+            raise ValueError(message)
+        return result
+    
+    return _submit_paid('train_car', request.tx_hash, request.wallet_address, run)
+
+@router.post(
+    "/enter/paid",
+    response_model=FeeJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}}
+)
+async def enter_race_paid(request: PaidEnterRaceRequest):
+    _admit('enter_race', request.wallet_address)
+    await _require_ownership(request.car_id, request.wallet_address)
+    
+    async def run(payment_tx: str) -> dict:
+        success, race_result = await racing_service.enter_race(
+            request.car_id,
+            request.wallet_address,
+            payment_tx=payment_tx
+        )
+        if not success:
+            raise ValueError(race_result.get('message', 'Failed to enter race') if race_result else 'Failed to enter race')
+        return _race_result(race_result)
+    
+    return _submit_paid('enter_race', request.tx_hash, request.wallet_address, run)
+
+@router.get(
+    "/jobs/{tracking_id}",
+    response_model=FeeJobResponse,
+    responses={404: {"model": ErrorResponse}}
+)
+async def get_fee_job(tracking_id: str):
+    job = fee_verifier.get(tracking_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown tracking id"
+        )
+    return job.to_dict()
+
+@router.get(
+    "/jobs/{tracking_id}/events",
+    responses={404: {"model": ErrorResponse}}
+)
+async def stream_fee_job(tracking_id: str):
+    job = fee_verifier.get(tracking_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown tracking id"
+        )
+    return job_events(fee_verifier.jobs, job)
+
+
+# ----- encrypted engine -----
+# Enabled with RACING_ENGINE=fhe. Homomorphic evaluation takes seconds, so
+# every action returns a job handle (202) to poll for the result.
+
+def _submit_encrypted(action: str, wallet_address: str, run) -> dict:
+    if racing_service.engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Encrypted engine is not enabled"
+        )
+    try:
+        job = racing_service.engine.submit(action, wallet_address, run)
+        logger.info(f"Queued encrypted {action} for {wallet_address} as job {job.job_id}")
+        return job.to_dict()
+    except EngineBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+@router.post(
+    "/fhe/car/create",
+    response_model=EngineJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def create_car_encrypted(request: CarCreateRequest):
+    _admit('fhe_create_car', request.wallet_address)
+    async def run() -> dict:
+        success, car, message = await racing_service.create_car_encrypted(request.wallet_address, request.wallet_seed)
+        if not success:
+            raise ValueError(message)
+        return car
+    
+    return _submit_encrypted('create_car', request.wallet_address, run)
+
+@router.post(
+    "/fhe/train",
+    response_model=EngineJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def train_car_encrypted(request: TrainCarRequest):
+    _admit('fhe_train_car', request.wallet_address)
+    await _require_ownership(request.car_id, request.wallet_address)
+    
+    async def run() -> dict:
+        success, car, message = await racing_service.train_car_encrypted(
+            request.car_id,
+            request.wallet_address,
+            request.wallet_seed,
+            request.attribute_indices
+        )
+        if not success:
+            raise ValueError(message)
+        return car
+    
+    return _submit_encrypted('train_car', request.wallet_address, run)
+
+@router.post(
+    "/fhe/test",
+    response_model=EngineJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def test_speed_encrypted(request: TestSpeedRequest):
+    _admit('fhe_test_speed', request.wallet_address)
+    await _require_ownership(request.car_id, request.wallet_address)
+    
+    async def run() -> dict:
+        success, result, message = await racing_service.test_speed_encrypted(request.car_id, request.wallet_address)
+        if not success:
+            raise ValueError(message)
+        return result
+    
+    return _submit_encrypted('test_speed', request.wallet_address, run)
+
+@router.post(
+    "/fhe/enter",
+    response_model=EngineJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def enter_race_encrypted(request: EnterRaceRequest):
+    _admit('fhe_enter_race', request.wallet_address)
+    await _require_ownership(request.car_id, request.wallet_address)
+    
+    async def run() -> dict:
+        success, race_result = await racing_service.enter_race_encrypted(
+            request.car_id,
+            request.wallet_address,
+            request.wallet_seed
+        )
+        if not success:
+            raise ValueError(race_result.get('message', 'Failed to enter race') if race_result else 'Failed to enter race')
+        return _race_result(race_result)
+    
+    return _submit_encrypted('enter_race', request.wallet_address, run)
+
+@router.get(
+    "/fhe/jobs/{job_id}",
+    response_model=EngineJobResponse,
+    responses={404: {"model": ErrorResponse}}
+)
+async def get_engine_job(job_id: str):
+    job = racing_service.engine.get(job_id) if racing_service.engine is not None else None
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown job id"
+        )
+    return job.to_dict()
+
@@ -0,0 +1,46 @@
+"""Server-sent event helpers shared by the streaming endpoints"""
+from fastapi.responses import StreamingResponse
+from services.job_tracker import JobTracker
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional
+
+
+def format_event(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{frame}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    """Stream ``events`` without letting proxies cache or buffer them."""
+    return StreamingResponse(events, media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+def job_events(tracker: JobTracker, job: Any, refresh: float = 15) -> StreamingResponse:
+    """Stream a tracked job's status until it finishes.
+
+    The current state is sent first, then every update. If nothing arrives
+    for ``refresh`` seconds the state is re-sent, which also keeps the
+    connection alive.
+    """
+    job_id = getattr(job, tracker.key)
+
+    async def events():
+        queue = tracker.subscribe(job_id)
+        try:
+            snapshot = job.to_dict()
+            while True:
+                yield format_event('status', snapshot)
+                if snapshot['status'] in tracker.terminal_statuses:
+                    break
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=refresh)
+                except asyncio.TimeoutError:
+                    snapshot = job.to_dict()
+        finally:
+            tracker.unsubscribe(job_id, queue)
+
+    return event_stream(events())
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, status
 from models import WalletCreateRequest, WalletResponse, BalanceResponse, ErrorResponse
 from services import WalletService
+from services.wallet_service import WalletFundingError
 
 router = APIRouter(prefix="/wallet", tags=["Wallet"])
 wallet_service = WalletService()
@@ -9,12 +10,18 @@ wallet_service = WalletService()
     "/create", 
     response_model=WalletResponse,
     status_code=status.HTTP_201_CREATED,
-    responses={500: {"model": ErrorResponse}}
+    responses={500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
 )
 async def create_wallet(wallet_data: WalletCreateRequest):
     try:
-        result = wallet_service.create_wallet(wallet_data.seed)
+        result = await wallet_service.create_wallet(wallet_data.seed)
         return result
+    except WalletFundingError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -28,7 +35,7 @@ async def create_wallet(wallet_data: WalletCreateRequest):
 )
 async def get_balance(address: str):
     try:
-        result = wallet_service.get_balance(address)
+        result = await wallet_service.get_balance(address)
         return result
     except Exception as e:
         raise HTTPException(
@@ -42,7 +49,7 @@ async def get_balance(address: str):
 )
 async def get_account_info(address: str):
     try:
-        result = wallet_service.get_account_info(address)
+        result = await wallet_service.get_account_info(address)
         return result
     except Exception as e:
         raise HTTPException(
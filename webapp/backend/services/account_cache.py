@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import xrpl
+from xrpl.asyncio.clients import AsyncJsonRpcClient, AsyncWebsocketClient
+from xrpl.models.requests import StreamParameter, Subscribe, Unsubscribe
+from config import settings
+from services.xrpl_client import ledger_client
+
+logger = logging.getLogger(__name__)
+
+class _Entry:
+    __slots__ = ('account_data', 'fetched_at')
+
+    def __init__(self, account_data: Dict[str, Any], fetched_at: float):
+        self.account_data = account_data
+        self.fetched_at = fetched_at
+
+class AccountCache:
+    """Per-address cache of validated ``account_info`` data.
+
+    Cached addresses are subscribed on the ledger websocket: validated
+    transactions touching them update the cached AccountRoot fields (or drop
+    the entry), and ledger-close events track the latest validated ledger.
+    While the stream is down entries expire after ``ttl`` seconds; while it
+    is up they live up to ``max_age`` as a safety net. Concurrent misses for
+    the same address share one ledger request.
+    """
+
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, wss_url: str = settings.TESTNET_WSS,
+                 ttl: float = 5.0, max_age: float = 60.0, max_entries: int = 10000,
+                 stream_enabled: bool = True):
+        self.client = client
+        self.wss_url = wss_url
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.stream_enabled = stream_enabled
+
+        self.ledger_index: Optional[int] = None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped when an address changes mid-fetch so the stale result is not stored
+        self._generations: Dict[str, int] = {}
+        self._ws: Optional[AsyncWebsocketClient] = None
+        self._stream_task: Optional[asyncio.Task] = None
+
+    @property
+    def streaming(self) -> bool:
+        return self._ws is not None and self._ws.is_open()
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if self.stream_enabled and self._stream_task is None:
+            self._stream_task = asyncio.create_task(self._stream_loop())
+
+    async def stop(self) -> None:
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+            try:
+                await self._stream_task
+            except asyncio.CancelledError:
+                pass
+            self._stream_task = None
+
+    # ----- reads -----
+
+    async def get(self, address: str) -> Dict[str, Any]:
+        entry = self._entries.get(address)
+        if entry is not None and self._is_fresh(entry):
+            self._entries.move_to_end(address)
+            return dict(entry.account_data)
+
+        future = self._inflight.get(address)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(address, self._generations.get(address, 0)))
+            self._inflight[address] = future
+            future.add_done_callback(lambda _: self._fetch_done(address))
+        return dict(await asyncio.shield(future))
+
+    def _fetch_done(self, address: str) -> None:
+        self._inflight.pop(address, None)
+        self._generations.pop(address, None)
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        limit = self.max_age if self.streaming else self.ttl
+        return time.monotonic() - entry.fetched_at < limit
+
+    async def _fetch(self, address: str, generation: int) -> Dict[str, Any]:
+        response = await self.client.request(xrpl.models.requests.AccountInfo(
+            account=address,
+            ledger_index="validated"
+        ))
+        if not response.is_successful():
+            raise xrpl.asyncio.clients.XRPLRequestFailureException(response.result)
+
+        account_data = response.result['account_data']
+        if self._generations.get(address, 0) == generation:
+            self._store(address, account_data)
+        return account_data
+
+    def _store(self, address: str, account_data: Dict[str, Any]) -> None:
+        is_new = address not in self._entries
+        self._entries[address] = _Entry(account_data, time.monotonic())
+        self._entries.move_to_end(address)
+        if is_new:
+            self._send_soon(Subscribe(accounts=[address]))
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._send_soon(Unsubscribe(accounts=[evicted]))
+
+    # ----- invalidation -----
+
+    def _bump(self, address: str) -> None:
+        if address in self._inflight:
+            self._generations[address] = self._generations.get(address, 0) + 1
+
+    def invalidate(self, *addresses: str) -> None:
+        for address in addresses:
+            self._bump(address)
+            self._entries.pop(address, None)
+
+    def _apply_transaction(self, message: Dict[str, Any]) -> None:
+        meta = message.get('meta') or {}
+        for node in meta.get('AffectedNodes', []):
+            kind, body = next(iter(node.items()))
+            if body.get('LedgerEntryType') != 'AccountRoot':
+                continue
+            fields = body.get('FinalFields') or body.get('NewFields') or {}
+            address = fields.get('Account')
+            if address not in self._entries:
+                continue
+
+            self._bump(address)
+            if kind == 'ModifiedNode':
+                updated = {**self._entries[address].account_data, **fields}
+                updated['PreviousTxnID'] = message.get('transaction', {}).get('hash')
+                self._entries[address] = _Entry(updated, time.monotonic())
+            else:
+                self._entries.pop(address, None)
+
+    # ----- websocket stream -----
+
+    def _send_soon(self, request) -> None:
+        if not self.streaming:
+            return
+        ws = self._ws
+
+        async def send():
+            try:
+                await ws.send(request)
+            except Exception as e:
+                logger.warning(f"Account stream send failed: {e}")
+
+        asyncio.ensure_future(send())
+
+    async def _stream_loop(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                async with AsyncWebsocketClient(self.wss_url) as ws:
+                    # Anything cached before this connection may have missed events
+                    self._entries.clear()
+                    await ws.send(Subscribe(streams=[StreamParameter.LEDGER]))
+                    self._ws = ws
+                    backoff = 1.0
+                    logger.info(f"Account stream connected to {self.wss_url}")
+                    await self._consume(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Account stream error: {e}")
+            finally:
+                self._ws = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _consume(self, ws: AsyncWebsocketClient) -> None:
+        messages = ws.__aiter__()
+        while ws.is_open():
+            # Ledgers close every few seconds; silence means a dead connection
+            message = await asyncio.wait_for(messages.__anext__(), timeout=30)
+            kind = message.get('type')
+            if kind == 'ledgerClosed':
+                self.ledger_index = message.get('ledger_index')
+            elif kind == 'transaction' and message.get('validated'):
+                self._apply_transaction(message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'streaming': self.streaming,
+            'ledger_index': self.ledger_index,
+        }
+
+account_cache = AccountCache(
+    ttl=settings.ACCOUNT_CACHE_TTL,
+    max_age=settings.ACCOUNT_CACHE_MAX_AGE,
+    max_entries=settings.ACCOUNT_CACHE_SIZE,
+    # The simulator has no websocket endpoint
+    stream_enabled=settings.ACCOUNT_STREAM_ENABLED and settings.NETWORK != "simulator"
+)
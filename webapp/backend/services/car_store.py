@@ -0,0 +1,336 @@
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+NUM_ATTRIBUTES = 10
+BASE_WEIGHTS = np.array([0.15, 0.12, 0.10, 0.08, 0.11, 0.09, 0.13, 0.07, 0.08, 0.07])
+
+MIN_RAW, MAX_RAW = 100, 900
+MIN_SPEED, MAX_SPEED = 150, 350
+
+_rng = np.random.default_rng()
+
+def scale_speed(raw_speed):
+    """Map weighted flag sums to km/h; works on scalars and arrays alike."""
+    speed = MIN_SPEED + (raw_speed - MIN_RAW) * (MAX_SPEED - MIN_SPEED) / (MAX_RAW - MIN_RAW)
+    return np.clip(speed, MIN_SPEED, MAX_SPEED)
+
+def _iso(ts: float) -> Optional[str]:
+    if np.isnan(ts):
+        return None
+    return datetime.utcfromtimestamp(ts).isoformat()
+
+class Car:
+    """Lightweight view over one slot of a CarStore.
+
+    Views are cheap to create and hold no data of their own; a view must not
+    be used after its car has been deleted from the store.
+    """
+
+    __slots__ = ('_store', '_slot')
+
+    ATTRIBUTE_NAMES = [
+        'tyres',        # 0: Tyre quality
+        'brakes',       # 1: Brake performance
+        'engine',       # 2: Engine power
+        'aerodynamics', # 3: Aerodynamic efficiency
+        'suspension',   # 4: Suspension quality
+        'transmission', # 5: Transmission efficiency
+        'fuel_system',  # 6: Fuel system optimization
+        'electronics',  # 7: Electronic systems
+        'chassis',      # 8: Chassis rigidity
+        'cooling'       # 9: Cooling system
+    ]
+
+    def __init__(self, store: 'CarStore', slot: int):
+        self._store = store
+        self._slot = slot
+
+    @property
+    def slot(self) -> int:
+        return self._slot
+
+    @property
+    def car_id(self) -> str:
+        return self._store._car_ids[self._slot]
+
+    @property
+    def wallet_address(self) -> str:
+        return self._store._wallets[self._store.owners[self._slot]]
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._store.flags[self._slot]
+
+    @flags.setter
+    def flags(self, values) -> None:
+        self._store.flags[self._slot] = values
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._store.weights[self._slot]
+
+    @weights.setter
+    def weights(self, values) -> None:
+        self._store.weights[self._slot] = values
+
+    @property
+    def training_count(self) -> int:
+        return int(self._store.training_counts[self._slot])
+
+    @training_count.setter
+    def training_count(self, value: int) -> None:
+        self._store.training_counts[self._slot] = value
+
+    @property
+    def last_speed(self) -> Optional[float]:
+        speed = self._store.last_speeds[self._slot]
+        return None if np.isnan(speed) else float(speed)
+
+    @last_speed.setter
+    def last_speed(self, value: Optional[float]) -> None:
+        self._store.last_speeds[self._slot] = np.nan if value is None else value
+
+    @property
+    def version(self) -> int:
+        return int(self._store.versions[self._slot])
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self._store._parents[self._slot]
+
+    @property
+    def lineage_id(self) -> str:
+        return self._store._lineages[self._slot]
+
+    @property
+    def generation(self) -> int:
+        return int(self._store.generations[self._slot])
+
+    @property
+    def created_at(self) -> str:
+        return _iso(self._store.created_ts[self._slot])
+
+    @property
+    def last_trained(self) -> Optional[str]:
+        return _iso(self._store.trained_ts[self._slot])
+
+    def calculate_speed(self) -> float:
+        speed = float(scale_speed(float(self.flags @ self.weights)))
+        self.last_speed = speed
+        return speed
+
+    def speeds_with_deltas(self, deltas: np.ndarray) -> np.ndarray:
+        """Speeds for each row of flag deltas, without modifying the car."""
+        perturbed = np.clip(self.flags.astype(np.int32) + deltas, 1, 999)
+        return scale_speed(perturbed @ self.weights)
+
+    def train(self, attribute_indices: Optional[List[int]] = None) -> dict:
+        if attribute_indices is None or len(attribute_indices) == 0:
+            attribute_indices = list(range(NUM_ATTRIBUTES))
+
+        flags = self.flags
+        changes = {}
+        for i in attribute_indices:
+            if 0 <= i < NUM_ATTRIBUTES:
+                old_value = int(flags[i])
+                delta = random.randint(-20, 20)
+                new_value = max(1, min(999, old_value + delta))
+                flags[i] = new_value
+                changes[self.ATTRIBUTE_NAMES[i]] = {
+                    'old': old_value,
+                    'delta': delta,
+                    'new': new_value
+                }
+
+        self._store.training_counts[self._slot] += 1
+        self._store.trained_ts[self._slot] = time.time()
+
+        self.last_speed = None
+
+        return changes
+
+    def to_dict_safe(self) -> dict:
+        return {
+            'car_id': self.car_id,
+            'wallet_address': self.wallet_address,
+            'training_count': self.training_count,
+            'created_at': self.created_at,
+            'last_trained': self.last_trained,
+            'parent_id': self.parent_id,
+            'lineage_id': self.lineage_id,
+            'generation': self.generation
+        }
+
+class CarStore(Mapping):
+    """Columnar car storage: one contiguous array per attribute, indexed by slot.
+
+    Behaves like a read-only ``Dict[str, Car]`` plus ``add`` and ``del``, so
+    callers that used the old dict of Car objects keep working. Freed slots
+    are recycled through a free list.
+
+    With ``max_cars`` the store is a bounded LRU cache: adding or restoring
+    a car beyond it evicts the least recently used ones, whose views become
+    invalid like deleted ones.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, max_cars: Optional[int] = None):
+        capacity = max(1, capacity)
+        self.flags = np.zeros((capacity, NUM_ATTRIBUTES), dtype=np.int16)
+        self.weights = np.zeros((capacity, NUM_ATTRIBUTES), dtype=np.float64)
+        self.training_counts = np.zeros(capacity, dtype=np.int32)
+        self.last_speeds = np.full(capacity, np.nan, dtype=np.float64)
+        self.created_ts = np.full(capacity, np.nan, dtype=np.float64)
+        self.trained_ts = np.full(capacity, np.nan, dtype=np.float64)
+        self.owners = np.full(capacity, -1, dtype=np.int32)
+        self.versions = np.zeros(capacity, dtype=np.int64)
+        self.generations = np.zeros(capacity, dtype=np.int32)
+
+        self._car_ids: List[Optional[str]] = [None] * capacity
+        # Lineage: the car this one was trained from and the root it descends from
+        self._parents: List[Optional[str]] = [None] * capacity
+        self._lineages: List[Optional[str]] = [None] * capacity
+        self.max_cars = max_cars
+        # Least recently used first
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._high_water = 0
+
+        # Wallet addresses are interned so each slot stores a small integer
+        self._wallets: List[str] = []
+        self._wallet_codes: Dict[str, int] = {}
+
+    @property
+    def capacity(self) -> int:
+        return len(self._car_ids)
+
+    def _grow(self) -> None:
+        old = self.capacity
+        new = old * 2
+        for name, fill in (('flags', 0), ('weights', 0.0), ('training_counts', 0),
+                           ('last_speeds', np.nan), ('created_ts', np.nan),
+                           ('trained_ts', np.nan), ('owners', -1), ('versions', 0),
+                           ('generations', 0)):
+            arr = getattr(self, name)
+            grown = np.full((new,) + arr.shape[1:], fill, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        for ids in (self._car_ids, self._parents, self._lineages):
+            ids.extend([None] * (new - old))
+
+    def _wallet_code(self, wallet_address: str) -> int:
+        code = self._wallet_codes.get(wallet_address)
+        if code is None:
+            code = len(self._wallets)
+            self._wallets.append(wallet_address)
+            self._wallet_codes[wallet_address] = code
+        return code
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._high_water == self.capacity:
+            self._grow()
+        slot = self._high_water
+        self._high_water += 1
+        return slot
+
+    def add(self, car_id: str, wallet_address: str, parent: Optional[Car] = None) -> Car:
+        """Allocate a slot for a new car with random flags and normalized weights.
+
+        A car trained from ``parent`` joins the parent's lineage one generation on.
+        """
+        if car_id in self._slots:
+            raise KeyError(f"Car {car_id} already exists")
+
+        slot = self._allocate()
+        self.flags[slot] = _rng.integers(1, 1000, size=NUM_ATTRIBUTES)
+        weights = BASE_WEIGHTS + _rng.uniform(-0.02, 0.02, size=NUM_ATTRIBUTES)
+        self.weights[slot] = weights / weights.sum()
+        self.training_counts[slot] = 0
+        self.last_speeds[slot] = np.nan
+        self.created_ts[slot] = time.time()
+        self.trained_ts[slot] = np.nan
+        self.owners[slot] = self._wallet_code(wallet_address)
+        self.versions[slot] = 0
+        self.generations[slot] = 0 if parent is None else parent.generation + 1
+
+        self._car_ids[slot] = car_id
+        self._parents[slot] = None if parent is None else parent.car_id
+        self._lineages[slot] = car_id if parent is None else parent.lineage_id
+        self._slots[car_id] = slot
+        self._evict()
+        return Car(self, slot)
+
+    def restore(self, car_id: str, wallet_address: str, flags: bytes, weights: bytes,
+                training_count: int, last_speed: Optional[float],
+                created_ts: float, trained_ts: Optional[float], version: int = 0,
+                parent_id: Optional[str] = None, lineage_id: Optional[str] = None,
+                generation: int = 0) -> Car:
+        """Load a persisted car (a row from the cars table) into a slot."""
+        slot = self._slots.get(car_id)
+        if slot is None:
+            slot = self._allocate()
+            self._car_ids[slot] = car_id
+            self._slots[car_id] = slot
+        else:
+            self._slots.move_to_end(car_id)
+        self.flags[slot] = np.frombuffer(flags, dtype=np.int16)
+        self.weights[slot] = np.frombuffer(weights, dtype=np.float64)
+        self.training_counts[slot] = training_count
+        self.last_speeds[slot] = np.nan if last_speed is None else last_speed
+        self.created_ts[slot] = created_ts
+        self.trained_ts[slot] = np.nan if trained_ts is None else trained_ts
+        self.owners[slot] = self._wallet_code(wallet_address)
+        self.versions[slot] = version
+        self.generations[slot] = generation
+        self._parents[slot] = parent_id
+        self._lineages[slot] = lineage_id or car_id
+        self._evict()
+        return Car(self, slot)
+
+    def touch(self, car_id: str) -> None:
+        """Mark a car as just used, so it is evicted last."""
+        self._slots.move_to_end(car_id)
+
+    def _evict(self) -> None:
+        while self.max_cars is not None and len(self._slots) > self.max_cars:
+            del self[next(iter(self._slots))]
+
+    def slot_of(self, car_id: str) -> Optional[int]:
+        return self._slots.get(car_id)
+
+    def compute_speeds(self, slots: np.ndarray) -> np.ndarray:
+        """Speeds for many slots in one pass; does not touch last_speeds."""
+        raw = np.einsum('ij,ij->i', self.flags[slots], self.weights[slots])
+        return scale_speed(raw)
+
+    def live_slots(self) -> np.ndarray:
+        return np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+
+    def __getitem__(self, car_id: str) -> Car:
+        return Car(self, self._slots[car_id])
+
+    def __delitem__(self, car_id: str) -> None:
+        slot = self._slots.pop(car_id)
+        self._car_ids[slot] = None
+        self._parents[slot] = None
+        self._lineages[slot] = None
+        self.owners[slot] = -1
+        self.last_speeds[slot] = np.nan
+        self._free.append(slot)
+
+    def __contains__(self, car_id) -> bool:
+        return car_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from config import settings
+from services.metrics import EVENT_STREAMS_DROPPED, EVENT_STREAMS_OPEN, EVENTS_PUBLISHED
+
+logger = logging.getLogger(__name__)
+
+class SubscriberLimitError(Exception):
+    pass
+
+class Subscription:
+    __slots__ = ('wallet_address', 'queue', 'closed')
+
+    def __init__(self, wallet_address: str, queue_size: int):
+        self.wallet_address = wallet_address
+        # Events are dicts; None tells the stream to end
+        self.queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=queue_size + 1)
+        self.closed = False
+
+EVENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    wallet_address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+"""
+
+class EventRelay:
+    """Carries events between worker processes through a table in the shared database.
+
+    ``send`` only queues; ``exchange`` writes the queue in one transaction
+    and returns what other workers wrote since the previous call. Rows are
+    deleted after ``retention`` seconds.
+    """
+
+    def __init__(self, path: str, interval: float = 0.1, retention: float = 60.0):
+        self.path = path
+        self.interval = interval
+        self.retention = retention
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._outbox: Deque[tuple] = deque()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_id = 0
+        self._pruned_at = 0.0
+
+    def open(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(EVENTS_SCHEMA)
+        # Events from before this worker started are not replayed
+        self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        self._conn = conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def send(self, wallet_address: str, event: str, data: Dict[str, Any]) -> None:
+        self._outbox.append((self.origin, wallet_address, event, json.dumps(data, default=str), time.time()))
+
+    def exchange(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Write queued events; returns ``(wallet, event, data)`` written by other workers since the last call."""
+        conn = self._conn
+        outgoing = []
+        while self._outbox:
+            outgoing.append(self._outbox.popleft())
+        if outgoing:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO events (origin, wallet_address, event, data, ts) VALUES (?, ?, ?, ?, ?)", outgoing
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        rows = conn.execute(
+            "SELECT id, wallet_address, event, data FROM events WHERE id > ? AND origin != ? ORDER BY id",
+            (self._last_id, self.origin)
+        ).fetchall()
+        if rows:
+            self._last_id = rows[-1][0]
+
+        now = time.time()
+        if now - self._pruned_at > self.retention:
+            conn.execute("DELETE FROM events WHERE ts < ?", (now - self.retention,))
+            self._pruned_at = now
+        return [(wallet_address, event, json.loads(data)) for _, wallet_address, event, data in rows]
+
+class EventHub:
+    """Pub/sub of per-wallet events: garage changes, race progress, payments.
+
+    Publishing never waits on a subscriber. Each subscriber has a bounded
+    queue, and one that falls ``queue_size`` events behind is dropped: its
+    queue is replaced by a single ``lagged`` event after which the stream
+    ends, and the client is expected to reconnect and re-read its garage.
+    ``publish`` may be called from any thread; delivery happens on the
+    event loop the streams run on.
+
+    With a ``relay`` (several worker processes), events are also passed to
+    the other workers and theirs delivered here, ``relay.interval`` seconds
+    late at most; without one they only reach streams on this process.
+    """
+
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 10000,
+                 relay: Optional[EventRelay] = None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.relay = relay
+        self._task: Optional[asyncio.Task] = None
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sequence = 0
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, wallet_address: str) -> Subscription:
+        if self._count >= self.max_subscribers:
+            raise SubscriberLimitError("Too many event streams open, please retry later")
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(wallet_address, self.queue_size)
+        self._subscribers.setdefault(wallet_address, set()).add(subscription)
+        self._count += 1
+        EVENT_STREAMS_OPEN.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.wallet_address)
+        if subscribers is not None and subscription in subscribers:
+            subscribers.discard(subscription)
+            self._count -= 1
+            EVENT_STREAMS_OPEN.dec()
+            if not subscribers:
+                del self._subscribers[subscription.wallet_address]
+        subscription.closed = True
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    async def start(self) -> None:
+        if self.relay is not None and self._task is None:
+            self._loop = asyncio.get_running_loop()
+            await asyncio.to_thread(self.relay.open)
+            self._task = asyncio.create_task(self._relay_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.relay.close()
+
+    async def _relay_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.relay.interval)
+            try:
+                incoming = await asyncio.to_thread(self.relay.exchange)
+            except Exception as e:
+                logger.warning(f"Event relay failed: {e}")
+                continue
+            for wallet_address, event, data in incoming:
+                self._deliver(wallet_address, event, data)
+
+    def publish(self, wallet_address: str, event: str, data: Dict[str, Any]) -> None:
+        """Queue ``event`` for every stream open on ``wallet_address``, on any worker."""
+        if self.relay is not None:
+            self.relay.send(wallet_address, event, data)
+        if not self._subscribers.get(wallet_address):
+            return
+        loop = self._loop
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._deliver, wallet_address, event, data)
+            return
+        self._deliver(wallet_address, event, data)
+
+    def _deliver(self, wallet_address: str, event: str, data: Dict[str, Any]) -> None:
+        subscribers = self._subscribers.get(wallet_address)
+        if not subscribers:
+            return
+
+        self._sequence += 1
+        message = {'id': self._sequence, 'event': event, 'data': data, 'ts': time.time()}
+        for subscription in list(subscribers):
+            # One slot is kept free for the lagged notice
+            if subscription.queue.qsize() >= self.queue_size:
+                self._drop(subscription)
+            else:
+                subscription.queue.put_nowait(message)
+                self.published += 1
+                EVENTS_PUBLISHED.inc()
+
+    def _drop(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        self.dropped += 1
+        EVENT_STREAMS_DROPPED.inc()
+        logger.info(f"Dropped slow event stream for {subscription.wallet_address}")
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        self._sequence += 1
+        subscription.queue.put_nowait({
+            'id': self._sequence,
+            'event': 'lagged',
+            'data': {'message': "Too many events were not read in time; reconnect and reload the garage"},
+            'ts': time.time()
+        })
+
+    def close(self) -> None:
+        """End every open stream, e.g. at shutdown."""
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                self.unsubscribe(subscription)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'subscribers': self._count,
+            'wallets': len(self._subscribers),
+            'published': self.published,
+            'dropped': self.dropped,
+        }
+
+event_hub = EventHub(
+    queue_size=settings.EVENT_QUEUE_SIZE,
+    max_subscribers=settings.EVENT_MAX_SUBSCRIBERS,
+    relay=EventRelay(settings.RACING_DB_PATH, interval=settings.EVENT_RELAY_INTERVAL) if settings.WORKERS > 1 else None
+)
@@ -0,0 +1,200 @@
+import asyncio
+import inspect
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.models.requests import Tx
+from xrpl.utils import drops_to_xrp, xrp_to_drops
+from config import settings
+from services.account_cache import account_cache
+from services.job_tracker import JobTracker
+from services.persistence import RacingRepository
+from services.racing_service import RacingService, racing_service
+from services.xrpl_client import ledger_client
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'completed', 'rejected', 'failed'}
+
+@dataclass
+class FeeJob:
+    tracking_id: str
+    action: str
+    tx_hash: str
+    wallet_address: str
+    amount: float
+    status: str = 'pending'
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: Optional[str] = None
+    deadline: float = 0.0
+    run: Optional[Callable[[str], Any]] = field(default=None, repr=False)
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'tracking_id': self.tracking_id,
+            'action': self.action,
+            'status': self.status,
+            'tx_hash': self.tx_hash,
+            'wallet_address': self.wallet_address,
+            'amount': self.amount,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+class FeeVerifier:
+    """Releases paid game actions once the client's fee payment validates.
+
+    The client signs and submits the fee payment itself and hands over the
+    transaction hash. A background loop looks up every pending hash once per
+    interval; when the transaction is validated it must be a successful
+    Payment from the player's wallet to ``destination`` delivering at least
+    the fee. Each hash is recorded in the repository so one payment can only
+    pay for one action. The action then runs and its result is attached to
+    the job; nothing on the request path waits for the ledger. If the action
+    fails the record is released and the same hash may be submitted again.
+    """
+
+    def __init__(self, repository: RacingRepository, destination: str,
+                 client: AsyncJsonRpcClient = ledger_client, poll_interval: float = 1.0,
+                 timeout: float = 120.0, max_jobs: int = 10000):
+        self.repository = repository
+        self.destination = destination
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+        self.jobs: JobTracker[FeeJob] = JobTracker(
+            'fee_job', TERMINAL_STATUSES, max_jobs=max_jobs,
+            on_update=self._release, on_forget=lambda job: self._by_hash.pop(job.tx_hash, None)
+        )
+        self._by_hash: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._verify_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----- public API -----
+
+    def submit(self, action: str, tx_hash: str, wallet_address: str, amount: float,
+               run: Callable[[str], Any]) -> FeeJob:
+        """Queue ``run(tx_hash)`` (sync or async) until the fee payment ``tx_hash`` is verified."""
+        tx_hash = tx_hash.upper()
+        existing = self.jobs.get(self._by_hash.get(tx_hash, ''))
+        if existing is not None and existing.status != 'failed':
+            if existing.action != action or existing.wallet_address != wallet_address:
+                raise ValueError("Transaction was already submitted for another action")
+            return existing
+
+        job = FeeJob(
+            tracking_id=uuid.uuid4().hex,
+            action=action,
+            tx_hash=tx_hash,
+            wallet_address=wallet_address,
+            amount=amount,
+            deadline=time.monotonic() + self.timeout,
+            run=run
+        )
+        self._by_hash[job.tx_hash] = job.tracking_id
+        self.jobs.add(job)
+        return job
+
+    def get(self, tracking_id: str) -> Optional[FeeJob]:
+        return self.jobs.get(tracking_id)
+
+    def _release(self, job: FeeJob, snapshot: Dict[str, Any]) -> None:
+        if self.jobs.is_terminal(job):
+            job.run = None
+
+    # ----- verification -----
+
+    async def _verify_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            pending = self.jobs.with_status('pending')
+            if not pending:
+                continue
+            try:
+                await asyncio.gather(*(self._check(job) for job in pending))
+            except Exception as e:
+                logger.warning(f"Fee verification error: {str(e)}")
+
+    async def _check(self, job: FeeJob) -> None:
+        try:
+            response = await self.client.request(Tx(transaction=job.tx_hash))
+        except Exception as e:
+            logger.warning(f"Fee lookup for {job.tx_hash} failed: {str(e)}")
+            response = None
+
+        if response is None or not response.is_successful() or not response.result.get('validated'):
+            # Not found yet or not yet validated; the client may still be submitting
+            if time.monotonic() > job.deadline:
+                self.jobs.update(job, status='rejected', error="Payment was not validated in time")
+            return
+
+        problem = self._validate_payment(job, response.result)
+        if problem:
+            self.jobs.update(job, status='rejected', error=problem)
+            return
+
+        if not self.repository.claim_payment(job.tx_hash, job.wallet_address, job.action, time.time()):
+            self.jobs.update(job, status='rejected', error="Payment was already used")
+            return
+
+        account_cache.invalidate(job.wallet_address, self.destination)
+        try:
+            result = job.run(job.tx_hash)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            # The fee was not spent: free the hash so it can pay for a retry
+            logger.error(f"Paid {job.action} failed after payment {job.tx_hash}: {str(e)}")
+            self.repository.release_payment(job.tx_hash)
+            self.jobs.update(job, status='failed', error=f"{e}. The payment was not used and can be submitted again")
+            return
+        self.jobs.update(job, status='completed', result=result)
+
+    def _validate_payment(self, job: FeeJob, tx: Dict[str, Any]) -> Optional[str]:
+        meta = tx.get('meta') or {}
+        if meta.get('TransactionResult') != 'tesSUCCESS':
+            return f"Payment failed on ledger: {meta.get('TransactionResult')}"
+        if tx.get('TransactionType') != 'Payment':
+            return "Transaction is not a payment"
+        if tx.get('Account') != job.wallet_address:
+            return "Payment was not sent from this wallet"
+        if tx.get('Destination') != self.destination:
+            return "Payment was not sent to the game account"
+
+        delivered = meta.get('delivered_amount', tx.get('Amount'))
+        if not isinstance(delivered, str) or not delivered.isdigit():
+            return "Payment must be in XRP"
+        if int(delivered) < int(xrp_to_drops(job.amount)):
+            return f"Payment of {drops_to_xrp(delivered)} XRP is below the {job.amount} XRP fee"
+        return None
+
+fee_verifier = FeeVerifier(
+    racing_service.repository,
+    RacingService.PAYMENT_DESTINATION,
+    poll_interval=settings.PAYMENT_POLL_INTERVAL,
+    timeout=settings.FEE_VERIFY_TIMEOUT
+)
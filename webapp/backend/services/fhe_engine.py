@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from config import settings
+from services.job_tracker import JobTracker
+from services.metrics import ENGINE_LATENCY
+from services.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'completed', 'failed'}
+
+# ----- worker process side -----
+# Keys and ciphertexts live in the cryptoengine module's globals, so every
+# worker process has its own key set and owns the cars created on it.
+
+_fhe = None
+_cars: Dict[str, str] = {}  # web car_id -> cryptoengine car id
+
+def _init_worker(engine_path: str) -> None:
+    global _fhe
+    sys.path.insert(0, engine_path)
+    import server_fhe_race
+    server_fhe_race.PRINT_LOG = False
+    _fhe = server_fhe_race
+
+def _velocity(car_id: str) -> float:
+    fhe_id = _cars.get(car_id)
+    if fhe_id is None:
+        raise LookupError(f"Car {car_id} has no encrypted state on this engine")
+    return float(_fhe.get_car_velocity_kmh(fhe_id)[1])
+
+def _ping() -> bool:
+    return True
+
+def _create(car_id: str) -> float:
+    _cars[car_id] = _fhe.create_car(car_id)
+    return _velocity(car_id)
+
+def _train(parent_id: str, car_id: str, attribute_indices: Optional[List[int]]) -> float:
+    parent = _cars.get(parent_id)
+    if parent is None:
+        raise LookupError(f"Car {parent_id} has no encrypted state on this engine")
+    indices = [i for i in (attribute_indices or range(_fhe.N)) if 0 <= i < _fhe.N]
+    _cars[car_id] = _fhe.train_car_random_subset(parent, indices)
+    return _velocity(car_id)
+
+def _discard(car_id: str) -> None:
+    fhe_id = _cars.pop(car_id, None)
+    if fhe_id is not None:
+        _fhe.CAR_DB.pop(fhe_id, None)
+
+# ----- web process side -----
+
+class EngineBusyError(Exception):
+    pass
+
+@dataclass
+class EngineJob:
+    job_id: str
+    action: str
+    wallet_address: str
+    status: str = 'pending'
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'action': self.action,
+            'status': self.status,
+            'wallet_address': self.wallet_address,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+class FheEngine:
+    """Runs the encrypted racing engine in dedicated worker processes.
+
+    Homomorphic evaluation takes seconds per car, so it never runs on the
+    event loop. Each of ``workers`` single-process pools holds its own keys
+    and the ciphertexts of the cars created on it; a lineage is pinned to
+    one worker so trained cars stay next to their parents. At most
+    ``max_pending`` jobs may be queued or running per worker, beyond which
+    ``submit`` raises ``EngineBusyError``.
+
+    Ciphertexts and jobs are kept in this process only: they are lost on
+    restart, and other web workers cannot see them, so ``start`` refuses to
+    run when ``web_workers`` is above 1.
+    """
+
+    def __init__(self, engine_path: str, workers: int = 1, max_pending: int = 16, max_jobs: int = 10000,
+                 web_workers: int = 1):
+        self.engine_path = engine_path
+        self.workers = workers
+        self.max_pending = max_pending
+        self.web_workers = web_workers
+
+        self._pools: List[ProcessPoolExecutor] = []
+        self.jobs: JobTracker[EngineJob] = JobTracker('engine_job', TERMINAL_STATUSES, key='job_id', max_jobs=max_jobs)
+        self._tasks: Set[asyncio.Task] = set()
+        self._active = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if not self.enabled or self._pools:
+            return
+        if self.web_workers > 1:
+            raise RuntimeError("RACING_ENGINE=fhe keeps encrypted cars and jobs in one process; "
+                               "run it with WEB_CONCURRENCY=1")
+        self._pools = [self._new_pool() for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        pools, self._pools = self._pools, []
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.engine_path,))
+        # Key generation takes a while; do it now rather than on the first request
+        pool.submit(_ping).add_done_callback(self._log_warmup)
+        return pool
+
+    @staticmethod
+    def _log_warmup(future) -> None:
+        if future.exception() is not None:
+            logger.error(f"Encrypted engine worker failed to start: {future.exception()}")
+
+    # ----- jobs -----
+
+    def submit(self, action: str, wallet_address: str, run: Callable[[], Awaitable[Any]]) -> EngineJob:
+        """Run ``run()`` in the background and return a job handle for polling."""
+        if not self._pools:
+            raise EngineBusyError("Encrypted engine is not running")
+        if self._active >= self.max_pending * len(self._pools):
+            raise EngineBusyError("Encrypted engine is busy, please retry")
+
+        job = EngineJob(job_id=uuid.uuid4().hex, action=action, wallet_address=wallet_address)
+        self.jobs.add(job)
+        self._active += 1
+        task = asyncio.create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[EngineJob]:
+        return self.jobs.get(job_id)
+
+    @property
+    def active_jobs(self) -> int:
+        return self._active
+
+    async def _run(self, job: EngineJob, run: Callable[[], Awaitable[Any]]) -> None:
+        self.jobs.update(job, status='running')
+        try:
+            result = await run()
+        except Exception as e:
+            logger.error(f"Encrypted {job.action} failed: {str(e) or type(e).__name__}")
+            self.jobs.update(job, status='failed', error=str(e) or type(e).__name__)
+        else:
+            self.jobs.update(job, status='completed', result=result)
+        finally:
+            self._active -= 1
+
+    # ----- engine operations -----
+
+    async def _call(self, lineage_id: str, fn: Callable, *args) -> Any:
+        if not self._pools:
+            raise EngineBusyError("Encrypted engine is not running")
+        worker = zlib.crc32(lineage_id.encode()) % len(self._pools)
+        pool = self._pools[worker]
+        operation = fn.__name__.lstrip('_')
+        started = time.perf_counter()
+        try:
+            with tracer.span(f"fhe.{operation}", worker=worker):
+                return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # The worker died and took its keys and ciphertexts with it; later
+            # requests get a fresh one instead of failing forever
+            if self._pools and self._pools[worker] is pool:
+                logger.error(f"Encrypted engine worker {worker} died, starting a new one")
+                self._pools[worker] = self._new_pool()
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            ENGINE_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+    async def create(self, car_id: str) -> float:
+        """Have the judges generate an encrypted car; returns its speed."""
+        return await self._call(car_id, _create, car_id)
+
+    async def train(self, lineage_id: str, parent_id: str, car_id: str,
+                    attribute_indices: Optional[List[int]] = None) -> float:
+        """Derive ``car_id`` from ``parent_id`` with hidden deltas; returns its speed."""
+        return await self._call(lineage_id, _train, parent_id, car_id, attribute_indices)
+
+    async def speed(self, lineage_id: str, car_id: str) -> float:
+        return await self._call(lineage_id, _velocity, car_id)
+
+    def discard(self, lineage_id: str, car_id: str) -> None:
+        if self._pools:
+            self._pools[zlib.crc32(lineage_id.encode()) % len(self._pools)].submit(_discard, car_id)
+
+fhe_engine = FheEngine(
+    settings.FHE_ENGINE_PATH,
+    workers=settings.FHE_WORKERS if settings.RACING_ENGINE == "fhe" else 0,
+    max_pending=settings.FHE_MAX_PENDING,
+    web_workers=settings.WORKERS
+)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+import xrpl
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from config import settings
+from services.xrpl_client import ledger_client
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """Probes the ledger in the background so health checks never do.
+
+    Every ``interval`` seconds a ``server_info`` call (bounded by ``timeout``)
+    records connectivity, the latest validated ledger and the round-trip
+    latency. ``/health`` reports the last snapshot and its age; readiness
+    only requires a successful probe within ``ready_max_age`` seconds.
+    """
+
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, interval: float = 10.0,
+                 timeout: float = 5.0, ready_max_age: float = 30.0):
+        self.client = client
+        self.interval = interval
+        self.timeout = timeout
+        self.ready_max_age = ready_max_age
+
+        self.connected = False
+        self.ledger: Optional[int] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[str] = None
+        self._checked: Optional[float] = None
+        self._last_success: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----- probing -----
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval)
+
+    async def probe(self) -> None:
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                self.client.request(xrpl.models.requests.ServerInfo()),
+                timeout=self.timeout
+            )
+            if not response.is_successful():
+                raise xrpl.asyncio.clients.XRPLRequestFailureException(response.result)
+            self.ledger = response.result.get('info', {}).get('validated_ledger', {}).get('seq')
+            self.connected = True
+            self.error = None
+            self._last_success = time.monotonic()
+        except Exception as e:
+            if self.connected:
+                logger.warning(f"Ledger health probe failed: {str(e) or type(e).__name__}")
+            self.connected = False
+            self.error = str(e) or type(e).__name__
+        finally:
+            self._checked = time.monotonic()
+            self.latency_ms = round((self._checked - started) * 1000, 1)
+            self.checked_at = datetime.utcnow().isoformat()
+
+    # ----- snapshots -----
+
+    def staleness(self) -> Optional[float]:
+        return None if self._checked is None else round(time.monotonic() - self._checked, 3)
+
+    def is_ready(self) -> bool:
+        return self._last_success is not None and time.monotonic() - self._last_success <= self.ready_max_age
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'testnet_connected': self.connected,
+            'ledger': self.ledger,
+            'latency_ms': self.latency_ms,
+            'checked_at': self.checked_at,
+            'staleness_seconds': self.staleness(),
+            'error': self.error,
+        }
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+    ready_max_age=settings.HEALTH_READY_MAX_AGE
+)
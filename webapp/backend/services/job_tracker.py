@@ -0,0 +1,88 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Collection, Dict, Generic, List, Optional, Set, TypeVar
+from services.event_hub import event_hub
+
+J = TypeVar('J')
+
+class JobTracker(Generic[J]):
+    """Background jobs by id, with bounded retention, status watchers and wallet events.
+
+    A job is any object with a ``status``, ``updated_at``, an ``asyncio.Event``
+    ``done`` and a ``to_dict()``; ``key`` and ``owner`` name its id and wallet
+    attributes. Jobs are kept in submission order and beyond ``max_jobs``
+    the oldest finished ones are forgotten. Every ``update`` is pushed to the
+    job's watchers (a slow watcher keeps only the newest states) and to the
+    owner's wallet event stream as ``event``; ``done`` is set once the status
+    is terminal.
+
+    ``on_update(job, snapshot)`` runs after each update is published, before
+    ``done`` is set, and ``on_forget(job)`` when a job is dropped.
+    """
+
+    def __init__(self, event: str, terminal_statuses: Collection[str], key: str = 'tracking_id',
+                 owner: str = 'wallet_address', max_jobs: int = 10000,
+                 on_update: Optional[Callable[[J, Dict[str, Any]], None]] = None,
+                 on_forget: Optional[Callable[[J], None]] = None):
+        self.event = event
+        self.terminal_statuses = set(terminal_statuses)
+        self.key = key
+        self.owner = owner
+        self.max_jobs = max_jobs
+        self.on_update = on_update
+        self.on_forget = on_forget
+
+        self._jobs: "OrderedDict[str, J]" = OrderedDict()
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add(self, job: J) -> None:
+        self._jobs[getattr(job, self.key)] = job
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [jid for jid, j in self._jobs.items() if j.status in self.terminal_statuses]:
+                forgotten = self._jobs.pop(job_id)
+                if self.on_forget is not None:
+                    self.on_forget(forgotten)
+                if len(self._jobs) <= self.max_jobs:
+                    break
+
+    def get(self, job_id: str) -> Optional[J]:
+        return self._jobs.get(job_id)
+
+    def with_status(self, status: str) -> List[J]:
+        return [job for job in self._jobs.values() if job.status == status]
+
+    def is_terminal(self, job: J) -> bool:
+        return job.status in self.terminal_statuses
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._watchers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        watchers = self._watchers.get(job_id)
+        if watchers is not None:
+            watchers.discard(queue)
+            if not watchers:
+                del self._watchers[job_id]
+
+    def update(self, job: J, **changes) -> None:
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.utcnow().isoformat()
+
+        snapshot = job.to_dict()
+        for queue in self._watchers.get(getattr(job, self.key), ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+        event_hub.publish(getattr(job, self.owner), self.event, snapshot)
+
+        if self.on_update is not None:
+            self.on_update(job, snapshot)
+        if job.status in self.terminal_statuses:
+            job.done.set()
@@ -0,0 +1,134 @@
+import functools
+import threading
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
+from sortedcontainers import SortedList
+
+def _locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class Leaderboard:
+    """Cars ordered by speed, fastest first, updated in O(log n).
+
+    Ranks use competition ranking: cars with equal speed share a rank and
+    the next car's rank skips accordingly. Safe to use from several threads.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, float]] = ()):
+        self._lock = threading.RLock()
+        self.reset(entries)
+
+    @_locked
+    def reset(self, entries: Iterable[Tuple[str, str, float]]) -> None:
+        """Replace the contents with ``(car_id, wallet_address, speed)`` entries."""
+        self._entries: Dict[str, Tuple[str, float]] = {
+            car_id: (wallet_address, float(speed)) for car_id, wallet_address, speed in entries
+        }
+        # Negated speed so ascending order is fastest first; car_id breaks ties
+        self._order = SortedList((-speed, car_id) for car_id, (_, speed) in self._entries.items())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, car_id: str) -> bool:
+        return car_id in self._entries
+
+    @_locked
+    def update(self, car_id: str, wallet_address: str, speed: float) -> None:
+        speed = float(speed)
+        previous = self._entries.get(car_id)
+        if previous is not None:
+            if previous[1] == speed:
+                self._entries[car_id] = (wallet_address, speed)
+                return
+            self._order.remove((-previous[1], car_id))
+        self._entries[car_id] = (wallet_address, speed)
+        self._order.add((-speed, car_id))
+
+    @_locked
+    def remove(self, car_id: str) -> None:
+        previous = self._entries.pop(car_id, None)
+        if previous is not None:
+            self._order.remove((-previous[1], car_id))
+
+    @_locked
+    def speed_of(self, car_id: str) -> Optional[float]:
+        entry = self._entries.get(car_id)
+        return None if entry is None else entry[1]
+
+    @_locked
+    def rank_of_speed(self, speed: float) -> int:
+        """1 + the number of cars strictly faster than ``speed``."""
+        return self._order.bisect_left((-speed, '')) + 1
+
+    @_locked
+    def rank(self, car_id: str) -> Optional[int]:
+        speed = self.speed_of(car_id)
+        return None if speed is None else self.rank_of_speed(speed)
+
+    @_locked
+    def percentile(self, car_id: str) -> Optional[float]:
+        """Share of the other cars that are strictly slower, in percent."""
+        speed = self.speed_of(car_id)
+        if speed is None:
+            return None
+        if len(self._order) == 1:
+            return 100.0
+        at_least_as_fast = self._order.bisect_right((-speed, '\U0010ffff'))
+        return 100.0 * (len(self._order) - at_least_as_fast) / (len(self._order) - 1)
+
+    @_locked
+    def near(self, speed: float, count: int, band: float, exclude_cars: Collection[str] = (),
+             exclude_wallets: Collection[str] = (), max_scan: int = 256) -> List[Tuple[str, str, float]]:
+        """Up to ``count`` cars closest to ``speed`` and within ``band`` of it.
+
+        Walks outwards from ``speed``'s position in the index, so the cost is
+        O(log n) plus the cars looked at, capped by ``max_scan``.
+        """
+        order = self._order
+        faster = order.bisect_left((-speed, '')) - 1
+        slower = faster + 1
+        found = []
+        for _ in range(max_scan):
+            if len(found) >= count:
+                break
+            gap_faster = -order[faster][0] - speed if faster >= 0 else None
+            gap_slower = speed + order[slower][0] if slower < len(order) else None
+            if gap_faster is not None and gap_faster > band:
+                gap_faster = None
+            if gap_slower is not None and gap_slower > band:
+                gap_slower = None
+            if gap_faster is None and gap_slower is None:
+                break
+
+            if gap_slower is None or (gap_faster is not None and gap_faster < gap_slower):
+                neg_speed, car_id = order[faster]
+                faster -= 1
+            else:
+                neg_speed, car_id = order[slower]
+                slower += 1
+
+            wallet_address = self._entries[car_id][0]
+            if car_id not in exclude_cars and wallet_address not in exclude_wallets:
+                found.append((car_id, wallet_address, -neg_speed))
+        return found
+
+    @_locked
+    def top(self, limit: int = 10, offset: int = 0) -> List[dict]:
+        entries = []
+        rank, last_speed = None, None
+        for position, (neg_speed, car_id) in enumerate(self._order.islice(offset, offset + limit), start=offset + 1):
+            speed = -neg_speed
+            if speed != last_speed:
+                rank = position if last_speed is not None else self.rank_of_speed(speed)
+                last_speed = speed
+            entries.append({
+                'rank': rank,
+                'car_id': car_id,
+                'wallet_address': self._entries[car_id][0],
+                'speed': speed
+            })
+        return entries
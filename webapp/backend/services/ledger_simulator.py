@@ -0,0 +1,357 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, Dict, List
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.core.binarycodec import decode
+from xrpl.core.keypairs import derive_classic_address
+from xrpl.models.requests.request import Request
+from xrpl.models.response import Response
+from services.metrics import record_ledger_call
+from services.tracing import annotate, traced
+
+BASE_FEE = 10
+BASE_RESERVE = 10_000_000
+FAUCET_AMOUNT = 100_000_000
+GENESIS_LEDGER = 1000
+
+ENGINE_MESSAGES = {
+    'tesSUCCESS': "The transaction was applied. Only final in a validated ledger.",
+    'tefPAST_SEQ': "This sequence number has already passed.",
+    'terPRE_SEQ': "Missing/inapplicable prior transaction.",
+    'terNO_ACCOUNT': "The source account does not exist.",
+    'tefMAX_LEDGER': "Ledger sequence too high.",
+    'telINSUF_FEE_P': "Fee insufficient.",
+    'temBAD_AMOUNT': "Can only send positive amounts.",
+    'temDISABLED': "The transaction requires logic that is currently disabled.",
+    'temBAD_SIGNATURE': "The signature does not match the sending account.",
+    'tecUNFUNDED_PAYMENT': "Insufficient XRP balance to send.",
+    'tecNO_DST_INSUF_XRP': "Destination does not exist. Too little XRP sent to create it.",
+}
+
+def _tx_hash(tx_blob: str) -> str:
+    # SHA-512Half of the "TXN\0" prefix and the signed blob, as rippled computes it
+    return hashlib.sha512(bytes.fromhex("54584E00" + tx_blob)).hexdigest()[:64].upper()
+
+class LedgerSimulator:
+    """In-memory stand-in for the rippled JSON-RPC methods this API uses.
+
+    Accounts only hold XRP, only Payments are applied, and every accepted
+    transaction is included in the next ledger close. Ledgers close every
+    ``close_interval`` seconds (lazily, on the next request), or after every
+    submission when it is 0. ``failure_rate`` answers that share of requests
+    with a ``tooBusy`` error and ``drop_rate`` silently loses that share of
+    submissions; both draw from a seeded RNG so runs are repeatable.
+    """
+
+    def __init__(self, close_interval: float = 1.0, failure_rate: float = 0.0,
+                 drop_rate: float = 0.0, seed: int = 0):
+        self.close_interval = close_interval
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+
+        self.validated_index = GENESIS_LEDGER
+        self._accounts: Dict[str, Dict[str, Any]] = {}
+        self._validated_accounts: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set = set()
+        self._open_txs: List[str] = []
+        self._txs: Dict[str, Dict[str, Any]] = {}
+        self._account_txs: Dict[str, List[str]] = {}
+        self._next_close = time.monotonic() + close_interval
+
+    @property
+    def current_index(self) -> int:
+        return self.validated_index + 1
+
+    # ----- ledger progression -----
+
+    def close_ledger(self) -> int:
+        closed = self.current_index
+        for tx_hash in self._open_txs:
+            self._txs[tx_hash]['validated'] = True
+        self._open_txs = []
+        for address in self._dirty:
+            self._validated_accounts[address] = dict(self._accounts[address])
+        self._dirty.clear()
+        self.validated_index = closed
+        return closed
+
+    def _advance(self) -> None:
+        if self.close_interval <= 0:
+            return
+        now = time.monotonic()
+        while now >= self._next_close:
+            self.close_ledger()
+            self._next_close += self.close_interval
+
+    # ----- faucet -----
+
+    def fund(self, address: str, drops: int = FAUCET_AMOUNT) -> Dict[str, Any]:
+        """Credit an account directly in the current and validated ledger."""
+        account = self._accounts.get(address)
+        if account is None:
+            account = self._new_account(address, 0)
+        account['Balance'] = str(int(account['Balance']) + drops)
+        self._validated_accounts[address] = dict(account)
+        return dict(account)
+
+    def _new_account(self, address: str, drops: int) -> Dict[str, Any]:
+        account = self._accounts[address] = {
+            'Account': address,
+            'Balance': str(drops),
+            'Flags': 0,
+            'LedgerEntryType': 'AccountRoot',
+            'OwnerCount': 0,
+            'Sequence': self.current_index,
+            'index': hashlib.sha256(address.encode()).hexdigest().upper(),
+        }
+        return account
+
+    # ----- dispatch -----
+
+    def handle(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._advance()
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            return self._error('tooBusy', "The server is too busy to help you now.")
+
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return self._error('unknownCmd', "Unknown method.")
+        result = handler(params)
+        result.setdefault('status', 'success')
+        return result
+
+    @staticmethod
+    def _error(error: str, message: str, **extra) -> Dict[str, Any]:
+        return {'status': 'error', 'error': error, 'error_message': message, **extra}
+
+    # ----- read methods -----
+
+    def _rpc_server_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'info': {
+            'build_version': 'simulator',
+            'server_state': 'full',
+            'complete_ledgers': f"{GENESIS_LEDGER}-{self.validated_index}",
+            'validated_ledger': {
+                'seq': self.validated_index,
+                'base_fee_xrp': BASE_FEE / 1_000_000,
+                'reserve_base_xrp': BASE_RESERVE / 1_000_000,
+            },
+        }}
+
+    def _rpc_ledger(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        index = self.current_index if params.get('ledger_index') in ('current', 'open') else self.validated_index
+        return {
+            'ledger_index': index,
+            'ledger': {'ledger_index': str(index), 'closed': index <= self.validated_index},
+            'validated': index <= self.validated_index,
+        }
+
+    def _rpc_fee(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'current_ledger_size': str(len(self._open_txs)),
+            'current_queue_size': '0',
+            'drops': {
+                'base_fee': str(BASE_FEE),
+                'median_fee': str(BASE_FEE * 500),
+                'minimum_fee': str(BASE_FEE),
+                'open_ledger_fee': str(BASE_FEE),
+            },
+            'expected_ledger_size': '1000',
+            'ledger_current_index': self.current_index,
+            'max_queue_size': '2000',
+        }
+
+    def _rpc_account_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        address = params.get('account')
+        validated = params.get('ledger_index', 'current') not in ('current', 'open')
+        source = self._validated_accounts if validated else self._accounts
+        account = source.get(address)
+        if account is None:
+            return self._error('actNotFound', "Account not found.", account=address)
+        result = {'account_data': dict(account), 'validated': validated}
+        if validated:
+            result['ledger_index'] = self.validated_index
+        else:
+            result['ledger_current_index'] = self.current_index
+        return result
+
+    def _rpc_account_tx(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        address = params.get('account')
+        limit = params.get('limit') or 200
+        hashes = self._account_txs.get(address, [])
+        transactions = []
+        for tx_hash in reversed(hashes):
+            record = self._txs[tx_hash]
+            if not record['validated']:
+                continue
+            transactions.append({
+                'tx': {**record['tx_json'], 'hash': tx_hash, 'ledger_index': record['ledger_index']},
+                'meta': record['meta'],
+                'validated': True,
+            })
+            if len(transactions) >= limit:
+                break
+        return {
+            'account': address,
+            'ledger_index_min': GENESIS_LEDGER,
+            'ledger_index_max': self.validated_index,
+            'limit': limit,
+            'transactions': transactions,
+        }
+
+    def _rpc_tx(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        record = self._txs.get(str(params.get('transaction', '')).upper())
+        if record is None:
+            return self._error('txnNotFound', "Transaction not found.")
+        return {
+            **record['tx_json'],
+            'hash': record['hash'],
+            'ledger_index': record['ledger_index'],
+            'meta': record['meta'],
+            'validated': record['validated'],
+        }
+
+    # ----- submission -----
+
+    def _rpc_submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        tx_blob = params.get('tx_blob')
+        if not tx_blob:
+            return self._error('invalidParams', "Only signed tx_blob submission is supported.")
+        try:
+            tx = decode(tx_blob)
+        except Exception:
+            return self._error('invalidTransaction', "Could not decode tx_blob.")
+
+        tx_hash = _tx_hash(tx_blob)
+        engine_result = self._preflight(tx)
+        if engine_result == 'tesSUCCESS':
+            if self.drop_rate and self.rng.random() < self.drop_rate:
+                pass  # lost before reaching a ledger; only LastLedgerSequence can tell
+            else:
+                engine_result = self._apply(tx, tx_hash)
+                if self.close_interval <= 0:
+                    self.close_ledger()
+
+        return {
+            'accepted': engine_result[:3] in ('tes', 'tec', 'ter'),
+            'applied': engine_result[:3] in ('tes', 'tec'),
+            'engine_result': engine_result,
+            'engine_result_code': 0 if engine_result == 'tesSUCCESS' else -1,
+            'engine_result_message': ENGINE_MESSAGES.get(engine_result, engine_result),
+            'tx_blob': tx_blob,
+            'tx_json': {**tx, 'hash': tx_hash},
+        }
+
+    def _preflight(self, tx: Dict[str, Any]) -> str:
+        if tx.get('TransactionType') != 'Payment':
+            return 'temDISABLED'
+        amount = tx.get('Amount')
+        if not isinstance(amount, str) or int(amount) <= 0:
+            return 'temBAD_AMOUNT'
+        if derive_classic_address(tx.get('SigningPubKey', '')) != tx.get('Account'):
+            return 'temBAD_SIGNATURE'
+        if int(tx.get('Fee', 0)) < BASE_FEE:
+            return 'telINSUF_FEE_P'
+        if tx.get('LastLedgerSequence') is not None and tx['LastLedgerSequence'] < self.current_index:
+            return 'tefMAX_LEDGER'
+
+        account = self._accounts.get(tx['Account'])
+        if account is None:
+            return 'terNO_ACCOUNT'
+        if tx.get('Sequence', 0) < account['Sequence']:
+            return 'tefPAST_SEQ'
+        if tx.get('Sequence', 0) > account['Sequence']:
+            return 'terPRE_SEQ'
+        return 'tesSUCCESS'
+
+    def _apply(self, tx: Dict[str, Any], tx_hash: str) -> str:
+        sender = self._accounts[tx['Account']]
+        amount, fee = int(tx['Amount']), int(tx['Fee'])
+        balance = int(sender['Balance'])
+
+        destination = self._accounts.get(tx['Destination'])
+        if balance - fee < amount:
+            engine_result = 'tecUNFUNDED_PAYMENT'
+        elif destination is None and amount < BASE_RESERVE:
+            engine_result = 'tecNO_DST_INSUF_XRP'
+        else:
+            engine_result = 'tesSUCCESS'
+
+        # tec results still claim the fee and consume the sequence
+        sender['Balance'] = str(balance - fee - (amount if engine_result == 'tesSUCCESS' else 0))
+        sender['Sequence'] += 1
+        touched = [sender]
+        if engine_result == 'tesSUCCESS':
+            if destination is None:
+                destination = self._new_account(tx['Destination'], 0)
+            destination['Balance'] = str(int(destination['Balance']) + amount)
+            touched.append(destination)
+
+        meta = {
+            'TransactionIndex': len(self._open_txs),
+            'TransactionResult': engine_result,
+            'AffectedNodes': [{'ModifiedNode': {
+                'LedgerEntryType': 'AccountRoot',
+                'FinalFields': {'Account': a['Account'], 'Balance': a['Balance'], 'Sequence': a['Sequence']},
+            }} for a in touched],
+        }
+        if engine_result == 'tesSUCCESS':
+            meta['delivered_amount'] = tx['Amount']
+
+        for account in touched:
+            account['PreviousTxnID'] = tx_hash
+            account['PreviousTxnLgrSeq'] = self.current_index
+            self._dirty.add(account['Account'])
+            self._account_txs.setdefault(account['Account'], []).append(tx_hash)
+
+        self._txs[tx_hash] = {
+            'hash': tx_hash,
+            'tx_json': tx,
+            'meta': meta,
+            'ledger_index': self.current_index,
+            'validated': False,
+        }
+        self._open_txs.append(tx_hash)
+        return engine_result
+
+class SimulatedLedgerClient(AsyncJsonRpcClient):
+    """Async XRPL client answering from a LedgerSimulator instead of the network.
+
+    Every request waits ``latency`` seconds plus up to ``jitter`` more before
+    being answered, so timings look like a remote node without the variance
+    of one. State lives in this process only.
+    """
+
+    def __init__(self, simulator: LedgerSimulator, latency: float = 0.0, jitter: float = 0.0):
+        super().__init__("simulator://local")
+        self.simulator = simulator
+        self.latency = latency
+        self.jitter = jitter
+
+    @traced('ledger.request')
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        started = time.perf_counter()
+        delay = self.latency + (self.simulator.rng.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = request_to_json_rpc(request)
+        annotate(method=payload['method'])
+        params = payload['params'][0] if payload.get('params') else {}
+        try:
+            response = json_to_response({'result': self.simulator.handle(payload['method'], params)})
+        except Exception as e:
+            record_ledger_call(payload['method'], started, type(e).__name__)
+            raise
+        record_ledger_call(payload['method'], started, None if response.is_successful() else response.result.get('error', 'unknown'))
+        return response
+
+    async def fund(self, address: str, drops: int = FAUCET_AMOUNT) -> Dict[str, Any]:
+        return self.simulator.fund(address, drops)
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,118 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# (car_id, wallet_address, speed) of a real car available as an opponent
+Opponent = Tuple[str, str, float]
+OpponentFinder = Callable[[float, int, float, Set[str], Set[str]], List[Opponent]]
+
+@dataclass
+class Entrant:
+    car_id: str
+    wallet_address: str
+    speed: float
+    future: Optional[asyncio.Future] = None
+
+class Matchmaker:
+    """Groups race entries into shared heats of similarly fast cars.
+
+    Entries arriving within ``lobby_window`` seconds of the first one wait in
+    a lobby. When it closes, entrants are sorted by speed and split into
+    heats whose speeds stay within ``band`` of the heat's slowest car. Each
+    heat is topped up to between ``min_racers`` and ``max_racers`` with the
+    nearest real cars from ``find_opponents`` (other players' cars only),
+    then AI cars near the heat's speed if the fleet is too thin. Every heat
+    is run once and each entrant gets its own placing. A car can wait in
+    the lobby only once; ``enter`` raises ``ValueError`` for a second entry.
+    """
+
+    def __init__(self, find_opponents: OpponentFinder, lobby_window: float = 0.25,
+                 band: float = 15.0, min_racers: int = 4, max_racers: int = 8):
+        self.find_opponents = find_opponents
+        self.lobby_window = lobby_window
+        self.band = band
+        self.min_racers = min_racers
+        self.max_racers = max_racers
+
+        self._lobby: Dict[str, Entrant] = {}
+        self._closing: Optional[asyncio.TimerHandle] = None
+        self.heats_run = 0
+
+    def is_waiting(self, car_id: str) -> bool:
+        return car_id in self._lobby
+
+    async def enter(self, car_id: str, wallet_address: str, speed: float) -> dict:
+        if car_id in self._lobby:
+            raise ValueError(f"Car {car_id} is already entered in the next race")
+        loop = asyncio.get_running_loop()
+        entrant = Entrant(car_id, wallet_address, speed, loop.create_future())
+        self._lobby[car_id] = entrant
+
+        if self.lobby_window <= 0:
+            self._close_lobby()
+        elif self._closing is None:
+            self._closing = loop.call_later(self.lobby_window, self._close_lobby)
+        return await entrant.future
+
+    def _close_lobby(self) -> None:
+        lobby, self._lobby, self._closing = self._lobby, {}, None
+        entrants = sorted(lobby.values(), key=lambda e: e.speed)
+
+        heat: List[Entrant] = []
+        for entrant in entrants:
+            if heat and (len(heat) == self.max_racers or entrant.speed - heat[0].speed > self.band):
+                self._run_heat(heat)
+                heat = []
+            heat.append(entrant)
+        if heat:
+            self._run_heat(heat)
+
+    def _run_heat(self, entrants: List[Entrant]) -> None:
+        try:
+            results = self.run_heat(entrants)
+        except Exception as e:
+            for entrant in entrants:
+                if not entrant.future.done():
+                    entrant.future.set_exception(e)
+            return
+        for entrant in entrants:
+            if not entrant.future.done():
+                entrant.future.set_result(results[entrant.car_id])
+
+    def run_heat(self, entrants: List[Entrant]) -> Dict[str, dict]:
+        """Fill out and run one heat; returns each entrant's result by car_id."""
+        speeds = [e.speed for e in entrants]
+        center = (min(speeds) + max(speeds)) / 2
+        size = max(len(entrants), random.randint(self.min_racers, self.max_racers))
+
+        racers = [{'id': e.car_id, 'speed': e.speed, 'is_ai': False} for e in entrants]
+        wanted = size - len(racers)
+        if wanted > 0:
+            exclude_cars = {e.car_id for e in entrants}
+            exclude_wallets = {e.wallet_address for e in entrants}
+            for car_id, _, speed in self.find_opponents(center, wanted, self.band, exclude_cars, exclude_wallets):
+                racers.append({'id': car_id, 'speed': speed, 'is_ai': False})
+        for i in range(size - len(racers)):
+            racers.append({
+                'id': f"AI-{i+1}",
+                'speed': random.uniform(center - self.band, center + self.band),
+                'is_ai': True
+            })
+
+        racers.sort(key=lambda r: r['speed'], reverse=True)
+        self.heats_run += 1
+        heat_id = f"HEAT-{time.time()}-{random.randint(1000, 9999)}"
+        placings = {r['id']: rank for rank, r in enumerate(racers, start=1)}
+
+        return {
+            e.car_id: {
+                'heat_id': heat_id,
+                'your_rank': placings[e.car_id],
+                'winner_car_id': racers[0]['id'],
+                'total_participants': len(racers),
+                'real_opponents': sum(1 for r in racers if not r['is_ai']) - 1,
+            }
+            for e in entrants
+        }
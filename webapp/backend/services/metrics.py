@@ -0,0 +1,141 @@
+import functools
+import glob
+import inspect
+import os
+import time
+from typing import Any, Callable, Optional
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+# Set when several workers write their metrics to shared files (see config.py)
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Buckets from 1ms to 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled', ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+# Gauges are summed over the live workers when there are several
+HTTP_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled', ['method'], multiprocess_mode='livesum'
+)
+
+LEDGER_LATENCY = Histogram(
+    'ledger_request_duration_seconds', 'Ledger JSON-RPC call latency', ['method'], buckets=LATENCY_BUCKETS
+)
+LEDGER_ERRORS = Counter(
+    'ledger_request_errors_total', 'Ledger JSON-RPC calls that failed or returned an error', ['method', 'error']
+)
+
+ENGINE_LATENCY = Histogram(
+    'fhe_engine_call_duration_seconds', 'Encrypted engine call latency, queueing included', ['operation'],
+    buckets=LATENCY_BUCKETS + (30.0, 60.0)
+)
+
+RACING_OPERATIONS = Counter(
+    'racing_operations_total', 'Racing operations by outcome', ['operation', 'outcome']
+)
+CARS_CACHED = Gauge(
+    'racing_cars_cached', 'Cars hydrated in memory', multiprocess_mode='livesum'
+)
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions', 'Rate limiter decisions by action and outcome', ['action', 'outcome']
+)
+
+WALLET_POOL_AVAILABLE = Gauge(
+    'wallet_pool_available', 'Pre-funded wallets ready', multiprocess_mode='livesum'
+)
+
+EVENT_STREAMS_OPEN = Gauge(
+    'event_streams_open', 'Wallet event streams connected', multiprocess_mode='livesum'
+)
+EVENTS_PUBLISHED = Counter(
+    'events_published', 'Events queued to wallet event streams'
+)
+EVENT_STREAMS_DROPPED = Counter(
+    'event_streams_dropped', 'Event streams dropped for falling behind'
+)
+
+def clear_multiprocess_dir() -> None:
+    """Remove metric files left by an earlier run; call before starting workers."""
+    if MULTIPROCESS_DIR:
+        for path in glob.glob(os.path.join(MULTIPROCESS_DIR, '*.db')):
+            os.remove(path)
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared files at shutdown."""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Routes are labelled by their path template (``/race/car/{car_id}``), not
+    the concrete path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            route = scope.get('route')
+            path = route.path if route is not None else 'unmatched'
+            HTTP_LATENCY.labels(method, path).observe(elapsed)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+
+def record_ledger_call(method: str, started: float, error: Optional[str] = None) -> None:
+    LEDGER_LATENCY.labels(method).observe(time.perf_counter() - started)
+    if error is not None:
+        LEDGER_ERRORS.labels(method, error).inc()
+
+def counted(operation: str) -> Callable:
+    """Count calls of a service method returning ``(success, ...)`` by outcome."""
+    def decorate(fn: Callable) -> Callable:
+        def record(result: Any) -> Any:
+            success = result[0] if isinstance(result, tuple) else bool(result)
+            RACING_OPERATIONS.labels(operation, 'success' if success else 'failure').inc()
+            return result
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return record(await fn(*args, **kwargs))
+                except Exception:
+                    RACING_OPERATIONS.labels(operation, 'error').inc()
+                    raise
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return record(fn(*args, **kwargs))
+            except Exception:
+                RACING_OPERATIONS.labels(operation, 'error').inc()
+                raise
+        return wrapper
+    return decorate
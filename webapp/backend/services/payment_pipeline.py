@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+import xrpl
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.ledger import get_fee, get_latest_validated_ledger_sequence
+from xrpl.asyncio.transaction import sign, submit
+from xrpl.models.requests import Tx
+from xrpl.models.transactions import Memo, Payment
+from xrpl.utils import xrp_to_drops
+from xrpl.wallet import Wallet
+from config import settings
+from services.account_cache import account_cache
+from services.event_hub import event_hub
+from services.job_tracker import JobTracker
+from services.xrpl_client import ledger_client
+
+logger = logging.getLogger(__name__)
+
+# Ledgers after the latest validated one during which a payment may be included
+LEDGER_OFFSET = 20
+# Engine results meaning our local sequence was already used. terPRE_SEQ is
+# deliberately absent: rippled holds such a payment until the gap fills, so
+# re-signing it with another sequence could pay twice.
+SEQUENCE_ERRORS = {'tefPAST_SEQ'}
+TERMINAL_STATUSES = {'validated', 'failed'}
+
+@dataclass
+class PaymentJob:
+    tracking_id: str
+    sender: str
+    destination: str
+    amount: float
+    status: str = 'queued'
+    sequence: Optional[int] = None
+    last_ledger_sequence: Optional[int] = None
+    transaction_hash: Optional[str] = None
+    result: Optional[str] = None
+    validated: bool = False
+    fee: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    updated_at: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'tracking_id': self.tracking_id,
+            'status': self.status,
+            'sender': self.sender,
+            'destination': self.destination,
+            'amount': self.amount,
+            'sequence': self.sequence,
+            'transaction_hash': self.transaction_hash,
+            'result': self.result,
+            'validated': self.validated,
+            'fee': self.fee,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
+class PaymentPipeline:
+    """Submits payments without waiting for validation.
+
+    Sequence numbers are assigned locally per sending account, so many
+    payments from the same account can be in flight at once; the account
+    lock only covers sequence assignment. Submitted payments are tracked by
+    a single background loop that polls the ledger once per interval and
+    finalizes each job as validated, failed, or expired past its
+    LastLedgerSequence. Status changes are pushed to subscribers.
+
+    ``ledger_close_time`` is the expected seconds per ledger; together with
+    the LastLedgerSequence offset it bounds how long a payment can stay
+    undecided (``max_wait``).
+    """
+
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, poll_interval: float = 1.0,
+                 max_inflight: int = 50, max_jobs: int = 10000, ledger_close_time: float = 4.0):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.ledger_close_time = ledger_close_time
+
+        self.jobs: JobTracker[PaymentJob] = JobTracker(
+            'payment', TERMINAL_STATUSES, owner='sender', max_jobs=max_jobs, on_update=self._settled
+        )
+        self._next_sequence: Dict[str, int] = {}
+        self._account_locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._ledger_state: Optional[Tuple[float, str, int]] = None
+        self._tracker_task: Optional[asyncio.Task] = None
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if self._tracker_task is None:
+            self._tracker_task = asyncio.create_task(self._track_loop())
+
+    async def stop(self) -> None:
+        if self._tracker_task is not None:
+            self._tracker_task.cancel()
+            try:
+                await self._tracker_task
+            except asyncio.CancelledError:
+                pass
+            self._tracker_task = None
+
+    # ----- public API -----
+
+    async def submit(self, sender_seed: str, destination: str, amount: float, memo: str = None) -> PaymentJob:
+        wallet = Wallet.from_seed(sender_seed)
+        job = PaymentJob(
+            tracking_id=uuid.uuid4().hex,
+            sender=wallet.address,
+            destination=destination,
+            amount=amount
+        )
+        self.jobs.add(job)
+
+        task = asyncio.create_task(self._submit(job, wallet, memo))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, tracking_id: str) -> Optional[PaymentJob]:
+        return self.jobs.get(tracking_id)
+
+    async def wait(self, job: PaymentJob, timeout: Optional[float] = None) -> PaymentJob:
+        await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    @property
+    def max_wait(self) -> float:
+        """Seconds after which a payment should have validated or expired past its LastLedgerSequence."""
+        return (LEDGER_OFFSET + 1) * self.ledger_close_time + 2 * self.poll_interval
+
+    def _settled(self, job: PaymentJob, snapshot: Dict[str, Any]) -> None:
+        if job.status == 'validated':
+            account_cache.invalidate(job.sender, job.destination)
+            event_hub.publish(job.destination, 'payment.received', snapshot)
+
+    # ----- submission -----
+
+    def _lock_for(self, address: str) -> asyncio.Lock:
+        lock = self._account_locks.get(address)
+        if lock is None:
+            lock = self._account_locks[address] = asyncio.Lock()
+        return lock
+
+    async def _claim_sequence(self, address: str) -> int:
+        async with self._lock_for(address):
+            sequence = self._next_sequence.get(address)
+            if sequence is None:
+                response = await self.client.request(xrpl.models.requests.AccountInfo(
+                    account=address,
+                    ledger_index="current"
+                ))
+                if not response.is_successful():
+                    raise xrpl.asyncio.clients.XRPLRequestFailureException(response.result)
+                sequence = response.result['account_data']['Sequence']
+            self._next_sequence[address] = sequence + 1
+            return sequence
+
+    def _resync(self, address: str) -> None:
+        self._next_sequence.pop(address, None)
+
+    async def _current_ledger_state(self) -> Tuple[str, int]:
+        # Fee and validated ledger are shared by every payment in a poll interval
+        now = time.monotonic()
+        if self._ledger_state is None or now - self._ledger_state[0] > self.poll_interval:
+            fee = await get_fee(self.client)
+            validated = await get_latest_validated_ledger_sequence(self.client)
+            self._ledger_state = (now, fee, validated)
+        return self._ledger_state[1], self._ledger_state[2]
+
+    async def _submit(self, job: PaymentJob, wallet: Wallet, memo: Optional[str]) -> None:
+        signed_tx = None
+        try:
+            async with self._inflight:
+                error = "Could not obtain a valid account sequence"
+                for _ in range(3):
+                    signed_tx = None
+                    sequence = await self._claim_sequence(wallet.address)
+                    fee, validated = await self._current_ledger_state()
+
+                    payment_tx = Payment(
+                        account=wallet.address,
+                        amount=xrp_to_drops(job.amount),
+                        destination=job.destination,
+                        sequence=sequence,
+                        fee=fee,
+                        last_ledger_sequence=validated + LEDGER_OFFSET,
+                        memos=[Memo(memo_data=memo.encode('utf-8').hex())] if memo else None
+                    )
+                    signed_tx = sign(payment_tx, wallet)
+                    response = await submit(signed_tx, self.client)
+                    engine_result = response.result.get('engine_result', '')
+                    message = response.result.get('engine_result_message') or response.result.get('error')
+
+                    if engine_result in SEQUENCE_ERRORS:
+                        self._resync(wallet.address)
+                        continue
+
+                    if engine_result[:3] == 'tel':
+                        # Rejected by this server only (fee, queue full): the sequence
+                        # was not consumed, so retry with a fresh sequence and fee
+                        self._resync(wallet.address)
+                        self._ledger_state = None
+                        error = f"{engine_result}: {message}"
+                        continue
+
+                    if engine_result[:3] in ('tem', 'tef') or not response.is_successful():
+                        # Sequence was not consumed; later claims must re-read it
+                        self._resync(wallet.address)
+                        self.jobs.update(job, status='failed', result=engine_result or None,
+                                     sequence=sequence, error=f"{engine_result}: {message}")
+                        return
+
+                    self.jobs.update(job, status='submitted', sequence=sequence,
+                                 last_ledger_sequence=signed_tx.last_ledger_sequence,
+                                 transaction_hash=signed_tx.get_hash(), result=engine_result, fee=fee)
+                    return
+
+                signed_tx = None
+                self.jobs.update(job, status='failed', error=error)
+        except Exception as e:
+            logger.error(f"Payment {job.tracking_id} submission error: {str(e)}")
+            if signed_tx is not None:
+                # The transaction may have reached the ledger; tracking decides
+                # whether it validated or expired
+                self.jobs.update(job, status='submitted', sequence=signed_tx.sequence,
+                             last_ledger_sequence=signed_tx.last_ledger_sequence,
+                             transaction_hash=signed_tx.get_hash(), fee=signed_tx.fee)
+                return
+            self._resync(wallet.address)
+            self.jobs.update(job, status='failed', error=str(e))
+
+    # ----- validation tracking -----
+
+    async def _track_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            pending = self.jobs.with_status('submitted')
+            if not pending:
+                continue
+            try:
+                validated = await get_latest_validated_ledger_sequence(self.client)
+                await asyncio.gather(*(self._check(job, validated) for job in pending))
+            except Exception as e:
+                logger.warning(f"Payment tracking error: {str(e)}")
+
+    async def _check(self, job: PaymentJob, validated_ledger: int) -> None:
+        response = await self.client.request(Tx(transaction=job.transaction_hash))
+        result = response.result
+
+        if response.is_successful() and result.get('validated'):
+            outcome = result.get('meta', {}).get('TransactionResult')
+            if outcome == 'tesSUCCESS':
+                self.jobs.update(job, status='validated', result=outcome, validated=True)
+            else:
+                self.jobs.update(job, status='failed', result=outcome, validated=True,
+                             error=f"Transaction failed: {outcome}")
+        elif validated_ledger > job.last_ledger_sequence:
+            self._resync(job.sender)
+            self.jobs.update(job, status='failed', error=(
+                f"Expired: validated ledger {validated_ledger} passed "
+                f"LastLedgerSequence {job.last_ledger_sequence}"
+            ))
+
+payment_pipeline = PaymentPipeline(
+    poll_interval=settings.PAYMENT_POLL_INTERVAL,
+    max_inflight=settings.PAYMENT_MAX_INFLIGHT,
+    ledger_close_time=settings.SIMULATOR_CLOSE_INTERVAL if settings.NETWORK == "simulator" else settings.LEDGER_CLOSE_TIME
+)
@@ -1,57 +1,64 @@
+import asyncio
 import xrpl
-from xrpl.clients import JsonRpcClient
-from xrpl.wallet import Wallet
-from xrpl.models.transactions import Payment
-from xrpl.transaction import submit_and_wait
-from xrpl.utils import xrp_to_drops
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.transaction import XRPLReliableSubmissionException
 from typing import Dict, Any
-from config import settings
+from services.xrpl_client import ledger_client
+from services.payment_pipeline import PaymentJob, PaymentPipeline, payment_pipeline
+from services.tracing import traced
 
 class PaymentService:
     
-    def __init__(self):
-        self.testnet_url = settings.TESTNET_URL
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, pipeline: PaymentPipeline = payment_pipeline):
+        self.client = client
+        self.pipeline = pipeline
     
-    def send_payment(
+    @traced('payment.submit')
+    async def submit_payment(
+        self, 
+        sender_seed: str, 
+        destination: str, 
+        amount: float,
+        memo: str = None
+    ) -> PaymentJob:
+        return await self.pipeline.submit(sender_seed, destination, amount, memo)
+    
+    @traced('payment.send')
+    async def send_payment(
         self, 
         sender_seed: str, 
         destination: str, 
         amount: float,
         memo: str = None
     ) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        sender_wallet = Wallet.from_seed(sender_seed)
+        job = await self.submit_payment(sender_seed, destination, amount, memo)
+        try:
+            await self.pipeline.wait(job, self.pipeline.max_wait)
+        except asyncio.TimeoutError:
+            # Ledger unreachable or not tracking; the job may still settle later
+            pass
         
-        payment_tx = Payment(
-            account=sender_wallet.address,
-            amount=xrp_to_drops(amount),
-            destination=destination,
-        )
-        
-        if memo:
-            payment_tx.memos = [
-                xrpl.models.transactions.Memo(
-                    memo_data=memo.encode('utf-8').hex()
-                )
-            ]
-        
-        response = submit_and_wait(payment_tx, client, sender_wallet)
+        if job.status == 'failed':
+            raise XRPLReliableSubmissionException(job.error)
         
         result_data = {
-            "status": "success",
-            "transaction_hash": response.result.get('hash'),
-            "result": response.result.get('meta', {}).get('TransactionResult'),
-            "validated": response.result.get('validated', False),
+            "status": "success" if job.status == 'validated' else "pending",
+            "tracking_id": job.tracking_id,
+            "transaction_hash": job.transaction_hash,
+            "result": job.result,
+            "validated": job.validated,
         }
         
-        if 'Fee' in response.result:
-            result_data['fee'] = response.result['Fee']
+        if job.fee:
+            result_data['fee'] = job.fee
         
         return result_data
     
-    def get_transaction_history(self, address: str, limit: int = 10) -> list:
-        client = JsonRpcClient(self.testnet_url)
-        
+    def get_job(self, tracking_id: str) -> PaymentJob:
+        return self.pipeline.get(tracking_id)
+    
+    @traced('payment.history')
+    async def get_transaction_history(self, address: str, limit: int = 10) -> list:
         tx_request = xrpl.models.requests.AccountTx(
             account=address,
             ledger_index_min=-1,
@@ -59,5 +66,5 @@ class PaymentService:
             limit=limit
         )
         
-        response = client.request(tx_request)
+        response = await self.client.request(tx_request)
         return response.result.get('transactions', [])
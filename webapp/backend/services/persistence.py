@@ -0,0 +1,500 @@
+import json
+import logging
+import os
+import time
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from services.car_store import Car
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cars (
+    car_id TEXT PRIMARY KEY,
+    wallet_address TEXT NOT NULL,
+    flags BLOB NOT NULL,
+    weights BLOB NOT NULL,
+    training_count INTEGER NOT NULL,
+    last_speed REAL,
+    created_ts REAL NOT NULL,
+    trained_ts REAL,
+    version INTEGER NOT NULL DEFAULT 0,
+    parent_id TEXT,
+    lineage_id TEXT,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_cars_wallet ON cars (wallet_address);
+
+CREATE TABLE IF NOT EXISTS races (
+    race_id TEXT PRIMARY KEY,
+    car_id TEXT NOT NULL,
+    wallet_address TEXT NOT NULL,
+    ts REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_races_ts ON races (ts);
+CREATE INDEX IF NOT EXISTS idx_races_car ON races (car_id, ts);
+CREATE INDEX IF NOT EXISTS idx_races_wallet ON races (wallet_address, ts);
+
+CREATE TABLE IF NOT EXISTS fee_payments (
+    tx_hash TEXT PRIMARY KEY,
+    wallet_address TEXT NOT NULL,
+    action TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+"""
+
+CAR_COLUMNS = ("car_id, wallet_address, flags, weights, training_count, last_speed, created_ts, trained_ts, version, "
+               "parent_id, lineage_id, generation")
+
+# Created after migrating older databases, which lack the lineage columns
+LINEAGE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_cars_lineage ON cars (lineage_id, generation);
+CREATE INDEX IF NOT EXISTS idx_cars_parent ON cars (parent_id);
+"""
+
+INSERT_CAR = f"INSERT INTO cars ({CAR_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Compare-and-swap: applies only if nobody changed or deleted the car since
+# expected_version was read, so a late write can never bring a sold car back
+UPDATE_CAR = """
+UPDATE cars SET flags = ?, weights = ?, training_count = ?, last_speed = ?, trained_ts = ?, version = ?
+WHERE car_id = ? AND version = ?
+"""
+
+CarRow = Tuple[str, str, bytes, bytes, int, Optional[float], float, Optional[float], int,
+               Optional[str], str, int]
+PendingCar = Tuple[Optional[int], CarRow]
+
+def car_to_row(car: Car) -> CarRow:
+    store, slot = car._store, car.slot
+    trained_ts = store.trained_ts[slot]
+    return (
+        car.car_id,
+        car.wallet_address,
+        car.flags.astype(np.int16).tobytes(),
+        car.weights.astype(np.float64).tobytes(),
+        car.training_count,
+        car.last_speed,
+        float(store.created_ts[slot]),
+        None if np.isnan(trained_ts) else float(trained_ts),
+        car.version,
+        car.parent_id,
+        car.lineage_id,
+        car.generation,
+    )
+
+def _update_params(row: CarRow, expected_version: int) -> tuple:
+    return (row[2], row[3], row[4], row[5], row[7], row[8], row[0], expected_version)
+
+class ConnectionPool:
+    """Small fixed-size pool of SQLite connections shared across requests."""
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 5.0):
+        if path == ":memory:":
+            size = 1  # every connection to :memory: would get its own database
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+class RacingRepository:
+    """SQLite persistence for cars and races with write-behind batching.
+
+    Car writes are coalesced per car_id and races are buffered; a background
+    thread commits everything pending in a single transaction every
+    ``flush_interval`` seconds, or as soon as ``batch_size`` writes are
+    queued. Point lookups consult the pending buffer first, so callers always
+    read their own writes.
+
+    New cars are inserted; every later write to a car is a compare-and-swap
+    on its version, and a queued write that finds the car changed or sold
+    is dropped rather than applied. With ``write_through`` car writes are
+    committed before returning and report such conflicts to the caller,
+    which is what several worker processes sharing one database file need.
+    Races stay batched either way. Ownership-changing operations go through
+    the versioned compare-and-swap methods and are always synchronous.
+
+    The same thread periodically trims race history to ``race_retention``
+    seconds and/or the newest ``race_max_rows`` races.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, batch_size: int = 256,
+                 flush_interval: float = 0.05, write_through: bool = False,
+                 race_retention: Optional[float] = None, race_max_rows: Optional[int] = None,
+                 compact_interval: float = 3600.0):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cars)")}
+            if 'version' not in columns:
+                conn.execute("ALTER TABLE cars ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            if 'lineage_id' not in columns:
+                conn.execute("ALTER TABLE cars ADD COLUMN parent_id TEXT")
+                conn.execute("ALTER TABLE cars ADD COLUMN lineage_id TEXT")
+                conn.execute("ALTER TABLE cars ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE cars SET lineage_id = car_id WHERE lineage_id IS NULL")
+            conn.executescript(LINEAGE_INDEXES)
+
+        self.write_through = write_through
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.race_retention = race_retention
+        self.race_max_rows = race_max_rows
+        self.compact_interval = compact_interval
+        self._last_compaction = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # car_id -> (version the database must hold, or None to insert, row to write)
+        self._pending_cars: Dict[str, PendingCar] = {}
+        self._inflight_cars: Dict[str, PendingCar] = {}
+        self._pending_races: List[tuple] = []
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="racing-db-writer", daemon=True)
+        self._flusher.start()
+
+    # ----- writes -----
+
+    def insert_car(self, car: Car) -> None:
+        self._enqueue_car(car.car_id, None, car_to_row(car))
+
+    def save_car(self, car: Car, expected_version: int) -> bool:
+        """Write an existing car as its own ``version``, if the stored one is still ``expected_version``."""
+        return self.save_cars([(car, expected_version)])[0]
+
+    def save_cars(self, cars: List[Tuple[Car, int]]) -> List[bool]:
+        """``save_car`` for many ``(car, expected_version)``.
+
+        Queued writes always report True; one that turns out to conflict is
+        dropped when flushed. With ``write_through`` the cars are written in
+        one transaction at once, and False means that car was changed or
+        sold since ``expected_version`` was read.
+        """
+        if not self.write_through:
+            for car, expected_version in cars:
+                self._enqueue_car(car.car_id, expected_version, car_to_row(car))
+            return [True] * len(cars)
+
+        self.flush()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                results = [
+                    conn.execute(UPDATE_CAR, _update_params(car_to_row(car), expected_version)).rowcount == 1
+                    for car, expected_version in cars
+                ]
+                conn.execute("COMMIT")
+                return results
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def append_race(self, race: dict, wallet_address: str, ts: float) -> None:
+        with self._lock:
+            self._pending_races.append((race['race_id'], race['car_id'], wallet_address, ts, json.dumps(race)))
+            pending = len(self._pending_cars) + len(self._pending_races)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _enqueue_car(self, car_id: str, expected_version: Optional[int], row: CarRow) -> None:
+        with self._lock:
+            previous = self._pending_cars.get(car_id)
+            if previous is not None:
+                # Still unwritten: keep inserting it, or keep the version the first write expects
+                expected_version = previous[0]
+            self._pending_cars[car_id] = (expected_version, row)
+            pending = len(self._pending_cars) + len(self._pending_races)
+        if self.write_through:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def commit_training(self, base_car_id: str, expected_version: int,
+                        base_last_speed: Optional[float], new_car: Car) -> bool:
+        """Insert a trained child and bump its parent's version atomically.
+
+        Returns False, writing nothing, if the parent was changed or sold
+        since ``expected_version`` was read.
+        """
+        return self.commit_trainings([(base_car_id, expected_version, base_last_speed, new_car)])[0]
+
+    def commit_trainings(self, trainings: List[Tuple[str, int, Optional[float], Car]]) -> List[bool]:
+        """``commit_training`` for many ``(base_car_id, expected_version, base_last_speed, new_car)``
+        in one transaction; each result says whether that child was written.
+        """
+        self.flush()
+        results = []
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for base_car_id, expected_version, base_last_speed, new_car in trainings:
+                    updated = conn.execute(
+                        "UPDATE cars SET version = version + 1, last_speed = ? WHERE car_id = ? AND version = ?",
+                        (base_last_speed, base_car_id, expected_version)
+                    ).rowcount
+                    if updated:
+                        conn.execute(INSERT_CAR, car_to_row(new_car))
+                    results.append(bool(updated))
+                conn.execute("COMMIT")
+                return results
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete_car_if_version(self, car_id: str, wallet_address: str, expected_version: int) -> bool:
+        return self.delete_cars_if_version([(car_id, wallet_address, expected_version)])[0]
+
+    def delete_cars_if_version(self, cars: List[Tuple[str, str, int]]) -> List[bool]:
+        """Delete many ``(car_id, wallet_address, expected_version)`` in one transaction;
+        each result says whether that car was deleted.
+        """
+        self.flush()
+        results = []
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for car_id, wallet_address, expected_version in cars:
+                    deleted = conn.execute(
+                        "DELETE FROM cars WHERE car_id = ? AND wallet_address = ? AND version = ?",
+                        (car_id, wallet_address, expected_version)
+                    ).rowcount
+                    results.append(deleted == 1)
+                conn.execute("COMMIT")
+                return results
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def claim_payment(self, tx_hash: str, wallet_address: str, action: str, ts: float) -> bool:
+        """Record a fee payment as spent; False if it already paid for something."""
+        with self.pool.connection() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO fee_payments (tx_hash, wallet_address, action, ts) VALUES (?, ?, ?, ?)",
+                (tx_hash, wallet_address, action, ts)
+            ).rowcount
+        return inserted == 1
+
+    def release_payment(self, tx_hash: str) -> None:
+        """Undo ``claim_payment`` for an action that did not go through."""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM fee_payments WHERE tx_hash = ?", (tx_hash,))
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                cars, self._pending_cars = self._pending_cars, {}
+                races, self._pending_races = self._pending_races, []
+                self._inflight_cars = cars
+            if not cars and not races:
+                return
+
+            try:
+                self._commit(cars, races)
+            except Exception:
+                # Put the batch back; anything queued since keeps its newer row
+                with self._lock:
+                    for car_id, (expected_version, row) in cars.items():
+                        newer = self._pending_cars.get(car_id)
+                        self._pending_cars[car_id] = (expected_version, row if newer is None else newer[1])
+                    self._pending_races[:0] = races
+                raise
+            finally:
+                with self._lock:
+                    self._inflight_cars = {}
+
+    def _commit(self, cars: Dict[str, PendingCar], races: List[tuple]) -> None:
+        inserts = [row for expected_version, row in cars.values() if expected_version is None]
+        lost = []
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if inserts:
+                    conn.executemany(INSERT_CAR, inserts)
+                for car_id, (expected_version, row) in cars.items():
+                    if expected_version is not None and not conn.execute(
+                            UPDATE_CAR, _update_params(row, expected_version)).rowcount:
+                        lost.append(car_id)
+                if races:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO races (race_id, car_id, wallet_address, ts, data) VALUES (?, ?, ?, ?, ?)",
+                        races
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if lost:
+            logger.warning(f"Dropped writes to {len(lost)} cars changed or sold elsewhere: {', '.join(lost[:10])}")
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Failed to flush racing writes; will retry")
+
+            if time.monotonic() - self._last_compaction >= self.compact_interval:
+                self._last_compaction = time.monotonic()
+                try:
+                    self.compact_races()
+                except sqlite3.Error:
+                    logger.exception("Failed to compact race history")
+
+    def compact_races(self, chunk_size: int = 5000) -> int:
+        """Drop races older than the retention age or beyond the newest ``race_max_rows``.
+
+        Deletes in small chunks so writers are never locked out for long.
+        """
+        bounds = []
+        if self.race_retention is not None:
+            bounds.append(("ts < ?", time.time() - self.race_retention))
+        if self.race_max_rows is not None:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT ts FROM races ORDER BY ts DESC LIMIT 1 OFFSET ?", (self.race_max_rows,)
+                ).fetchone()
+            if row is not None:
+                bounds.append(("ts <= ?", row[0]))
+
+        deleted = 0
+        for condition, bound in bounds:
+            while True:
+                with self.pool.connection() as conn:
+                    count = conn.execute(
+                        f"DELETE FROM races WHERE rowid IN (SELECT rowid FROM races WHERE {condition} LIMIT ?)",
+                        (bound, chunk_size)
+                    ).rowcount
+                deleted += count
+                if count < chunk_size:
+                    break
+        if deleted:
+            logger.info(f"Compacted race history: removed {deleted} races")
+        return deleted
+
+    def close(self) -> None:
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        self.pool.close()
+
+    # ----- reads -----
+
+    def load_car(self, car_id: str, fresh: bool = False) -> Optional[CarRow]:
+        """Look up one car; ``fresh`` skips the local buffers and reads the database."""
+        if fresh:
+            self.flush()
+        else:
+            with self._lock:
+                for buffer in (self._pending_cars, self._inflight_cars):
+                    if car_id in buffer:
+                        return buffer[car_id][1]
+        with self.pool.connection() as conn:
+            return conn.execute(f"SELECT {CAR_COLUMNS} FROM cars WHERE car_id = ?", (car_id,)).fetchone()
+
+    def load_garage(self, wallet_address: str, latest_only: bool = False, after: Optional[int] = None,
+                    limit: Optional[int] = None) -> List[Tuple[int, CarRow]]:
+        """A wallet's cars as ``(rowid, row)`` pairs in creation order.
+
+        ``latest_only`` keeps just the newest generation of each lineage.
+        ``after`` is the rowid of the last car of the previous page.
+        """
+        self.flush()
+        clauses, params = ["c.wallet_address = ?"], [wallet_address]
+        if latest_only:
+            clauses.append(
+                "NOT EXISTS (SELECT 1 FROM cars d WHERE d.lineage_id = c.lineage_id AND d.generation > c.generation)"
+            )
+        if after is not None:
+            clauses.append("c.rowid > ?")
+            params.append(after)
+        columns = ", ".join(f"c.{name.strip()}" for name in CAR_COLUMNS.split(","))
+        query = f"SELECT c.rowid, {columns} FROM cars c WHERE {' AND '.join(clauses)} ORDER BY c.rowid"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.pool.connection() as conn:
+            return [(row[0], row[1:]) for row in conn.execute(query, params)]
+
+    def load_lineage(self, lineage_id: str) -> List[CarRow]:
+        """Every surviving car of a lineage, oldest generation first."""
+        self.flush()
+        with self.pool.connection() as conn:
+            return conn.execute(
+                f"SELECT {CAR_COLUMNS} FROM cars WHERE lineage_id = ? ORDER BY generation, rowid",
+                (lineage_id,)
+            ).fetchall()
+
+    def iter_car_speed_inputs(self, batch_size: int = 10000) -> Iterator[List[Tuple[str, str, bytes, bytes]]]:
+        """Yield ``(car_id, wallet_address, flags, weights)`` rows for every car in batches."""
+        self.flush()
+        with self.pool.connection() as conn:
+            cursor = conn.execute("SELECT car_id, wallet_address, flags, weights FROM cars")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def counts(self) -> Dict[str, int]:
+        """Number of cars, wallets with a garage and races stored, pending writes included."""
+        self.flush()
+        with self.pool.connection() as conn:
+            return {
+                'cars': conn.execute("SELECT COUNT(*) FROM cars").fetchone()[0],
+                'wallets': conn.execute("SELECT COUNT(DISTINCT wallet_address) FROM cars").fetchone()[0],
+                'races': conn.execute("SELECT COUNT(*) FROM races").fetchone()[0],
+            }
+
+    def load_races(self, car_id: Optional[str] = None, wallet_address: Optional[str] = None,
+                   before: Optional[Tuple[float, str]] = None, limit: int = 20) -> List[Tuple[float, str, str]]:
+        """Newest-first ``(ts, race_id, data)`` rows, optionally for one car or wallet.
+
+        ``before`` is the ``(ts, race_id)`` of the last row of the previous
+        page; paging is by key so each page is an index range scan.
+        """
+        self.flush()
+        clauses, params = [], []
+        if car_id is not None:
+            clauses.append("car_id = ?")
+            params.append(car_id)
+        if wallet_address is not None:
+            clauses.append("wallet_address = ?")
+            params.append(wallet_address)
+        if before is not None:
+            clauses.append("(ts < ? OR (ts = ? AND race_id < ?))")
+            params.extend([before[0], before[0], before[1]])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.pool.connection() as conn:
+            return conn.execute(
+                f"SELECT ts, race_id, data FROM races {where} ORDER BY ts DESC, race_id DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
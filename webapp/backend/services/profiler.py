@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from config import settings
+
+class ProfilerBusyError(Exception):
+    pass
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for every thread of this process.
+
+    ``capture`` runs in its own thread, and every ``interval`` seconds it
+    records the stack of each other thread (the event loop, the database
+    flusher, executor threads ...) from ``sys._current_frames()``. Stacks
+    are returned in the collapsed format (``thread;outer;...;inner count``)
+    read by flamegraph.pl, speedscope and inferno. Nothing runs between
+    captures, and only one capture may run at a time.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, min_interval: float = 0.001):
+        self.max_seconds = max_seconds
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def capture(self, seconds: float, interval: float = 0.01, thread_filter: Optional[str] = None) -> Dict[str, object]:
+        """Sample for ``seconds``; returns the collapsed stacks and capture statistics."""
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds:g}")
+        interval = max(interval, self.min_interval)
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being captured")
+
+        try:
+            me = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    thread = names.get(ident, f"thread-{ident}")
+                    if thread_filter and thread_filter not in thread:
+                        continue
+                    labels: List[str] = []
+                    while frame is not None:
+                        labels.append(self._frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(thread.replace(';', ':'))
+                    stacks[';'.join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return {
+                'collapsed': ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+                'samples': samples,
+                'duration': round(time.perf_counter() - started, 3),
+                'distinct_stacks': len(stacks),
+            }
+        finally:
+            self._lock.release()
+
+profiler = SamplingProfiler(max_seconds=settings.PROFILE_MAX_SECONDS)
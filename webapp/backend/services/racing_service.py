@@ -1,134 +1,298 @@
+import asyncio
+import base64
+import contextvars
+import functools
 import random
 import hashlib
 import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 import xrpl
 from xrpl.clients import JsonRpcClient
 from xrpl.wallet import Wallet
 from xrpl.models.transactions import Payment
 from xrpl.utils import xrp_to_drops
+import numpy as np
+from config import settings
+from services.car_store import Car, CarStore, NUM_ATTRIBUTES, scale_speed
+from services.event_hub import event_hub
+from services.fhe_engine import FheEngine, fhe_engine
+from services.leaderboard import Leaderboard
+from services.matchmaker import Matchmaker
+from services.metrics import CARS_CACHED, counted
+from services.tracing import tracer, traced
+from services.persistence import RacingRepository
 
-class Car:
-    
-    ATTRIBUTE_NAMES = [
-        'tyres',        # 0: Tyre quality
-        'brakes',       # 1: Brake performance
-        'engine',       # 2: Engine power
-        'aerodynamics', # 3: Aerodynamic efficiency
-        'suspension',   # 4: Suspension quality
-        'transmission', # 5: Transmission efficiency
-        'fuel_system',  # 6: Fuel system optimization
-        'electronics',  # 7: Electronic systems
-        'chassis',      # 8: Chassis rigidity
-        'cooling'       # 9: Cooling system
-    ]
-    
-    def __init__(self, car_id: str, wallet_address: str):
-        self.car_id = car_id
-        self.wallet_address = wallet_address
-        self.flags = [random.randint(1, 999) for _ in range(10)]
-        self.training_count = 0
-        self.created_at = datetime.utcnow().isoformat()
-        self.last_trained = None
-        self.last_speed = None
-        
-        base_weights = [0.15, 0.12, 0.10, 0.08, 0.11, 0.09, 0.13, 0.07, 0.08, 0.07]
-        self.weights = [w + random.uniform(-0.02, 0.02) for w in base_weights]
-        total = sum(self.weights)
-        self.weights = [w / total for w in self.weights]
-        
-    def calculate_speed(self) -> float:
-        raw_speed = sum(f * w for f, w in zip(self.flags, self.weights))
-        
-        min_raw, max_raw = 100, 900
-        min_speed, max_speed = 150, 350
-        
-        speed = min_speed + (raw_speed - min_raw) * (max_speed - min_speed) / (max_raw - min_raw)
-        
-        speed = max(min_speed, min(max_speed, speed))
-        
-        self.last_speed = speed
-        return speed
-    
-    def train(self, attribute_indices: Optional[List[int]] = None) -> dict:
-        if attribute_indices is None or len(attribute_indices) == 0:
-            attribute_indices = list(range(10))
-        
-        changes = {}
-        for i in attribute_indices:
-            if 0 <= i < 10:
-                old_value = self.flags[i]
-                delta = random.randint(-20, 20)
-                new_value = max(1, min(999, self.flags[i] + delta))
-                self.flags[i] = new_value
-                changes[self.ATTRIBUTE_NAMES[i]] = {
-                    'old': old_value,
-                    'delta': delta,
-                    'new': new_value
-                }
-        
-        self.training_count += 1
-        self.last_trained = datetime.utcnow().isoformat()
-        
-        self.last_speed = None
-        
-        return changes
-    
-    def to_dict_safe(self) -> dict:
-        return {
-            'car_id': self.car_id,
-            'wallet_address': self.wallet_address,
-            'training_count': self.training_count,
-            'created_at': self.created_at,
-            'last_trained': self.last_trained
-        }
+logger = logging.getLogger(__name__)
 
 class RacingService:
     
     PAYMENT_DESTINATION = "rPEPPER7kfTD9w2To4CQk6UCfuHM9c6GDY"
     TESTNET_URL = "https://s.altnet.rippletest.net:51234"
+    FEE_XRP = 1.0
+    REFUND_XRP = 0.5
+    
+    # Attempts for train/sell when another request changed the car concurrently
+    MAX_CAS_RETRIES = 3
+    
+    def __init__(self, repository: RacingRepository, shared: bool = False, leaderboard_refresh: float = 5.0,
+                 matchmaking: Optional[dict] = None, engine: Optional[FheEngine] = None,
+                 cache_size: Optional[int] = None):
+        # Durable state lives in the repository; cars is an LRU cache of the
+        # cars recently looked up by id. When shared with other worker
+        # processes the cache is never trusted and every lookup re-reads the
+        # database. A request may touch a batch of cars and their trained
+        # children, which must all stay cached until it returns.
+        self.repository = repository
+        self.shared = shared
+        self.cars: CarStore = CarStore(
+            max_cars=None if cache_size is None else max(cache_size, 4 * settings.BATCH_MAX_ITEMS)
+        )
+        
+        # Covers every car, not just cached ones. Other workers' changes are
+        # only picked up by a periodic rebuild when shared, which scans the
+        # whole table and so runs in a background thread.
+        self.leaderboard = Leaderboard()
+        self.leaderboard_refresh = leaderboard_refresh
+        self._leaderboard_built = 0.0
+        self._leaderboard_rebuilding = threading.Lock()
+        self.rebuild_leaderboard()
+        self.matchmaker = Matchmaker(self._find_opponents, **(matchmaking or {}))
+        # Optional encrypted engine; speeds it reports replace the plaintext ones
+        # on the leaderboard until the next rebuild
+        self.engine = engine
+        
+        # Repository calls block (write-through commits, busy waits), so async
+        # callers run the synchronous methods on this one thread via offload.
+        # It is the only thread that touches the car cache.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="racing")
+        self._racing: Set[str] = set()
+    
+    async def offload(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` on the service thread and wait for it without blocking the event loop."""
+        context = contextvars.copy_context()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(context.run, fn, *args, **kwargs)
+            )
+        finally:
+            CARS_CACHED.set(len(self.cars))
+    
+    def rebuild_leaderboard(self) -> None:
+        """Rank every stored car and swap the result in as the leaderboard."""
+        entries = []
+        for rows in self.repository.iter_car_speed_inputs():
+            flags = np.frombuffer(b''.join(row[2] for row in rows), dtype=np.int16).reshape(-1, NUM_ATTRIBUTES)
+            weights = np.frombuffer(b''.join(row[3] for row in rows), dtype=np.float64).reshape(-1, NUM_ATTRIBUTES)
+            speeds = scale_speed(np.einsum('ij,ij->i', flags, weights))
+            entries.extend((row[0], row[1], speed) for row, speed in zip(rows, speeds.tolist()))
+        self.leaderboard = Leaderboard(entries)
+        self._leaderboard_built = time.monotonic()
+    
+    def _current_leaderboard(self) -> Leaderboard:
+        # A stale leaderboard is served until the background rebuild swaps in the new one
+        if self.shared and time.monotonic() - self._leaderboard_built > self.leaderboard_refresh:
+            if self._leaderboard_rebuilding.acquire(blocking=False):
+                threading.Thread(target=self._rebuild_leaderboard_in_background,
+                                 name="leaderboard-rebuild", daemon=True).start()
+        return self.leaderboard
+    
+    def _rebuild_leaderboard_in_background(self) -> None:
+        try:
+            self.rebuild_leaderboard()
+        except Exception:
+            logger.exception("Failed to rebuild the leaderboard")
+            self._leaderboard_built = time.monotonic()
+        finally:
+            self._leaderboard_rebuilding.release()
+    
+    def _find_opponents(self, speed: float, count: int, band: float, exclude_cars, exclude_wallets):
+        return self._current_leaderboard().near(speed, count, band, exclude_cars, exclude_wallets)
+    
+    def _rank(self, car: Car) -> None:
+        speed = self.cars.compute_speeds(np.array([car.slot]))[0]
+        self.leaderboard.update(car.car_id, car.wallet_address, speed)
     
-    def __init__(self):
-        self.cars: Dict[str, Car] = {}
-        self.garage: Dict[str, List[str]] = {}
-        self.races: List[dict] = []
+    def _store_speeds(self, cars: List[Car], speeds: List[float]) -> List[bool]:
+        """Record measured speeds; False for a car sold (or still changing) meanwhile.
+        
+        A car's flags never change after it is created, so a speed stays valid
+        when another worker changed the car first and the write is retried.
+        """
+        cars = list(cars)
+        stored = [False] * len(cars)
+        pending = list(range(len(cars)))
+        for _ in range(self.MAX_CAS_RETRIES):
+            saves = []
+            for i in pending:
+                car = cars[i]
+                expected_version = car.version
+                car.last_speed = speeds[i]
+                self.cars.versions[car.slot] += 1
+                saves.append((car, expected_version))
+            
+            retry = []
+            for i, saved in zip(pending, self.repository.save_cars(saves)):
+                if saved:
+                    stored[i] = True
+                    continue
+                car = self.get_car(cars[i].car_id, fresh=True)
+                if car is None:
+                    self.leaderboard.remove(cars[i].car_id)
+                else:
+                    cars[i] = car
+                    retry.append(i)
+            pending = retry
+            if not pending:
+                break
+        return stored
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.repository.close()
     
-    def _process_payment(self, wallet_seed: str, amount_xrp: float) -> Tuple[bool, str]:
+    @traced('racing.payment')
+    def _process_payment(self, wallet_seed: Optional[str], amount_xrp: float, payment_tx: Optional[str] = None) -> Tuple[bool, str]:
+        if payment_tx is not None:
+            # Client-signed fee, already verified on the ledger by the fee verifier
+            return True, payment_tx
         return True, f"DEMO-TX-{random.randint(100000, 999999)}"
         
     def _generate_car_id(self, wallet_address: str) -> str:
-        timestamp = datetime.utcnow().timestamp()
+        timestamp = time.time()
         data = f"{wallet_address}{timestamp}{random.random()}"
         hash_id = hashlib.sha256(data.encode()).hexdigest()[:12]
         return f"CAR-{hash_id}"
     
-    def create_car(self, wallet_address: str, wallet_seed: str) -> Tuple[bool, Optional[Car], str]:
-        payment_success, payment_result = self._process_payment(wallet_seed, 1.0)
+    @traced('racing.create_car')
+    @counted('create_car')
+    def create_car(self, wallet_address: str, wallet_seed: Optional[str] = None, payment_tx: Optional[str] = None,
+                   car_id: Optional[str] = None) -> Tuple[bool, Optional[Car], str]:
+        payment_success, payment_result = self._process_payment(wallet_seed, self.FEE_XRP, payment_tx)
         
         if not payment_success:
             return False, None, f"Payment failed: {payment_result}"
         
-        car_id = self._generate_car_id(wallet_address)
-        car = Car(car_id, wallet_address)
+        car_id = car_id or self._generate_car_id(wallet_address)
+        car = self.cars.add(car_id, wallet_address)
+        self.repository.insert_car(car)
+        self._rank(car)
+        event_hub.publish(wallet_address, 'car.created', car.to_dict_safe())
         
-        self.cars[car_id] = car
+        return True, car, f"Car created successfully. Payment tx: {payment_result}"
+    
+    @traced('racing.get_garage')
+    def get_garage(self, wallet_address: str, latest_only: bool = False, cursor: Optional[str] = None,
+                   limit: Optional[int] = None) -> Tuple[List[Car], Optional[str]]:
+        """A page of a wallet's cars in creation order and the cursor for the next page, if any."""
+        after = None
+        if cursor:
+            try:
+                after = int(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+            except Exception:
+                raise ValueError("Invalid cursor")
+        
+        rows = self.repository.load_garage(wallet_address, latest_only, after, None if limit is None else limit + 1)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = base64.urlsafe_b64encode(json.dumps(rows[-1][0]).encode()).decode()
+        
+        return self._detached(row for _, row in rows), next_cursor
+    
+    def get_lineage(self, car_id: str) -> Optional[List[Car]]:
+        """Every surviving car descended from the same original car, oldest generation first."""
+        row = self.repository.load_car(car_id, fresh=self.shared)
+        if row is None:
+            return None
+        return self._detached(self.repository.load_lineage(row[10] or row[0]))
+    
+    @staticmethod
+    def _detached(rows) -> List[Car]:
+        # Listings get a private store: they do not fill the cache, and are
+        # safe to run off the event loop
+        rows = list(rows)
+        store = CarStore(len(rows))
+        return [store.restore(*row) for row in rows]
+    
+    def get_car(self, car_id: str, fresh: bool = False) -> Optional[Car]:
+        fresh = fresh or self.shared
+        car = None if fresh else self.cars.get(car_id)
+        if car is not None:
+            self.cars.touch(car_id)
+        else:
+            row = self.repository.load_car(car_id, fresh=fresh)
+            if row is not None:
+                car = self.cars.restore(*row)
+            elif car_id in self.cars:
+                del self.cars[car_id]
+        return car
+    
+    @traced('racing.what_if')
+    @counted('what_if')
+    def what_if(self, car_id: str, wallet_address: str, perturbations: Optional[List[List[int]]] = None, delta: int = 20) -> Tuple[bool, str, Optional[dict]]:
+        car = self.get_car(car_id)
         
-        if wallet_address not in self.garage:
-            self.garage[wallet_address] = []
-        self.garage[wallet_address].append(car_id)
+        if not car:
+            return False, "Car not found", None
         
-        return True, car, f"Car created successfully. Payment tx: {payment_result}"
+        if car.wallet_address != wallet_address:
+            return False, "You don't own this car", None
+        
+        if perturbations:
+            deltas = np.array(perturbations, dtype=np.int32)
+            subsets = None
+        else:
+            # Every attribute subset, encoded as a bitmask over the 10 attributes
+            subsets = np.arange(1 << NUM_ATTRIBUTES)
+            deltas = ((subsets[:, None] >> np.arange(NUM_ATTRIBUTES)) & 1) * delta
+        
+        speeds = car.speeds_with_deltas(deltas)
+        best = int(np.argmax(speeds))
+        
+        if subsets is not None:
+            best_indices = [i for i in range(NUM_ATTRIBUTES) if (best >> i) & 1]
+        else:
+            best_indices = [i for i in range(NUM_ATTRIBUTES) if deltas[best, i] != 0]
+        
+        return True, f"Evaluated {len(speeds)} scenarios", {
+            'car_id': car_id,
+            'base_speed': float(self.cars.compute_speeds(np.array([car.slot]))[0]),
+            'speeds': speeds.tolist(),
+            'subsets': subsets.tolist() if subsets is not None else None,
+            'best_index': best,
+            'best_speed': float(speeds[best]),
+            'best_attributes': [Car.ATTRIBUTE_NAMES[i] for i in best_indices]
+        }
     
-    def get_garage(self, wallet_address: str) -> List[Car]:
-        car_ids = self.garage.get(wallet_address, [])
-        return [self.cars[cid] for cid in car_ids if cid in self.cars]
+    def get_leaderboard(self, limit: int = 10, offset: int = 0) -> dict:
+        leaderboard = self._current_leaderboard()
+        return {
+            'total_cars': len(leaderboard),
+            'entries': leaderboard.top(limit, offset)
+        }
     
-    def get_car(self, car_id: str) -> Optional[Car]:
-        return self.cars.get(car_id)
+    def get_car_standing(self, car_id: str) -> Optional[dict]:
+        leaderboard = self._current_leaderboard()
+        if car_id not in leaderboard:
+            return None
+        return {
+            'car_id': car_id,
+            'rank': leaderboard.rank(car_id),
+            'speed': leaderboard.speed_of(car_id),
+            'percentile': leaderboard.percentile(car_id),
+            'total_cars': len(leaderboard)
+        }
     
-    def train_car(self, car_id: str, wallet_address: str, wallet_seed: str, attribute_indices: Optional[List[int]] = None) -> Tuple[bool, str, Optional[Car], Optional[dict]]:
-        base_car = self.cars.get(car_id)
+    @traced('racing.train_car')
+    @counted('train_car')
+    def train_car(self, car_id: str, wallet_address: str, wallet_seed: Optional[str] = None, attribute_indices: Optional[List[int]] = None, payment_tx: Optional[str] = None,
+                  new_car_id: Optional[str] = None) -> Tuple[bool, str, Optional[Car], Optional[dict]]:
+        base_car = self.get_car(car_id, fresh=True)
         
         if not base_car:
             return False, "Car not found", None, None
@@ -136,13 +300,45 @@ class RacingService:
         if base_car.wallet_address != wallet_address:
             return False, "You don't own this car", None, None
         
-        payment_success, payment_result = self._process_payment(wallet_seed, 1.0)
+        payment_success, payment_result = self._process_payment(wallet_seed, self.FEE_XRP, payment_tx)
         
         if not payment_success:
             return False, f"Payment failed: {payment_result}", None, None
         
-        new_car_id = self._generate_car_id(wallet_address)
-        new_car = Car(new_car_id, wallet_address)
+        for _ in range(self.MAX_CAS_RETRIES):
+            new_car, base_speed, changes = self._train_child(base_car, attribute_indices, new_car_id)
+            
+            if self.repository.commit_training(car_id, base_car.version, base_speed, new_car):
+                self.cars.versions[base_car.slot] += 1
+                self._rank(new_car)
+                break
+            
+            # Parent changed underneath us: discard the child and re-read
+            del self.cars[new_car.car_id]
+            base_car = self.get_car(car_id, fresh=True)
+            if not base_car or base_car.wallet_address != wallet_address:
+                return False, "Car was sold during training", None, None
+        else:
+            return False, "Car is busy with another request, please retry", None, None
+        
+        event_hub.publish(wallet_address, 'car.trained', {
+            **new_car.to_dict_safe(),
+            'speed': new_car.last_speed,
+            'changes': changes
+        })
+        
+        if attribute_indices:
+            trained_attrs = [new_car.ATTRIBUTE_NAMES[i] for i in attribute_indices if 0 <= i < 10]
+            attr_msg = f"Trained: {', '.join(trained_attrs)}"
+        else:
+            attr_msg = "Trained: All attributes"
+        
+        return True, f"New car created from training (Training #{new_car.training_count}). {attr_msg}. Payment tx: {payment_result}", new_car, changes
+    
+    def _train_child(self, base_car: Car, attribute_indices: Optional[List[int]],
+                     car_id: Optional[str] = None) -> Tuple[Car, float, dict]:
+        """A trained copy of ``base_car`` in the cache (not yet persisted), the base's speed and the changes."""
+        new_car = self.cars.add(car_id or self._generate_car_id(base_car.wallet_address), base_car.wallet_address, parent=base_car)
         
         new_car.flags = base_car.flags.copy()
         new_car.weights = base_car.weights.copy()
@@ -154,23 +350,37 @@ class RacingService:
         
         new_speed = new_car.calculate_speed()
         new_car.last_speed = new_speed
+        return new_car, base_speed, changes
+    
+    def check_ownership(self, car_id: str, wallet_address: str) -> Tuple[bool, str]:
+        car = self.get_car(car_id)
         
-        self.cars[new_car_id] = new_car
+        if not car:
+            return False, "Car not found"
         
-        if wallet_address not in self.garage:
-            self.garage[wallet_address] = []
-        self.garage[wallet_address].append(new_car_id)
+        if car.wallet_address != wallet_address:
+            return False, "You don't own this car"
         
-        if attribute_indices:
-            trained_attrs = [new_car.ATTRIBUTE_NAMES[i] for i in attribute_indices if 0 <= i < 10]
-            attr_msg = f"Trained: {', '.join(trained_attrs)}"
+        return True, "OK"
+    
+    @staticmethod
+    def _speed_change(previous_speed: Optional[float], current_speed: float) -> Tuple[bool, str]:
+        if previous_speed is None:
+            return False, f"Baseline speed: {current_speed:.2f} km/h"
+        
+        speed_diff = current_speed - previous_speed
+        # Vectorized and per-car speeds may differ in the last bits
+        if abs(speed_diff) < 0.005:
+            return False, f"Speed unchanged: {current_speed:.2f} km/h"
+        elif speed_diff > 0:
+            return True, f"🚀 Speed improved! {previous_speed:.2f} → {current_speed:.2f} km/h (+{speed_diff:.2f})"
         else:
-            attr_msg = "Trained: All attributes"
-        
-        return True, f"New car created from training (Training #{new_car.training_count}). {attr_msg}. Payment tx: {payment_result}", new_car, changes
+            return False, f"⚠️ Speed decreased: {previous_speed:.2f} → {current_speed:.2f} km/h ({speed_diff:.2f})"
     
+    @traced('racing.test_speed')
+    @counted('test_speed')
     def test_speed(self, car_id: str, wallet_address: str) -> Tuple[bool, bool, str, Optional[float]]:
-        car = self.cars.get(car_id)
+        car = self.get_car(car_id)
         
         if not car:
             return False, False, "Car not found", None
@@ -178,29 +388,66 @@ class RacingService:
         if car.wallet_address != wallet_address:
             return False, False, "You don't own this car", None
         
+        previous_speed = car.last_speed
         current_speed = car.calculate_speed()
+        improved, message = self._speed_change(previous_speed, current_speed)
         
-        if car.last_speed is None:
-            car.last_speed = current_speed
-            improved = False
-            message = f"Baseline speed: {current_speed:.2f} km/h"
-        else:
-            speed_diff = current_speed - car.last_speed
-            improved = speed_diff > 0
+        if not self._store_speeds([car], [current_speed])[0]:
+            return False, False, "Car was sold during the speed test", None
+        self._rank(car)
+        event_hub.publish(wallet_address, 'car.tested', {
+            'car_id': car_id, 'speed': current_speed, 'improved': improved
+        })
+        
+        return True, improved, message, current_speed
+    
+    @traced('racing.enter_race')
+    @counted('enter_race')
+    async def enter_race(self, car_id: str, wallet_address: str, wallet_seed: Optional[str] = None, payment_tx: Optional[str] = None,
+                         speed: Optional[float] = None) -> Tuple[bool, Optional[dict]]:
+        # Held from the checks until the result is recorded, so a car races once at a time
+        if car_id in self._racing or self.matchmaker.is_waiting(car_id):
+            return False, {'message': "Car is already entered in the next race"}
+        self._racing.add(car_id)
+        try:
+            success, entry = await self.offload(self._start_race, car_id, wallet_address, wallet_seed, payment_tx, speed)
+            if not success:
+                return False, entry
+            player_speed, payment_result = entry
             
-            if speed_diff > 0:
-                message = f"🚀 Speed improved! {car.last_speed:.2f} → {current_speed:.2f} km/h (+{speed_diff:.2f})"
-            elif speed_diff < 0:
-                message = f"⚠️ Speed decreased: {car.last_speed:.2f} → {current_speed:.2f} km/h ({speed_diff:.2f})"
-            else:
-                message = f"Speed unchanged: {current_speed:.2f} km/h"
+            with tracer.span('racing.matchmaking'):
+                heat = await self.matchmaker.enter(car_id, wallet_address, player_speed)
+            
+            race_ts = time.time()
+            race_id = f"RACE-{race_ts}-{random.randint(1000, 9999)}"
+            
+            race_result = {
+                'race_id': race_id,
+                'heat_id': heat['heat_id'],
+                'car_id': car_id,
+                'your_rank': heat['your_rank'],
+                'winner_car_id': heat['winner_car_id'],
+                'total_participants': heat['total_participants'],
+                'real_opponents': heat['real_opponents'],
+                'prize_awarded': heat['winner_car_id'] == car_id,
+                'timestamp': datetime.utcfromtimestamp(race_ts).isoformat(),
+                'payment_tx': payment_result
+            }
             
-            car.last_speed = current_speed
+            with tracer.span('racing.record'):
+                await self.offload(self.repository.append_race, race_result, wallet_address, race_ts)
+        finally:
+            self._racing.discard(car_id)
+        event_hub.publish(wallet_address, 'race.finished', {
+            key: value for key, value in race_result.items() if key != 'payment_tx'
+        })
         
-        return True, improved, message, current_speed
+        return True, race_result
     
-    def enter_race(self, car_id: str, wallet_address: str, wallet_seed: str) -> Tuple[bool, Optional[dict]]:
-        car = self.cars.get(car_id)
+    def _start_race(self, car_id: str, wallet_address: str, wallet_seed: Optional[str], payment_tx: Optional[str],
+                    speed: Optional[float]) -> Tuple[bool, Any]:
+        """Ownership, fee and stored speed before the lobby; on success ``(speed, payment result)``."""
+        car = self.get_car(car_id)
         
         if not car:
             return False, None
@@ -208,64 +455,313 @@ class RacingService:
         if car.wallet_address != wallet_address:
             return False, None
         
-        payment_success, payment_result = self._process_payment(wallet_seed, 1.0)
+        payment_success, payment_result = self._process_payment(wallet_seed, self.FEE_XRP, payment_tx)
         
         if not payment_success:
             return False, {'message': f"Payment failed: {payment_result}"}
         
-        num_opponents = random.randint(3, 7)
+        with tracer.span('racing.speed'):
+            player_speed = car.calculate_speed() if speed is None else speed
+            if not self._store_speeds([car], [player_speed])[0]:
+                return False, {'message': "Car was sold before the race started"}
         
-        player_speed = car.calculate_speed()
+        event_hub.publish(wallet_address, 'race.entered', {'car_id': car_id, 'speed': player_speed})
+        return True, (player_speed, payment_result)
+    
+    def get_race_history(self, car_id: Optional[str] = None, wallet_address: Optional[str] = None,
+                         cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[dict], Optional[str]]:
+        """One newest-first page of races and the cursor for the next page, if any."""
+        before = None
+        if cursor:
+            try:
+                ts, race_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+                before = (float(ts), str(race_id))
+            except Exception:
+                raise ValueError("Invalid cursor")
+        
+        rows = self.repository.load_races(car_id, wallet_address, before, limit + 1)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            ts, race_id, _ = rows[-1]
+            next_cursor = base64.urlsafe_b64encode(json.dumps([ts, race_id]).encode()).decode()
+        
+        return [json.loads(data) for _, _, data in rows], next_cursor
+    
+    # ----- encrypted engine -----
+    # Same actions with speeds from the encrypted engine. Plaintext bookkeeping
+    # (ids, ownership, lineage, payment) is shared; only the car's hidden
+    # state and speed come from the engine. New cars are made on the engine
+    # first, so a failed engine call charges nothing and saves no car.
+    
+    def _record_speed(self, car_id: str, speed: float) -> Optional[dict]:
+        car = self.get_car(car_id)
+        if not car or not self._store_speeds([car], [speed])[0]:
+            return None
+        self.leaderboard.update(car_id, car.wallet_address, speed)
+        result = {**car.to_dict_safe(), 'speed': speed}
+        event_hub.publish(car.wallet_address, 'car.tested', {'car_id': car_id, 'speed': speed, 'encrypted': True})
+        return result
+    
+    def _owned(self, car_id: str, wallet_address: str) -> Tuple[Optional[str], Optional[str], Optional[float]]:
+        """An error message, or None with the car's lineage id and last speed."""
+        car = self.get_car(car_id)
+        if not car:
+            return "Car not found", None, None
+        if car.wallet_address != wallet_address:
+            return "You don't own this car", None, None
+        return None, car.lineage_id, car.last_speed
+    
+    @traced('racing.fhe_create_car')
+    @counted('fhe_create_car')
+    async def create_car_encrypted(self, wallet_address: str, wallet_seed: Optional[str] = None) -> Tuple[bool, Optional[dict], str]:
+        car_id = self._generate_car_id(wallet_address)
+        speed = await self.engine.create(car_id)
+        success, _, message = await self.offload(self.create_car, wallet_address, wallet_seed, car_id=car_id)
+        if not success:
+            self.engine.discard(car_id, car_id)
+            return False, None, message
+        return True, await self.offload(self._record_speed, car_id, speed), message
+    
+    @traced('racing.fhe_train_car')
+    @counted('fhe_train_car')
+    async def train_car_encrypted(self, car_id: str, wallet_address: str, wallet_seed: Optional[str] = None,
+                                  attribute_indices: Optional[List[int]] = None) -> Tuple[bool, Optional[dict], str]:
+        error, lineage_id, _ = await self.offload(self._owned, car_id, wallet_address)
+        if error:
+            return False, None, error
         
-        opponents = []
-        for i in range(num_opponents):
-            ai_id = f"AI-{i+1}"
-            ai_speed = random.uniform(30, 70)
-            opponents.append({'id': ai_id, 'speed': ai_speed})
+        new_car_id = self._generate_car_id(wallet_address)
+        speed = await self.engine.train(lineage_id, car_id, new_car_id, attribute_indices)
+        success, message, _, _ = await self.offload(self.train_car, car_id, wallet_address, wallet_seed, attribute_indices,
+                                                    new_car_id=new_car_id)
+        if not success:
+            self.engine.discard(lineage_id, new_car_id)
+            return False, None, message
+        return True, await self.offload(self._record_speed, new_car_id, speed), message
+    
+    @traced('racing.fhe_test_speed')
+    @counted('fhe_test_speed')
+    async def test_speed_encrypted(self, car_id: str, wallet_address: str) -> Tuple[bool, Optional[dict], str]:
+        error, lineage_id, previous = await self.offload(self._owned, car_id, wallet_address)
+        if error:
+            return False, None, error
+        
+        speed = await self.engine.speed(lineage_id, car_id)
+        result = await self.offload(self._record_speed, car_id, speed)
+        if result is None:
+            return False, None, "Car not found"
+        result['improved'] = previous is not None and speed > previous
+        return True, result, f"Encrypted speed: {speed:.2f} km/h"
+    
+    @traced('racing.fhe_enter_race')
+    @counted('fhe_enter_race')
+    async def enter_race_encrypted(self, car_id: str, wallet_address: str, wallet_seed: Optional[str] = None) -> Tuple[bool, Optional[dict]]:
+        error, lineage_id, _ = await self.offload(self._owned, car_id, wallet_address)
+        if error:
+            return False, None
+        speed = await self.engine.speed(lineage_id, car_id)
+        return await self.enter_race(car_id, wallet_address, wallet_seed, speed=speed)
+    
+    @traced('racing.sell_car')
+    @counted('sell_car')
+    def sell_car(self, car_id: str, wallet_address: str) -> Tuple[bool, str, float]:
+        for _ in range(self.MAX_CAS_RETRIES):
+            car = self.get_car(car_id, fresh=True)
+            
+            if not car:
+                return False, "Car not found", 0.0
+            
+            if car.wallet_address != wallet_address:
+                return False, "You don't own this car", 0.0
+            
+            if self.repository.delete_car_if_version(car_id, wallet_address, car.version):
+                break
+        else:
+            return False, "Car is busy with another request, please retry", 0.0
         
-        all_racers = [{'id': car_id, 'speed': player_speed, 'is_player': True}]
-        all_racers.extend([{**opp, 'is_player': False} for opp in opponents])
+        lineage_id = car.lineage_id
+        del self.cars[car_id]
+        self.leaderboard.remove(car_id)
+        if self.engine is not None:
+            self.engine.discard(lineage_id, car_id)
         
-        all_racers.sort(key=lambda x: x['speed'], reverse=True)
+        refund_amount = self.REFUND_XRP
+        event_hub.publish(wallet_address, 'car.sold', {'car_id': car_id, 'refund_amount': refund_amount})
         
-        player_rank = next(i + 1 for i, r in enumerate(all_racers) if r.get('is_player'))
+        return True, f"Car {car_id} sold for {refund_amount} XRP", refund_amount
+    
+    # ----- batches -----
+    # Many cars of one wallet in one call. Every item is checked before
+    # anything is paid or written, valid items share one fee payment and one
+    # transaction, and each item gets its own result in request order.
+    
+    @traced('racing.train_cars')
+    @counted('train_cars')
+    def train_cars(self, wallet_address: str, items: List[Tuple[str, Optional[List[int]]]],
+                   wallet_seed: Optional[str] = None, payment_tx: Optional[str] = None) -> Tuple[bool, List[dict], str]:
+        """Train ``(car_id, attribute_indices)`` items; one fee of ``FEE_XRP`` per valid item."""
+        results: List[Optional[dict]] = [None] * len(items)
+        pending = []
+        for i, (car_id, _) in enumerate(items):
+            owned, message = self.check_ownership(car_id, wallet_address)
+            if owned:
+                pending.append(i)
+            else:
+                results[i] = {'car_id': car_id, 'success': False, 'message': message}
         
-        winner_id = all_racers[0]['id']
-        prize_awarded = winner_id == car_id
+        if not pending:
+            return False, results, "No car could be trained"
         
-        race_id = f"RACE-{datetime.utcnow().timestamp()}"
+        payment_success, payment_result = self._process_payment(wallet_seed, self.FEE_XRP * len(pending), payment_tx)
         
-        race_result = {
-            'race_id': race_id,
-            'car_id': car_id,
-            'your_rank': player_rank,
-            'winner_car_id': winner_id,
-            'total_participants': len(all_racers),
-            'prize_awarded': prize_awarded,
-            'timestamp': datetime.utcnow().isoformat(),
-            'payment_tx': payment_result
-        }
+        if not payment_success:
+            message = f"Payment failed: {payment_result}"
+            for i in pending:
+                results[i] = {'car_id': items[i][0], 'success': False, 'message': message}
+            return False, results, message
+        
+        for attempt in range(self.MAX_CAS_RETRIES):
+            attempts = []
+            # A car named again in the batch is trained again from the same
+            # parent, each time expecting the version the previous one leaves
+            repeats: Dict[str, int] = {}
+            for i in pending:
+                car_id, attribute_indices = items[i]
+                base_car = self.get_car(car_id, fresh=attempt > 0 and car_id not in repeats)
+                if not base_car or base_car.wallet_address != wallet_address:
+                    results[i] = {'car_id': car_id, 'success': False, 'message': "Car was sold during training"}
+                    continue
+                new_car, base_speed, changes = self._train_child(base_car, attribute_indices)
+                attempts.append((i, base_car, base_car.version + repeats.get(car_id, 0), base_speed, new_car, changes))
+                repeats[car_id] = repeats.get(car_id, 0) + 1
+            
+            committed = self.repository.commit_trainings([
+                (base_car.car_id, version, base_speed, new_car) for _, base_car, version, base_speed, new_car, _ in attempts
+            ])
+            
+            pending = []
+            for (i, base_car, _, _, new_car, changes), ok in zip(attempts, committed):
+                if not ok:
+                    # Parent changed underneath us, possibly by an earlier item of this batch
+                    del self.cars[new_car.car_id]
+                    pending.append(i)
+                    continue
+                self.cars.versions[base_car.slot] += 1
+                self._rank(new_car)
+                event_hub.publish(wallet_address, 'car.trained', {
+                    **new_car.to_dict_safe(),
+                    'speed': new_car.last_speed,
+                    'changes': changes
+                })
+                results[i] = {
+                    'car_id': base_car.car_id,
+                    'success': True,
+                    'message': f"New car created from training (Training #{new_car.training_count})",
+                    'new_car_id': new_car.car_id,
+                    'training_count': new_car.training_count,
+                    'trained_attributes': list(changes),
+                    'speed': new_car.last_speed
+                }
+            if not pending:
+                break
         
-        self.races.append(race_result)
+        for i in pending:
+            results[i] = {'car_id': items[i][0], 'success': False, 'message': "Car is busy with another request, please retry"}
         
-        return True, race_result
+        trained = sum(1 for result in results if result['success'])
+        return trained > 0, results, f"Trained {trained} of {len(items)} cars. Payment tx: {payment_result}"
     
-    def sell_car(self, car_id: str, wallet_address: str) -> Tuple[bool, str, float]:
-        car = self.cars.get(car_id)
-        
-        if not car:
-            return False, "Car not found", 0.0
-        
-        if car.wallet_address != wallet_address:
-            return False, "You don't own this car", 0.0
-        
-        if wallet_address in self.garage and car_id in self.garage[wallet_address]:
-            self.garage[wallet_address].remove(car_id)
-        
-        del self.cars[car_id]
+    @traced('racing.test_speeds')
+    @counted('test_speeds')
+    def test_speeds(self, wallet_address: str, car_ids: List[str]) -> Tuple[bool, List[dict]]:
+        """Speed-test many cars in one vectorized pass."""
+        results: List[Optional[dict]] = [None] * len(car_ids)
+        owned = []
+        for i, car_id in enumerate(car_ids):
+            car = self.get_car(car_id)
+            if not car:
+                results[i] = {'car_id': car_id, 'success': False, 'message': "Car not found"}
+            elif car.wallet_address != wallet_address:
+                results[i] = {'car_id': car_id, 'success': False, 'message': "You don't own this car"}
+            else:
+                owned.append((i, car))
+        
+        if owned:
+            speeds = self.cars.compute_speeds(np.array([car.slot for _, car in owned])).tolist()
+            changes = [self._speed_change(car.last_speed, speed) for (_, car), speed in zip(owned, speeds)]
+            stored = self._store_speeds([car for _, car in owned], speeds)
+            for (i, car), speed, (improved, message), ok in zip(owned, speeds, changes, stored):
+                if not ok:
+                    results[i] = {'car_id': car.car_id, 'success': False, 'message': "Car was sold during the speed test"}
+                    continue
+                self.leaderboard.update(car.car_id, wallet_address, speed)
+                event_hub.publish(wallet_address, 'car.tested', {
+                    'car_id': car.car_id, 'speed': speed, 'improved': improved
+                })
+                results[i] = {'car_id': car.car_id, 'success': True, 'message': message, 'improved': improved, 'speed': speed}
+        
+        return any(result['success'] for result in results), results
+    
+    @traced('racing.sell_cars')
+    @counted('sell_cars')
+    def sell_cars(self, wallet_address: str, car_ids: List[str]) -> Tuple[bool, List[dict], float]:
+        """Sell many cars in one transaction; returns the total refund."""
+        results: List[Optional[dict]] = [None] * len(car_ids)
+        pending = list(range(len(car_ids)))
+        for attempt in range(self.MAX_CAS_RETRIES):
+            attempts = []
+            for i in pending:
+                car = self.get_car(car_ids[i], fresh=attempt > 0)
+                if not car:
+                    results[i] = {'car_id': car_ids[i], 'success': False, 'message': "Car not found"}
+                elif car.wallet_address != wallet_address:
+                    results[i] = {'car_id': car_ids[i], 'success': False, 'message': "You don't own this car"}
+                else:
+                    attempts.append((i, car.car_id, car.lineage_id, car.version))
+            
+            deleted = self.repository.delete_cars_if_version([
+                (car_id, wallet_address, version) for _, car_id, _, version in attempts
+            ])
+            
+            pending = []
+            for (i, car_id, lineage_id, _), ok in zip(attempts, deleted):
+                if not ok:
+                    pending.append(i)
+                    continue
+                if car_id in self.cars:
+                    del self.cars[car_id]
+                self.leaderboard.remove(car_id)
+                if self.engine is not None:
+                    self.engine.discard(lineage_id, car_id)
+                event_hub.publish(wallet_address, 'car.sold', {'car_id': car_id, 'refund_amount': self.REFUND_XRP})
+                results[i] = {
+                    'car_id': car_id,
+                    'success': True,
+                    'message': f"Car {car_id} sold for {self.REFUND_XRP} XRP",
+                    'refund_amount': self.REFUND_XRP
+                }
+            if not pending:
+                break
         
-        refund_amount = 0.5
+        for i in pending:
+            results[i] = {'car_id': car_ids[i], 'success': False, 'message': "Car is busy with another request, please retry"}
         
-        return True, f"Car {car_id} sold for {refund_amount} XRP", refund_amount
+        refund_amount = sum(result.get('refund_amount', 0.0) for result in results)
+        return refund_amount > 0, results, refund_amount
 
-racing_service = RacingService()
+racing_service = RacingService(RacingRepository(
+    settings.RACING_DB_PATH,
+    pool_size=settings.DB_POOL_SIZE,
+    batch_size=settings.DB_BATCH_SIZE,
+    flush_interval=settings.DB_FLUSH_INTERVAL,
+    write_through=settings.WORKERS > 1,
+    race_retention=settings.RACE_RETENTION_DAYS * 86400 if settings.RACE_RETENTION_DAYS > 0 else None,
+    race_max_rows=settings.RACE_MAX_ROWS or None,
+    compact_interval=settings.RACE_COMPACT_INTERVAL
+), shared=settings.WORKERS > 1, leaderboard_refresh=settings.LEADERBOARD_REFRESH_INTERVAL, matchmaking={
+    'lobby_window': settings.MATCH_LOBBY_WINDOW,
+    'band': settings.MATCH_SPEED_BAND,
+    'min_racers': settings.MATCH_MIN_RACERS,
+    'max_racers': settings.MATCH_MAX_RACERS
+}, engine=fhe_engine if fhe_engine.enabled else None, cache_size=settings.CAR_CACHE_SIZE)
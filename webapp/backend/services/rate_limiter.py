@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+from services.metrics import RATE_LIMIT_DECISIONS
+
+# Rough relative cost of each operation in tokens; a plain speed test is 1
+OPERATION_COSTS: Dict[str, float] = {
+    'test_speed': 1.0,
+    'what_if': 2.0,
+    'create_car': 2.0,
+    'train_car': 2.0,
+    'enter_race': 3.0,
+    'fhe_create_car': 20.0,
+    'fhe_train_car': 20.0,
+    'fhe_test_speed': 10.0,
+    'fhe_enter_race': 10.0,
+}
+
+class TokenBucket:
+    """Holds up to ``capacity`` tokens, refilled continuously at ``rate`` per second.
+
+    A cost above ``capacity`` is admitted once the bucket is full and leaves
+    it in debt, so a large batch still pays for every item.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until ``cost`` tokens are available; 0 if they are now."""
+        self._refill(now)
+        missing = min(cost, self.capacity) - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, cost: float) -> None:
+        self.tokens -= cost
+
+class RateLimiter:
+    """Per-wallet and global token buckets charged by operation cost.
+
+    A request is admitted only if both its wallet's bucket and the global
+    bucket hold enough tokens, and only then is either charged, so a
+    rejected request costs nothing. Rejections say how long to wait.
+    Wallet buckets are kept for the ``max_wallets`` most recently seen
+    wallets.
+
+    Buckets live in each worker process, and connections are spread across
+    ``workers`` processes, so each holds that share of the configured rates
+    and bursts and the whole server admits about what was configured.
+    """
+
+    def __init__(self, wallet_rate: float = 2.0, wallet_burst: float = 20.0,
+                 global_rate: float = 500.0, global_burst: float = 1000.0,
+                 costs: Optional[Dict[str, float]] = None, max_wallets: int = 100000,
+                 enabled: bool = True, workers: int = 1):
+        self.workers = max(1, workers)
+        self.wallet_rate = wallet_rate / self.workers
+        self.wallet_burst = wallet_burst / self.workers
+        self.costs = costs or OPERATION_COSTS
+        self.max_wallets = max_wallets
+        self.enabled = enabled
+
+        self._global = TokenBucket(global_rate / self.workers, global_burst / self.workers)
+        self._wallets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _wallet_bucket(self, wallet_address: str) -> TokenBucket:
+        bucket = self._wallets.get(wallet_address)
+        if bucket is None:
+            bucket = self._wallets[wallet_address] = TokenBucket(self.wallet_rate, self.wallet_burst)
+            if len(self._wallets) > self.max_wallets:
+                self._wallets.popitem(last=False)
+        else:
+            self._wallets.move_to_end(wallet_address)
+        return bucket
+
+    def _count(self, action: str, outcome: str) -> None:
+        counters = self._counters.setdefault(action, {'admitted': 0, 'rejected_wallet': 0, 'rejected_global': 0})
+        counters[outcome] += 1
+        RATE_LIMIT_DECISIONS.labels(action, outcome).inc()
+
+    def acquire(self, action: str, wallet_address: str, units: int = 1) -> Tuple[bool, float]:
+        """Charge ``units`` of ``action`` to ``wallet_address``; returns ``(admitted, retry_after_seconds)``."""
+        if not self.enabled:
+            return True, 0.0
+
+        cost = self.costs.get(action, 1.0) * units
+        now = time.monotonic()
+        bucket = self._wallet_bucket(wallet_address)
+
+        wait = bucket.wait_time(cost, now)
+        if wait > 0:
+            self._count(action, 'rejected_wallet')
+            return False, wait
+        wait = self._global.wait_time(cost, now)
+        if wait > 0:
+            self._count(action, 'rejected_global')
+            return False, wait
+
+        bucket.take(cost)
+        self._global.take(cost)
+        self._count(action, 'admitted')
+        return True, 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'workers': self.workers,
+            'wallet_rate': self.wallet_rate,
+            'wallet_burst': self.wallet_burst,
+            'global_rate': self._global.rate,
+            'global_burst': self._global.capacity,
+            'tracked_wallets': len(self._wallets),
+            'costs': dict(self.costs),
+            'operations': {action: dict(counters) for action, counters in self._counters.items()},
+        }
+
+rate_limiter = RateLimiter(
+    wallet_rate=settings.RATE_LIMIT_WALLET_RATE,
+    wallet_burst=settings.RATE_LIMIT_WALLET_BURST,
+    global_rate=settings.RATE_LIMIT_GLOBAL_RATE,
+    global_burst=settings.RATE_LIMIT_GLOBAL_BURST,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    workers=settings.WORKERS
+)
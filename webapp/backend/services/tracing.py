@@ -0,0 +1,242 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'sampled', 'start', 'duration_ms',
+                 'attributes', 'error', '_started')
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.sampled = sampled
+        self.start = time.time()
+        self.duration_ms: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.duration_ms,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+class JsonLinesExporter:
+    """Appends finished spans to a JSON-lines file from a background thread.
+
+    Spans are queued without blocking; when the queue is full they are
+    dropped and counted. The file is rotated to ``<path>.1`` once it grows
+    past ``max_bytes``.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_queue: int = 10000,
+                 max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self) -> None:
+        running = True
+        while running:
+            batch: List[Dict[str, Any]] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(span, default=str) + "\n" for span in batch))
+        except OSError as e:
+            logger.warning(f"Could not write {len(batch)} trace spans: {str(e)}")
+
+class Tracer:
+    """Request-scoped spans carried in a context variable.
+
+    Every request gets a trace id, returned in the ``X-Trace-Id`` header;
+    ``sample_rate`` of them (or those arriving with a sampled W3C
+    ``traceparent``) record their spans to the exporter. Unsampled and
+    untraced code paths only pay for a context variable lookup.
+    """
+
+    def __init__(self, exporter: JsonLinesExporter, sample_rate: float = 0.01, enabled: bool = True):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+
+    def start(self) -> None:
+        if self.enabled:
+            self.exporter.start()
+
+    def stop(self) -> None:
+        self.exporter.stop()
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None) -> Span:
+        trace_id, parent_id, sampled = None, None, None
+        if traceparent:
+            parts = traceparent.split('-')
+            if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+                trace_id, parent_id, sampled = parts[1], parts[2], parts[3] == '01'
+        if sampled is None:
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return Span(trace_id or os.urandom(16).hex(), parent_id, name, sampled)
+
+    def end(self, span: Span) -> None:
+        span.finish()
+        if span.sampled:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield None
+            return
+
+        span = Span(parent.trace_id, parent.span_id, name, True)
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = str(e) or type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+def annotate(**attributes) -> None:
+    """Add attributes to the current span if it is being recorded."""
+    span = _current_span.get()
+    if span is not None and span.sampled:
+        span.attributes.update(attributes)
+
+def traced(name: str) -> Callable:
+    """Record calls of a sync or async function as child spans of the current trace."""
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                parent = _current_span.get()
+                if parent is None or not parent.sampled:
+                    return await fn(*args, **kwargs)
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None or not parent.sampled:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per request and returning its trace id."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope['headers']:
+            if key == b'traceparent':
+                traceparent = value.decode('latin-1')
+                break
+        root = tracer.start_trace(scope['method'], traceparent)
+        root.set(path=scope['path'])
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                root.set(status=message['status'])
+                message['headers'] = list(message.get('headers', [])) + [(b'x-trace-id', root.trace_id.encode())]
+            await send(message)
+
+        token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = str(e) or type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get('route')
+            root.name = f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+            tracer.end(root)
+
+tracer = Tracer(
+    JsonLinesExporter(settings.TRACE_EXPORT_PATH),
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    enabled=settings.TRACING_ENABLED
+)
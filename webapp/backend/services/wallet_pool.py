@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.wallet import generate_faucet_wallet
+from xrpl.wallet import Wallet
+from config import settings
+from services.ledger_simulator import SimulatedLedgerClient
+from services.metrics import WALLET_POOL_AVAILABLE
+from services.xrpl_client import ledger_client
+
+logger = logging.getLogger(__name__)
+
+async def fund_new_wallet(client: AsyncJsonRpcClient) -> Wallet:
+    """Create a wallet and fund it from the faucet, waiting until it is funded."""
+    if isinstance(client, SimulatedLedgerClient):
+        wallet = Wallet.create()
+        await client.fund(wallet.address)
+        return wallet
+    return await generate_faucet_wallet(client)
+
+class WalletPool:
+    """Keeps funded wallets ready so wallet creation never waits on the faucet.
+
+    When the pool drops below ``low_watermark`` a background task refills it
+    up to ``high_watermark``, with at most ``concurrency`` faucet requests in
+    flight and exponential backoff while the faucet is failing. Pooled wallets
+    live in this process only and are lost on restart.
+    """
+
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, low_watermark: int = 5,
+                 high_watermark: int = 20, concurrency: int = 2):
+        self.client = client
+        self.low_watermark = low_watermark
+        self.high_watermark = max(high_watermark, low_watermark)
+        self.concurrency = concurrency
+
+        self._wallets: Deque[Wallet] = deque()
+        self._refill_needed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.funded = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.high_watermark > 0
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._refill_needed = asyncio.Event()
+            self._refill_needed.set()
+            self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ----- public API -----
+
+    def take(self) -> Optional[Wallet]:
+        """Pop a funded wallet, or None if the pool is empty."""
+        wallet = self._wallets.popleft() if self._wallets else None
+        WALLET_POOL_AVAILABLE.set(len(self._wallets))
+        if len(self._wallets) < self.low_watermark and self._refill_needed is not None:
+            self._refill_needed.set()
+        return wallet
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'available': len(self._wallets),
+            'low_watermark': self.low_watermark,
+            'high_watermark': self.high_watermark,
+            'funded': self.funded,
+            'failures': self.failures,
+        }
+
+    # ----- refilling -----
+
+    async def _refill_loop(self) -> None:
+        backoff = 1.0
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+
+            while len(self._wallets) < self.high_watermark:
+                batch = min(self.concurrency, self.high_watermark - len(self._wallets))
+                results = await asyncio.gather(
+                    *(fund_new_wallet(self.client) for _ in range(batch)),
+                    return_exceptions=True
+                )
+                wallets = [w for w in results if isinstance(w, Wallet)]
+                self._wallets.extend(wallets)
+                WALLET_POOL_AVAILABLE.set(len(self._wallets))
+                self.funded += len(wallets)
+                self.failures += batch - len(wallets)
+
+                if len(wallets) < batch:
+                    error = next(r for r in results if not isinstance(r, Wallet))
+                    logger.warning(f"Wallet pool refill failed ({len(self._wallets)} available): {error}")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 60.0)
+                else:
+                    backoff = 1.0
+
+wallet_pool = WalletPool(
+    low_watermark=settings.WALLET_POOL_LOW,
+    high_watermark=settings.WALLET_POOL_HIGH,
+    concurrency=settings.WALLET_POOL_CONCURRENCY
+)
@@ -1,26 +1,39 @@
+import logging
 import xrpl
-from xrpl.clients import JsonRpcClient
+from xrpl.asyncio.clients import AsyncJsonRpcClient
 from xrpl.wallet import Wallet
 from xrpl.utils import drops_to_xrp
 from typing import Dict, Any
-from config import settings
+from services.xrpl_client import ledger_client
+from services.account_cache import AccountCache, account_cache
+from services.wallet_pool import WalletPool, fund_new_wallet, wallet_pool
+from services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+class WalletFundingError(Exception):
+    """The pool was empty and the faucet could not fund a new wallet; safe to retry."""
+    pass
 
 class WalletService:
     
-    def __init__(self):
-        self.testnet_url = settings.TESTNET_URL
+    def __init__(self, client: AsyncJsonRpcClient = ledger_client, cache: AccountCache = account_cache, pool: WalletPool = wallet_pool):
+        self.client = client
+        self.cache = cache
+        self.pool = pool
     
-    def create_wallet(self, seed: str = "") -> Dict[str, str]:
-        client = JsonRpcClient(self.testnet_url)
-        
+    @traced('wallet.create')
+    async def create_wallet(self, seed: str = "") -> Dict[str, str]:
         if seed == "":
-            new_wallet = Wallet.generate()
+            new_wallet = self.pool.take()
             
-            try:
-                funded_wallet = xrpl.wallet.generate_faucet_wallet(client)
-                new_wallet = funded_wallet
-            except Exception as e:
-                print(f"Faucet error: {e}")
+            if new_wallet is None:
+                # Pool drained: fund this one inline; an unfunded wallet is never handed out
+                try:
+                    new_wallet = await fund_new_wallet(self.client)
+                except Exception as e:
+                    logger.warning(f"Faucet error while creating a wallet: {e}")
+                    raise WalletFundingError("Could not fund a new wallet, please retry") from e
         else:
             new_wallet = Wallet.from_seed(seed)
         
@@ -30,16 +43,10 @@ class WalletService:
             "public_key": new_wallet.public_key
         }
     
-    def get_balance(self, address: str) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        
-        acct_info = xrpl.models.requests.AccountInfo(
-            account=address,
-            ledger_index="validated"
-        )
-        
-        response = client.request(acct_info)
-        balance_drops = response.result['account_data']['Balance']
+    @traced('wallet.balance')
+    async def get_balance(self, address: str) -> Dict[str, Any]:
+        account_data = await self.cache.get(address)
+        balance_drops = account_data['Balance']
         balance_xrp = drops_to_xrp(balance_drops)
         
         return {
@@ -48,13 +55,6 @@ class WalletService:
             "balance_drops": balance_drops
         }
     
-    def get_account_info(self, address: str) -> Dict[str, Any]:
-        client = JsonRpcClient(self.testnet_url)
-        
-        acct_info = xrpl.models.requests.AccountInfo(
-            account=address,
-            ledger_index="validated"
-        )
-        
-        response = client.request(acct_info)
-        return response.result.get('account_data', {})
+    @traced('wallet.account_info')
+    async def get_account_info(self, address: str) -> Dict[str, Any]:
+        return await self.cache.get(address)
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from json import JSONDecodeError
+from typing import Optional
+import httpx
+from xrpl.asyncio.clients import AsyncJsonRpcClient
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.exceptions import XRPLRequestFailureException
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.models.requests.request import Request
+from xrpl.models.response import Response
+from config import settings
+from services.ledger_simulator import LedgerSimulator, SimulatedLedgerClient
+from services.metrics import record_ledger_call
+from services.tracing import annotate, traced
+
+class PooledJsonRpcClient(AsyncJsonRpcClient):
+    """Async XRPL JSON-RPC client sharing one keep-alive HTTP connection pool.
+
+    xrpl-py's AsyncJsonRpcClient opens a fresh HTTP client per request; this
+    one reuses pooled connections and caps the number of in-flight ledger
+    calls so a slow ledger cannot pile up unbounded requests.
+    """
+
+    def __init__(self, url: str, timeout: float = REQUEST_TIMEOUT,
+                 max_connections: int = 20, max_concurrency: int = 10):
+        super().__init__(url)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> None:
+        # Pool and semaphore belong to the running loop; rebuild them if the
+        # client is reused from a different loop (e.g. test clients).
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._loop is not loop:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+
+    @traced('ledger.request')
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        self._bind()
+        method = request.method.value
+        annotate(method=method)
+        started = time.perf_counter()
+        try:
+            async with self._semaphore:
+                response = await self._http.post(
+                    self.url,
+                    json=request_to_json_rpc(request)
+                )
+        except Exception as e:
+            record_ledger_call(method, started, type(e).__name__)
+            raise
+        try:
+            result = json_to_response(response.json())
+        except JSONDecodeError:
+            record_ledger_call(method, started, f"http_{response.status_code}")
+            raise XRPLRequestFailureException({
+                "error": response.status_code,
+                "error_message": response.text,
+            })
+        record_ledger_call(method, started, None if result.is_successful() else result.result.get('error', 'unknown'))
+        return result
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+if settings.NETWORK == "simulator":
+    ledger_client = SimulatedLedgerClient(
+        LedgerSimulator(
+            close_interval=settings.SIMULATOR_CLOSE_INTERVAL,
+            failure_rate=settings.SIMULATOR_FAILURE_RATE,
+            drop_rate=settings.SIMULATOR_DROP_RATE,
+            seed=settings.SIMULATOR_SEED
+        ),
+        latency=settings.SIMULATOR_LATENCY,
+        jitter=settings.SIMULATOR_JITTER
+    )
+else:
+    ledger_client = PooledJsonRpcClient(
+        settings.TESTNET_URL,
+        timeout=settings.LEDGER_TIMEOUT,
+        max_connections=settings.LEDGER_MAX_CONNECTIONS,
+        max_concurrency=settings.LEDGER_MAX_CONCURRENCY
+    )
@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+# The service modules build their singletons from settings on import; keep
+# them off the network and away from the real database
+os.environ["NETWORK"] = "simulator"
+os.environ["RACING_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="racing-tests-"), "racing.db")
+os.environ["TRACING_ENABLED"] = "False"
+os.environ["WALLET_POOL_HIGH"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from services.persistence import RacingRepository
+from services.racing_service import RacingService
+
+WALLET = "rTESTWALLET1111111111111111111111"
+
+@pytest.fixture
+def make_service(tmp_path):
+    """Build RacingServices over one database file, as separate worker processes would."""
+    services = []
+
+    def make(shared: bool = True, engine=None) -> RacingService:
+        repository = RacingRepository(str(tmp_path / "racing.db"), write_through=shared)
+        service = RacingService(repository, shared=shared, matchmaking={'lobby_window': 0},
+                                engine=engine)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.close()
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from conftest import WALLET
+
+from services import account_cache as account_cache_module
+from services.account_cache import AccountCache
+
+
+class Response:
+    def __init__(self, result):
+        self.result = result
+
+    def is_successful(self):
+        return True
+
+
+class FakeClient:
+    """Answers account_info with a balance that goes up on every request."""
+
+    def __init__(self):
+        self.requests = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def request(self, request):
+        self.requests += 1
+        await self.release.wait()
+        return Response({'account_data': {'Account': request.account, 'Balance': str(self.requests)}})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(account_cache_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_concurrent_misses_share_one_request(clock):
+    async def scenario():
+        client = FakeClient()
+        client.release.clear()
+        cache = AccountCache(client, stream_enabled=False)
+
+        pending = [asyncio.ensure_future(cache.get(WALLET)) for _ in range(5)]
+        await asyncio.sleep(0)
+        client.release.set()
+        results = await asyncio.gather(*pending)
+
+        assert client.requests == 1
+        assert {result['Balance'] for result in results} == {'1'}
+        assert (await cache.get(WALLET))['Balance'] == '1' and client.requests == 1
+        assert cache.stats()['inflight'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_entries_expire_after_ttl_without_a_stream(clock):
+    async def scenario():
+        client = FakeClient()
+        cache = AccountCache(client, ttl=5, stream_enabled=False)
+
+        await cache.get(WALLET)
+        clock[0] += 4.9
+        assert (await cache.get(WALLET))['Balance'] == '1'
+        clock[0] += 0.2
+        assert (await cache.get(WALLET))['Balance'] == '2'
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_forces_a_fresh_read(clock):
+    async def scenario():
+        client = FakeClient()
+        cache = AccountCache(client, stream_enabled=False)
+
+        await cache.get(WALLET)
+        cache.invalidate(WALLET)
+        assert (await cache.get(WALLET))['Balance'] == '2'
+
+    asyncio.run(scenario())
+
+
+def test_result_of_a_fetch_invalidated_midway_is_not_cached(clock):
+    async def scenario():
+        client = FakeClient()
+        client.release.clear()
+        cache = AccountCache(client, stream_enabled=False)
+
+        pending = asyncio.ensure_future(cache.get(WALLET))
+        await asyncio.sleep(0)
+        cache.invalidate(WALLET)
+        client.release.set()
+        assert (await pending)['Balance'] == '1'
+
+        assert (await cache.get(WALLET))['Balance'] == '2'
+
+    asyncio.run(scenario())
+
+
+def test_validated_transactions_update_or_drop_cached_accounts(clock):
+    async def scenario():
+        client = FakeClient()
+        cache = AccountCache(client, stream_enabled=False)
+        await cache.get(WALLET)
+        await cache.get("rOTHER")
+
+        cache._apply_transaction({
+            'transaction': {'hash': "ABC"},
+            'meta': {'AffectedNodes': [
+                {'ModifiedNode': {'LedgerEntryType': 'AccountRoot', 'FinalFields': {'Account': WALLET, 'Balance': '99'}}},
+                {'DeletedNode': {'LedgerEntryType': 'AccountRoot', 'FinalFields': {'Account': "rOTHER"}}},
+            ]}
+        })
+
+        cached = await cache.get(WALLET)
+        assert cached['Balance'] == '99' and cached['PreviousTxnID'] == "ABC"
+        assert client.requests == 2
+        assert (await cache.get("rOTHER"))['Balance'] == '3'
+
+    asyncio.run(scenario())
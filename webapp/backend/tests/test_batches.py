@@ -0,0 +1,27 @@
+from conftest import WALLET
+
+
+def test_car_repeated_in_a_batch_is_trained_every_time(make_service):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+    version = car.version
+    charges = []
+    service._process_payment = lambda seed, amount, tx=None: charges.append(amount) or (True, "TX")
+
+    success, results, message = service.train_cars(WALLET, [(car.car_id, None)] * 5)
+
+    assert success and message.startswith("Trained 5 of 5 cars")
+    assert charges == [5 * service.FEE_XRP]
+    assert len({result['new_car_id'] for result in results}) == 5
+    assert service.get_car(car.car_id, fresh=True).version == version + 5
+
+
+def test_failed_payment_keeps_ownership_errors(make_service):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+    service._process_payment = lambda *args: (False, "no funds")
+
+    success, results, _ = service.train_cars(WALLET, [(car.car_id, None), ("CAR-missing", None)])
+
+    assert not success
+    assert [result['message'] for result in results] == ["Payment failed: no funds", "Car not found"]
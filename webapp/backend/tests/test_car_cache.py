@@ -0,0 +1,35 @@
+from services.car_store import CarStore
+from conftest import WALLET
+
+def test_store_evicts_least_recently_used():
+    store = CarStore(max_cars=2)
+    store.add("CAR-a", WALLET)
+    store.add("CAR-b", WALLET)
+    store.touch("CAR-a")
+    store.add("CAR-c", WALLET)
+
+    assert set(store) == {"CAR-a", "CAR-c"}
+    assert store["CAR-c"].wallet_address == WALLET
+
+def test_listings_do_not_fill_the_cache(make_service):
+    service = make_service(shared=False)
+    car_ids = [service.create_car(WALLET)[1].car_id for _ in range(3)]
+    service.cars = CarStore()
+
+    cars, _ = service.get_garage(WALLET)
+    lineage = service.get_lineage(car_ids[0])
+
+    assert [car.car_id for car in cars] == car_ids
+    assert [car.car_id for car in lineage] == car_ids[:1]
+    assert len(service.cars) == 0
+
+def test_cache_stays_bounded(make_service):
+    service = make_service()
+    service.cars = CarStore(max_cars=2)
+    car_ids = [service.create_car(WALLET)[1].car_id for _ in range(5)]
+
+    for car_id in car_ids:
+        assert service.test_speed(car_id, WALLET)[0]
+
+    assert len(service.cars) == 2
+    assert service.get_car(car_ids[0]).car_id == car_ids[0]
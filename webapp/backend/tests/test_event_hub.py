@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from conftest import WALLET
+
+from services.event_hub import EventHub, EventRelay, SubscriberLimitError
+
+
+def test_events_reach_only_the_wallets_streams():
+    async def scenario():
+        hub = EventHub(queue_size=4)
+        mine, other = hub.subscribe(WALLET), hub.subscribe("rOTHER")
+        hub.publish(WALLET, 'car.created', {'car_id': "CAR-1"})
+        hub.publish(WALLET, 'car.sold', {'car_id': "CAR-1"})
+
+        assert [mine.queue.get_nowait()['event'] for _ in range(2)] == ['car.created', 'car.sold']
+        assert other.queue.empty()
+        hub.unsubscribe(mine)
+        hub.publish(WALLET, 'car.created', {'car_id': "CAR-2"})
+        assert mine.queue.empty() and hub.stats()['subscribers'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_stream_that_falls_behind_gets_lagged_and_is_dropped():
+    async def scenario():
+        hub = EventHub(queue_size=3)
+        subscription = hub.subscribe(WALLET)
+        for i in range(4):
+            hub.publish(WALLET, 'car.tested', {'speed': i})
+
+        assert subscription.closed and hub.subscriber_count == 0
+        assert subscription.queue.qsize() == 1
+        assert subscription.queue.get_nowait()['event'] == 'lagged'
+        assert hub.stats()['dropped'] == 1 and hub.stats()['published'] == 3
+
+    asyncio.run(scenario())
+
+
+def test_subscribers_are_capped():
+    async def scenario():
+        hub = EventHub(max_subscribers=2)
+        first = hub.subscribe(WALLET)
+        hub.subscribe(WALLET)
+        with pytest.raises(SubscriberLimitError):
+            hub.subscribe("rOTHER")
+        hub.unsubscribe(first)
+        hub.subscribe("rOTHER")
+
+    asyncio.run(scenario())
+
+
+def test_relay_passes_events_between_workers(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "events.db")
+        first = EventHub(relay=EventRelay(path, interval=0.01))
+        second = EventHub(relay=EventRelay(path, interval=0.01))
+        await first.start()
+        await second.start()
+        try:
+            here, there = first.subscribe(WALLET), second.subscribe(WALLET)
+            first.publish(WALLET, 'race.finished', {'race_id': "RACE-1"})
+
+            message = await asyncio.wait_for(there.queue.get(), timeout=2)
+            assert message['event'] == 'race.finished' and message['data'] == {'race_id': "RACE-1"}
+            assert here.queue.get_nowait()['event'] == 'race.finished'
+            await asyncio.sleep(0.05)
+            # Not delivered twice on the worker that published it
+            assert here.queue.empty() and there.queue.empty()
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(scenario())
+
+
+def test_relay_does_not_replay_events_from_before_it_started(tmp_path):
+    path = str(tmp_path / "events.db")
+    old = EventRelay(path)
+    old.open()
+    old.send(WALLET, 'car.created', {})
+    old.exchange()
+
+    late = EventRelay(path)
+    late.open()
+    old.send(WALLET, 'car.sold', {})
+    old.exchange()
+
+    assert late.exchange() == [(WALLET, 'car.sold', {})]
+    old.close()
+    late.close()
@@ -0,0 +1,47 @@
+import asyncio
+
+from conftest import WALLET
+from xrpl.wallet import Wallet
+from services.fee_verifier import FeeVerifier
+from services.ledger_simulator import LedgerSimulator, SimulatedLedgerClient
+from services.payment_pipeline import PaymentPipeline
+from services.racing_service import RacingService
+
+
+def test_failed_action_releases_the_fee_for_a_retry(make_service):
+    service = make_service()
+    client = SimulatedLedgerClient(LedgerSimulator(close_interval=0.01))
+    player = Wallet.create()
+    client.simulator.fund(player.address)
+    client.simulator.fund(RacingService.PAYMENT_DESTINATION)
+    verifier = FeeVerifier(service.repository, RacingService.PAYMENT_DESTINATION, client=client, poll_interval=0.01)
+    attempts = []
+
+    def run(payment_tx):
+        attempts.append(payment_tx)
+        if len(attempts) == 1:
+            raise ValueError("Car was sold during training")
+        return {'ok': True}
+
+    async def scenario():
+        pipeline = PaymentPipeline(client, poll_interval=0.01, ledger_close_time=0.01)
+        await pipeline.start()
+        await verifier.start()
+        try:
+            payment = await pipeline.wait(await pipeline.submit(
+                player.seed, RacingService.PAYMENT_DESTINATION, RacingService.FEE_XRP), timeout=5)
+            first = verifier.submit('train_car', payment.transaction_hash, player.address, RacingService.FEE_XRP, run)
+            await asyncio.wait_for(first.done.wait(), 5)
+            second = verifier.submit('train_car', payment.transaction_hash, player.address, RacingService.FEE_XRP, run)
+            await asyncio.wait_for(second.done.wait(), 5)
+            return first, second
+        finally:
+            await verifier.stop()
+            await pipeline.stop()
+
+    first, second = asyncio.run(scenario())
+    assert first.status == "failed", first.error
+    assert "can be submitted again" in first.error
+    assert second is not first and second.status == 'completed'
+    assert len(attempts) == 2
+    assert not service.repository.claim_payment(first.tx_hash, player.address, 'train_car', 0)
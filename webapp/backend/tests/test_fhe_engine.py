@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from conftest import WALLET
+from services.fhe_engine import FheEngine
+
+
+class Engine:
+    """Stands in for the encrypted engine's worker processes."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.cars = set()
+        self.discarded = []
+
+    async def create(self, car_id):
+        if self.fail:
+            raise RuntimeError("engine worker died")
+        self.cars.add(car_id)
+        return 150.0
+
+    async def train(self, lineage_id, parent_id, car_id, attribute_indices=None):
+        if self.fail:
+            raise RuntimeError("engine worker died")
+        self.cars.add(car_id)
+        return 160.0
+
+    def discard(self, lineage_id, car_id):
+        self.discarded.append(car_id)
+
+
+def test_engine_failure_charges_and_saves_nothing(make_service):
+    service = make_service(engine=Engine(fail=True))
+    charges = []
+    service._process_payment = lambda *args: charges.append(args) or (True, "TX")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.create_car_encrypted(WALLET))
+
+    assert charges == []
+    assert service.repository.counts()['cars'] == 0
+
+
+def test_train_failure_keeps_parent_unchanged(make_service):
+    service = make_service(engine=Engine())
+    success, car, _ = asyncio.run(service.create_car_encrypted(WALLET))
+    assert success and car['speed'] == 150.0
+
+    service.engine.fail = True
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.train_car_encrypted(car['car_id'], WALLET))
+
+    garage, _ = service.get_garage(WALLET)
+    assert [c.car_id for c in garage] == [car['car_id']]
+    assert garage[0].training_count == 0
+
+
+def test_failed_payment_discards_encrypted_car(make_service):
+    engine = Engine()
+    service = make_service(engine=engine)
+    service._process_payment = lambda *args: (False, "no funds")
+
+    success, car, message = asyncio.run(service.create_car_encrypted(WALLET))
+
+    assert not success and message == "Payment failed: no funds"
+    assert engine.discarded == list(engine.cars)
+    assert service.repository.counts()['cars'] == 0
+
+
+def test_refuses_several_web_workers():
+    engine = FheEngine("/nonexistent", workers=1, web_workers=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(engine.start())
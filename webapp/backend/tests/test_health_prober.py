@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services import health_prober as health_prober_module
+from services.health_prober import HealthProber
+from services.ledger_simulator import GENESIS_LEDGER, LedgerSimulator, SimulatedLedgerClient
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(health_prober_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_readiness_ages_out_after_failed_probes(clock):
+    simulator = LedgerSimulator(close_interval=0)
+    prober = HealthProber(SimulatedLedgerClient(simulator), ready_max_age=30)
+    assert not prober.is_ready()
+
+    asyncio.run(prober.probe())
+    assert prober.is_ready() and prober.connected and prober.ledger == GENESIS_LEDGER
+
+    simulator.failure_rate = 1.0
+    clock[0] += 20
+    asyncio.run(prober.probe())
+    # One failed probe does not make the node unready while the last success is recent
+    assert not prober.connected and "tooBusy" in prober.error
+    assert prober.is_ready()
+
+    clock[0] += 11
+    assert not prober.is_ready()
+    assert prober.staleness() == 11
+
+
+def test_ready_endpoint_turns_503_when_the_last_success_is_too_old(clock, monkeypatch):
+    from main import app
+    prober = HealthProber(SimulatedLedgerClient(LedgerSimulator(close_interval=0)), ready_max_age=30)
+    monkeypatch.setattr('routes.health.health_prober', prober)
+    client = TestClient(app)
+
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health").json()['status'] == "starting"
+    asyncio.run(prober.probe())
+    ready = client.get("/health/ready")
+    assert ready.status_code == 200 and ready.json()['status'] == "ready"
+
+    clock[0] += 31
+    stale = client.get("/health/ready")
+    assert stale.status_code == 503 and stale.json()['status'] == "not_ready"
+    assert stale.json()['staleness_seconds'] == 31
@@ -0,0 +1,51 @@
+import asyncio
+from dataclasses import dataclass, field
+
+from services.job_tracker import JobTracker
+
+
+@dataclass
+class Job:
+    tracking_id: str
+    wallet_address: str = 'rTester'
+    status: str = 'pending'
+    updated_at: str = ''
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_dict(self):
+        return {'tracking_id': self.tracking_id, 'status': self.status}
+
+
+def test_eviction_keeps_unfinished_jobs():
+    forgotten = []
+    tracker = JobTracker('job', {'done'}, max_jobs=2, on_forget=forgotten.append)
+    first, second, third = Job('a'), Job('b'), Job('c')
+    tracker.add(first)
+    tracker.add(second)
+    tracker.update(second, status='done')
+    tracker.add(third)
+
+    assert len(tracker) == 2
+    assert tracker.get('a') is first and tracker.get('b') is None
+    assert forgotten == [second]
+    assert tracker.with_status('pending') == [first, third]
+
+
+def test_update_notifies_watchers_and_finishes():
+    async def scenario():
+        seen = []
+        tracker = JobTracker('job', {'done'}, on_update=lambda job, snapshot: seen.append(snapshot['status']))
+        job = Job('a')
+        tracker.add(job)
+        queue = tracker.subscribe('a')
+        for _ in range(20):
+            tracker.update(job, status='running')
+        tracker.update(job, status='done')
+        tracker.unsubscribe('a', queue)
+
+        assert queue.qsize() == 16
+        assert [queue.get_nowait() for _ in range(16)][-1]['status'] == 'done'
+        assert job.done.is_set() and job.updated_at
+        assert seen[-1] == 'done'
+
+    asyncio.run(scenario())
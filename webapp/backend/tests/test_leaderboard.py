@@ -0,0 +1,30 @@
+import threading
+import time
+
+from conftest import WALLET
+
+
+def test_stale_leaderboard_is_rebuilt_in_the_background(make_service):
+    service = make_service()
+    other = make_service()
+    _, car, _ = other.create_car(WALLET)
+    service.leaderboard_refresh = 0
+
+    release = threading.Event()
+    scan = service.repository.iter_car_speed_inputs
+
+    def slow_scan(*args, **kwargs):
+        release.wait(5)
+        return scan(*args, **kwargs)
+
+    service.repository.iter_car_speed_inputs = slow_scan
+    started = time.perf_counter()
+    assert service.get_leaderboard()['total_cars'] == 0
+    assert service.get_leaderboard()['total_cars'] == 0
+    assert time.perf_counter() - started < 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while service.get_car_standing(car.car_id) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.get_car_standing(car.car_id)['rank'] == 1
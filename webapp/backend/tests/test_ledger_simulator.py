@@ -0,0 +1,73 @@
+from xrpl.models.transactions import Payment
+from xrpl.transaction import sign
+from xrpl.wallet import Wallet
+
+from services.ledger_simulator import BASE_FEE, FAUCET_AMOUNT, LedgerSimulator
+
+
+def _signed_payment(simulator, sender, destination, drops=1_000_000, sequence=None):
+    account = simulator.handle('account_info', {'account': sender.address})['account_data']
+    return sign(Payment(
+        account=sender.address,
+        destination=destination,
+        amount=str(drops),
+        fee=str(BASE_FEE),
+        sequence=account['Sequence'] if sequence is None else sequence,
+        last_ledger_sequence=simulator.current_index + 5,
+    ), sender).blob()
+
+
+def _funded(simulator):
+    sender, destination = Wallet.create(), Wallet.create()
+    simulator.fund(sender.address)
+    simulator.fund(destination.address)
+    return sender, destination.address
+
+
+def test_submitted_payment_is_validated_at_the_next_close():
+    simulator = LedgerSimulator(close_interval=60)
+    sender, destination = _funded(simulator)
+
+    submitted = simulator.handle('submit', {'tx_blob': _signed_payment(simulator, sender, destination)})
+    tx_hash = submitted['tx_json']['hash']
+
+    assert submitted['engine_result'] == 'tesSUCCESS' and submitted['applied']
+    assert not simulator.handle('tx', {'transaction': tx_hash})['validated']
+    simulator.close_ledger()
+    assert simulator.handle('tx', {'transaction': tx_hash})['validated']
+    balance = simulator.handle('account_info', {'account': destination, 'ledger_index': 'validated'})
+    assert int(balance['account_data']['Balance']) == FAUCET_AMOUNT + 1_000_000
+
+
+def test_sequence_must_match_the_account():
+    simulator = LedgerSimulator(close_interval=0)
+    sender, destination = _funded(simulator)
+    sequence = simulator.handle('account_info', {'account': sender.address})['account_data']['Sequence']
+
+    assert simulator.handle('submit', {'tx_blob': _signed_payment(simulator, sender, destination)})['engine_result'] == 'tesSUCCESS'
+    assert simulator.handle('submit', {'tx_blob': _signed_payment(simulator, sender, destination, sequence=sequence)})['engine_result'] == 'tefPAST_SEQ'
+    assert simulator.handle('submit', {'tx_blob': _signed_payment(simulator, sender, destination, sequence=sequence + 5)})['engine_result'] == 'terPRE_SEQ'
+
+
+def test_dropped_submission_looks_accepted_but_never_lands():
+    simulator = LedgerSimulator(close_interval=0, drop_rate=1.0)
+    sender, destination = _funded(simulator)
+    before = simulator.handle('account_info', {'account': sender.address})['account_data']
+
+    submitted = simulator.handle('submit', {'tx_blob': _signed_payment(simulator, sender, destination)})
+    simulator.close_ledger()
+
+    assert submitted['engine_result'] == 'tesSUCCESS'
+    assert simulator.handle('tx', {'transaction': submitted['tx_json']['hash']})['error'] == 'txnNotFound'
+    assert simulator.handle('account_info', {'account': sender.address})['account_data'] == before
+
+
+def test_busy_answers_repeat_under_the_same_seed():
+    def outcomes(seed):
+        simulator = LedgerSimulator(failure_rate=0.3, seed=seed)
+        return [simulator.handle('server_info', {}).get('error') for _ in range(50)]
+
+    first = outcomes(7)
+    assert first == outcomes(7)
+    assert first != outcomes(8)
+    assert set(first) == {None, 'tooBusy'}
@@ -0,0 +1,61 @@
+from conftest import WALLET
+
+
+def _train(service, car_id):
+    success, message, car, _ = service.train_car(car_id, WALLET)
+    assert success, message
+    return car.car_id
+
+
+def _garage(service, **options):
+    cars, _ = service.get_garage(WALLET, **options)
+    return [car.car_id for car in cars]
+
+
+def test_latest_only_falls_back_when_the_latest_generation_is_sold(make_service):
+    service = make_service()
+    service._process_payment = lambda *args: (True, "TX")
+    _, car, _ = service.create_car(WALLET)
+    first = car.car_id
+    second = _train(service, first)
+    third = _train(service, second)
+    _, other, _ = service.create_car(WALLET)
+    other = other.car_id
+
+    assert _garage(service) == [first, second, third, other]
+    assert _garage(service, latest_only=True) == [third, other]
+
+    assert service.sell_car(third, WALLET)[0]
+    assert _garage(service, latest_only=True) == [second, other]
+    assert service.sell_car(other, WALLET)[0]
+    assert _garage(service, latest_only=True) == [second]
+
+
+def test_lineage_lists_surviving_generations_from_any_member(make_service):
+    service = make_service()
+    service._process_payment = lambda *args: (True, "TX")
+    _, car, _ = service.create_car(WALLET)
+    first = car.car_id
+    second = _train(service, first)
+    third = _train(service, second)
+    assert service.sell_car(second, WALLET)[0]
+
+    lineage = service.get_lineage(third)
+
+    assert [(car.car_id, car.generation) for car in lineage] == [(first, 0), (third, 2)]
+    assert {car.lineage_id for car in lineage} == {first}
+    assert service.get_lineage("CAR-missing") is None
+
+
+def test_latest_only_pages_by_cursor(make_service):
+    service = make_service()
+    service._process_payment = lambda *args: (True, "TX")
+    latest = []
+    for _ in range(3):
+        _, car, _ = service.create_car(WALLET)
+        latest.append(_train(service, car.car_id))
+
+    cars, cursor = service.get_garage(WALLET, latest_only=True, limit=2)
+    rest, end = service.get_garage(WALLET, latest_only=True, cursor=cursor, limit=2)
+
+    assert [car.car_id for car in cars + rest] == latest and end is None
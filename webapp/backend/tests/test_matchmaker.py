@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from conftest import WALLET
+from services.matchmaker import Matchmaker
+
+
+def test_car_waits_in_the_lobby_once():
+    async def scenario():
+        matchmaker = Matchmaker(lambda *args: [], lobby_window=0.05)
+        first = asyncio.create_task(matchmaker.enter('CAR-1', WALLET, 100.0))
+        await asyncio.sleep(0)
+        with pytest.raises(ValueError):
+            await matchmaker.enter('CAR-1', WALLET, 100.0)
+        result = await first
+        assert not matchmaker.is_waiting('CAR-1')
+        return result
+
+    result = asyncio.run(scenario())
+    assert result['real_opponents'] == 0 and 'entrants' not in result
+
+
+def test_second_entry_of_a_waiting_car_is_refused_before_payment(make_service):
+    service = make_service()
+    service.matchmaker.lobby_window = 0.05
+    _, car, _ = service.create_car(WALLET)
+    charges = []
+    service._process_payment = lambda *args: charges.append(args) or (True, "TX")
+
+    async def scenario():
+        return await asyncio.gather(service.enter_race(car.car_id, WALLET), service.enter_race(car.car_id, WALLET))
+
+    (first_ok, result), (second_ok, refusal) = asyncio.run(scenario())
+    assert first_ok and result['car_id'] == car.car_id
+    assert not second_ok and refusal['message'] == "Car is already entered in the next race"
+    assert len(charges) == 1
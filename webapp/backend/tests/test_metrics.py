@@ -0,0 +1,45 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from prometheus_client import generate_latest
+from routes.metrics import RacingCollector, scrape_registry
+from services.racing_service import racing_service
+
+
+def test_stored_counts_are_cached_between_scrapes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(racing_service.repository, 'counts',
+                        lambda: calls.append(1) or {'cars': 3, 'wallets': 2, 'races': 1})
+    collector = RacingCollector(counts_ttl=60)
+
+    assert not any(metric.name == 'racing_cars_stored' for metric in collector.collect())
+    asyncio.run(collector.refresh())
+    asyncio.run(collector.refresh())
+
+    stored = {metric.name: metric.samples[0].value for metric in collector.collect() if metric.samples}
+    assert calls == [1]
+    assert stored['racing_cars_stored'] == 3 and stored['racing_garages'] == 2
+
+
+WORKER = """
+from services.metrics import EVENT_STREAMS_OPEN, RATE_LIMIT_DECISIONS, mark_worker_dead
+RATE_LIMIT_DECISIONS.labels('train_car', 'admitted').inc(3)
+EVENT_STREAMS_OPEN.inc()
+if {exits}:
+    mark_worker_dead()
+"""
+
+
+def test_scrape_sums_every_worker(tmp_path):
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    for exits in (False, False, True):
+        subprocess.run([sys.executable, '-c', WORKER.format(exits=exits)], env=env, check=True,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    scraped = generate_latest(scrape_registry(RacingCollector(), multiprocess_dir=str(tmp_path))).decode()
+
+    assert 'rate_limit_decisions_total{action="train_car",outcome="admitted"} 9.0' in scraped
+    # The worker that shut down no longer counts towards live gauges
+    assert 'event_streams_open 2.0' in scraped
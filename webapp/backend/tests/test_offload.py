@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from conftest import WALLET
+from services.event_hub import EventHub
+
+
+def test_service_work_runs_on_the_service_thread(make_service):
+    async def scenario():
+        service = make_service()
+        threads = []
+        insert = service.repository.insert_car
+        service.repository.insert_car = lambda car: threads.append(threading.current_thread().name) or insert(car)
+
+        success, car, _ = await service.offload(service.create_car, WALLET)
+        car_id = await service.offload(lambda: car.car_id)
+        owned, _ = await service.offload(service.check_ownership, car_id, WALLET)
+
+        assert success and owned
+        assert threads and all(name.startswith("racing") for name in threads)
+
+    asyncio.run(scenario())
+
+
+def test_enter_race_refuses_a_car_already_racing(make_service):
+    async def scenario():
+        service = make_service()
+        service._process_payment = lambda *args: (True, "TX")
+        _, car, _ = await service.offload(service.create_car, WALLET)
+        car_id = await service.offload(lambda: car.car_id)
+
+        first, second = await asyncio.gather(
+            service.enter_race(car_id, WALLET),
+            service.enter_race(car_id, WALLET),
+        )
+
+        assert sorted([first[0], second[0]]) == [False, True]
+        assert "already entered" in (second if first[0] else first)[1]['message']
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_another_thread_is_delivered_on_the_loop():
+    async def scenario():
+        hub = EventHub(queue_size=4)
+        subscription = hub.subscribe(WALLET)
+        await asyncio.to_thread(hub.publish, WALLET, 'car.created', {'car_id': 'CAR-1'})
+
+        message = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+        assert message['event'] == 'car.created' and message['data'] == {'car_id': 'CAR-1'}
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+from xrpl.wallet import Wallet
+from services.ledger_simulator import LedgerSimulator, SimulatedLedgerClient
+from services.payment_pipeline import PaymentPipeline
+import xrpl.asyncio.transaction as xrpl_transaction
+from services.payment_service import PaymentService
+
+def _service():
+    client = SimulatedLedgerClient(LedgerSimulator(close_interval=0.01))
+    pipeline = PaymentPipeline(client, poll_interval=0.01, ledger_close_time=0.01)
+    sender, destination = Wallet.create(), Wallet.create()
+    client.simulator.fund(sender.address)
+    client.simulator.fund(destination.address)
+    return PaymentService(client, pipeline), sender.seed, destination.address
+
+def test_send_payment_waits_for_validation():
+    async def run():
+        service, seed, destination = _service()
+        await service.pipeline.start()
+        try:
+            return await service.send_payment(seed, destination, 1.0)
+        finally:
+            await service.pipeline.stop()
+
+    result = asyncio.run(run())
+    assert result['status'] == 'success'
+    assert result['validated']
+
+def test_send_payment_reports_pending_when_nothing_tracks_it():
+    service, seed, destination = _service()
+
+    result = asyncio.run(asyncio.wait_for(service.send_payment(seed, destination, 1.0), timeout=5))
+
+    assert result['status'] == 'pending'
+    assert not result['validated']
+    assert service.get_job(result['tracking_id']).status == 'submitted'
+
+def _run_payment(service, seed, destination):
+    async def run():
+        await service.pipeline.start()
+        try:
+            job = await service.pipeline.submit(seed, destination, 1.0)
+            return await service.pipeline.wait(job, timeout=5)
+        finally:
+            await service.pipeline.stop()
+    return asyncio.run(run())
+
+def test_server_rejection_is_retried_without_leaving_a_sequence_gap():
+    service, seed, destination = _service()
+    simulator = service.client.simulator
+    rpc_submit, rejected = simulator._rpc_submit, []
+
+    def busy_once(params):
+        if not rejected:
+            rejected.append(params)
+            return {'engine_result': 'telCAN_NOT_QUEUE', 'engine_result_message': "Can not queue at this time."}
+        return rpc_submit(params)
+
+    simulator._rpc_submit = busy_once
+    job = _run_payment(service, seed, destination)
+
+    assert rejected
+    assert job.status == 'validated'
+
+def test_error_after_submission_leaves_the_outcome_to_tracking(monkeypatch):
+    service, seed, destination = _service()
+
+    async def submit_then_time_out(signed_tx, client):
+        await xrpl_transaction.submit(signed_tx, client)
+        raise TimeoutError("response lost")
+
+    monkeypatch.setattr('services.payment_pipeline.submit', submit_then_time_out)
+    job = _run_payment(service, seed, destination)
+
+    assert job.status == 'validated'
+    assert job.transaction_hash
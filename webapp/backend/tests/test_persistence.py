@@ -0,0 +1,92 @@
+import sqlite3
+import pytest
+from conftest import WALLET
+
+def _create(service):
+    success, car, _ = service.create_car(WALLET)
+    assert success
+    service.repository.flush()
+    return car.car_id
+
+def _stored(service, car_id):
+    return service.repository.load_car(car_id, fresh=True)
+
+def test_sell_wins_over_a_concurrent_speed_test(make_service):
+    a, b = make_service(), make_service()
+    car_id = _create(a)
+
+    car = a.get_car(car_id)
+    assert b.sell_car(car_id, WALLET)[0]
+
+    assert a._store_speeds([car], [200.0]) == [False]
+    assert _stored(b, car_id) is None
+    assert car_id not in a.cars
+
+def test_queued_speed_write_does_not_bring_back_a_sold_car(make_service):
+    a, b = make_service(shared=False), make_service()
+    car_id = _create(a)
+
+    assert b.sell_car(car_id, WALLET)[0]
+    success, _, _, _ = a.test_speed(car_id, WALLET)
+    assert success  # a trusts its cache and only queues the write
+    a.repository.flush()
+
+    assert _stored(b, car_id) is None
+
+def test_speed_test_retries_after_another_worker_changed_the_car(make_service):
+    a, b = make_service(), make_service()
+    car_id = _create(a)
+
+    car = a.get_car(car_id)
+    assert b.test_speed(car_id, WALLET)[0]
+
+    assert a._store_speeds([car], [200.0]) == [True]
+    assert _stored(b, car_id)[5] == 200.0
+    assert _stored(b, car_id)[8] == 2
+
+def test_concurrent_trainings_both_commit(make_service):
+    a, b = make_service(), make_service()
+    car_id = _create(a)
+
+    commit_trainings = a.repository.commit_trainings
+    def commit_after_b_trained(trainings):
+        a.repository.commit_trainings = commit_trainings
+        assert b.train_car(car_id, WALLET)[0]
+        return commit_trainings(trainings)
+    a.repository.commit_trainings = commit_after_b_trained
+
+    success, _, new_car, _ = a.train_car(car_id, WALLET)
+
+    assert success
+    assert _stored(b, car_id)[8] == 2
+    lineage = b.get_lineage(car_id)
+    assert len(lineage) == 3
+    assert {car.parent_id for car in lineage[1:]} == {car_id}
+
+def test_training_a_stale_version_writes_nothing(make_service):
+    a = make_service()
+    car_id = _create(a)
+    base = a.get_car(car_id)
+    child, base_speed, _ = a._train_child(base, None)
+
+    assert not a.repository.commit_training(car_id, base.version + 1, base_speed, child)
+    assert _stored(a, child.car_id) is None
+    assert _stored(a, car_id)[8] == 0
+
+def test_failed_training_batch_rolls_back(make_service):
+    a = make_service()
+    car_id, other_id = _create(a), _create(a)
+    base, other = a.get_car(car_id), a.get_car(other_id)
+    child, base_speed, _ = a._train_child(base, None)
+    _, other_speed, _ = a._train_child(other, None)
+
+    # Second child reuses the first one's id, so its insert fails mid-transaction
+    with pytest.raises(sqlite3.IntegrityError):
+        a.repository.commit_trainings([
+            (car_id, base.version, base_speed, child),
+            (other_id, other.version, other_speed, child),
+        ])
+
+    assert _stored(a, child.car_id) is None
+    assert _stored(a, car_id)[8] == 0
+    assert _stored(a, other_id)[8] == 0
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from services.profiler import profiler
+
+AUTH = {'Authorization': "Bearer secret"}
+
+
+@pytest.fixture
+def client():
+    from main import app
+    return TestClient(app)
+
+
+def test_profile_endpoint_is_hidden_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', "")
+
+    assert client.get("/admin/profile", params={'seconds': 0.05}, headers=AUTH).status_code == 404
+
+
+def test_profile_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', "secret")
+
+    assert client.get("/admin/profile", params={'seconds': 0.05}).status_code == 401
+    wrong = client.get("/admin/profile", params={'seconds': 0.05}, headers={'Authorization': "Bearer nope"})
+    assert wrong.status_code == 401 and wrong.headers['WWW-Authenticate'] == "Bearer"
+
+
+def test_profile_returns_collapsed_stacks(client, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', "secret")
+
+    response = client.get("/admin/profile", params={'seconds': 0.1, 'interval_ms': 5}, headers=AUTH)
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Profile-Samples']) > 0
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="profile-')
+    line = response.text.splitlines()[0]
+    assert ";" in line and line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_second_capture_conflicts_and_too_long_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', "secret")
+
+    assert profiler._lock.acquire(blocking=False)
+    try:
+        busy = client.get("/admin/profile", params={'seconds': 0.05}, headers=AUTH)
+    finally:
+        profiler._lock.release()
+    assert busy.status_code == 409
+
+    too_long = client.get("/admin/profile", params={'seconds': profiler.max_seconds + 1}, headers=AUTH)
+    assert too_long.status_code == 400
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from conftest import WALLET
+
+from services.persistence import RacingRepository
+
+
+def _race(repository, race_id, car_id="CAR-a", wallet_address=WALLET, ts=1000.0):
+    repository.append_race({'race_id': race_id, 'car_id': car_id}, wallet_address, ts)
+
+
+def _walk(service, **filters):
+    pages, cursor = [], None
+    while True:
+        races, cursor = service.get_race_history(cursor=cursor, limit=3, **filters)
+        pages.append([race['race_id'] for race in races])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_race_once_newest_first(make_service):
+    service = make_service()
+    for i in range(7):
+        _race(service.repository, f"RACE-{i}", ts=1000.0 + i)
+    # Same timestamp: ordered by race id, and not lost at a page boundary
+    _race(service.repository, "RACE-3b", ts=1003.0)
+
+    pages = _walk(service)
+
+    assert pages == [["RACE-6", "RACE-5", "RACE-4"], ["RACE-3b", "RACE-3", "RACE-2"], ["RACE-1", "RACE-0"]]
+
+
+def test_history_filters_by_car_and_wallet(make_service):
+    service = make_service()
+    _race(service.repository, "RACE-1", car_id="CAR-a", ts=1001.0)
+    _race(service.repository, "RACE-2", car_id="CAR-b", ts=1002.0)
+    _race(service.repository, "RACE-3", car_id="CAR-c", wallet_address="rOTHER", ts=1003.0)
+
+    assert _walk(service, car_id="CAR-a") == [["RACE-1"]]
+    assert _walk(service, wallet_address=WALLET) == [["RACE-2", "RACE-1"]]
+
+
+def test_invalid_cursor_is_rejected(make_service):
+    with pytest.raises(ValueError):
+        make_service().get_race_history(cursor="not-a-cursor")
+
+
+def test_compaction_keeps_races_inside_both_bounds(tmp_path):
+    repository = RacingRepository(str(tmp_path / "racing.db"), race_retention=3600, race_max_rows=4)
+    now = time.time()
+    for i in range(3):
+        _race(repository, f"OLD-{i}", ts=now - 7200 + i)
+    for i in range(6):
+        _race(repository, f"NEW-{i}", ts=now - 60 + i)
+    repository.flush()
+
+    assert repository.compact_races(chunk_size=2) == 5
+
+    assert [race_id for _, race_id, _ in repository.load_races(limit=100)] == ["NEW-5", "NEW-4", "NEW-3", "NEW-2"]
+    assert repository.compact_races() == 0
+    repository.close()
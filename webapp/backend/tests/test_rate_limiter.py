@@ -0,0 +1,67 @@
+import pytest
+from conftest import WALLET
+from fastapi.testclient import TestClient
+
+from services import rate_limiter as rate_limiter_module
+from services.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_budgets_are_split_across_workers():
+    limiter = RateLimiter(wallet_rate=2, wallet_burst=20, global_rate=500, global_burst=1000, workers=4)
+
+    stats = limiter.stats()
+    assert (stats['wallet_rate'], stats['wallet_burst']) == (0.5, 5)
+    assert (stats['global_rate'], stats['global_burst']) == (125, 250)
+
+
+def test_rejection_says_how_long_to_wait(clock):
+    limiter = RateLimiter(wallet_rate=2, wallet_burst=4, costs={'train_car': 2.0})
+
+    assert limiter.acquire('train_car', WALLET) == (True, 0.0)
+    assert limiter.acquire('train_car', WALLET) == (True, 0.0)
+    assert limiter.acquire('train_car', WALLET) == (False, 1.0)
+    clock[0] += 1
+    assert limiter.acquire('train_car', WALLET) == (True, 0.0)
+    assert limiter.stats()['operations']['train_car'] == {'admitted': 3, 'rejected_wallet': 1, 'rejected_global': 0}
+
+
+def test_cost_above_the_burst_waits_for_a_full_bucket_then_runs_into_debt(clock):
+    limiter = RateLimiter(wallet_rate=1, wallet_burst=5, costs={'train_car': 1.0})
+
+    assert limiter.acquire('train_car', WALLET) == (True, 0.0)
+    # Needs the whole bucket, which refills in 1s
+    assert limiter.acquire('train_car', WALLET, units=8) == (False, 1.0)
+    clock[0] += 1
+    assert limiter.acquire('train_car', WALLET, units=8) == (True, 0.0)
+    # 3 tokens in debt: one more item waits for 4 tokens to come back
+    assert limiter.acquire('train_car', WALLET) == (False, 4.0)
+
+
+def test_rejected_request_is_not_charged(clock):
+    limiter = RateLimiter(wallet_rate=1, wallet_burst=10, global_rate=1, global_burst=3, costs={'test_speed': 1.0})
+
+    assert limiter.acquire('test_speed', WALLET, units=3) == (True, 0.0)
+    assert limiter.acquire('test_speed', WALLET) == (False, 1.0)
+    clock[0] += 1
+    assert limiter.acquire('test_speed', WALLET) == (True, 0.0)
+    assert limiter.stats()['operations']['test_speed']['rejected_global'] == 1
+
+
+def test_429_carries_retry_after_rounded_up(clock, monkeypatch):
+    from main import app
+    monkeypatch.setattr('routes.racing.rate_limiter', RateLimiter(wallet_rate=0.4, wallet_burst=1, costs={'test_speed': 1.0}))
+    client = TestClient(app)
+
+    client.post("/race/test", json={'car_id': "CAR-missing", 'wallet_address': WALLET})
+    response = client.post("/race/test", json={'car_id': "CAR-missing", 'wallet_address': WALLET})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == "3"
+    assert "2.5s" in response.json()['detail']
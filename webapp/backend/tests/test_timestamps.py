@@ -0,0 +1,45 @@
+import asyncio
+import time
+from datetime import datetime
+import pytest
+from conftest import WALLET
+
+@pytest.fixture
+def local_time_ahead_of_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def _age(iso: str) -> float:
+    return abs(datetime.utcnow() - datetime.fromisoformat(iso)).total_seconds()
+
+def test_car_times_round_trip_in_utc(make_service, local_time_ahead_of_utc):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+    _, _, child, _ = service.train_car(car.car_id, WALLET)
+
+    assert _age(car.created_at) < 60
+    assert _age(child.last_trained) < 60
+    assert abs(service.repository.load_car(car.car_id, fresh=True)[6] - time.time()) < 60
+
+def test_race_times_are_epoch_seconds(make_service, local_time_ahead_of_utc):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+    success, race = asyncio.run(service.enter_race(car.car_id, WALLET))
+    assert success
+    service.repository.flush()
+
+    ts, _, _ = service.repository.load_races(car_id=car.car_id)[0]
+    assert abs(ts - time.time()) < 60
+    assert _age(race['timestamp']) < 60
+
+def test_retention_keeps_recent_races(make_service, local_time_ahead_of_utc):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+    asyncio.run(service.enter_race(car.car_id, WALLET))
+    service.repository.flush()
+    service.repository.race_retention = 3600
+
+    assert service.repository.compact_races() == 0
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import tracing
+from services.tracing import Tracer, TracingMiddleware, traced
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class Exporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    exporter = Exporter()
+    monkeypatch.setattr(tracing, 'tracer', Tracer(exporter, sample_rate=0.0))
+    return exporter.spans
+
+
+@traced('lookup')
+def lookup():
+    return "found"
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {'item': lookup()}
+
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app)
+
+
+def test_sampled_traceparent_is_continued(spans):
+    response = _client().get("/items/1", headers={'traceparent': f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    assert response.headers['x-trace-id'] == TRACE_ID
+    child, root = spans
+    assert root['name'] == "GET /items/{item_id}" and root['parent_id'] == PARENT_ID
+    assert root['attributes'] == {'path': "/items/1", 'status': 200}
+    assert child['name'] == 'lookup' and child['parent_id'] == root['span_id']
+    assert {child['trace_id'], root['trace_id']} == {TRACE_ID}
+
+
+def test_unsampled_traceparent_keeps_the_trace_id_but_records_nothing(spans):
+    response = _client().get("/items/1", headers={'traceparent': f"00-{TRACE_ID}-{PARENT_ID}-00"})
+
+    assert response.headers['x-trace-id'] == TRACE_ID
+    assert spans == []
+
+
+def test_malformed_traceparent_starts_a_new_trace(spans):
+    response = _client().get("/items/1", headers={'traceparent': "00-not-a-trace-01"})
+
+    trace_id = response.headers['x-trace-id']
+    assert len(trace_id) == 32 and trace_id != TRACE_ID
+    assert spans == []
+
+
+def test_spans_follow_calls_onto_the_service_thread(spans, make_service):
+    service = make_service()
+
+    async def request():
+        root = tracing.tracer.start_trace('GET', f"00-{TRACE_ID}-{PARENT_ID}-01")
+        token = tracing._current_span.set(root)
+        try:
+            assert await service.offload(lookup) == "found"
+        finally:
+            tracing._current_span.reset(token)
+        return root
+
+    root = asyncio.run(request())
+
+    assert [(span['name'], span['trace_id'], span['parent_id']) for span in spans] == [('lookup', TRACE_ID, root.span_id)]
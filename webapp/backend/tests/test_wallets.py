@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from xrpl.wallet import Wallet
+from services import wallet_pool as pool_module
+from services.ledger_simulator import LedgerSimulator, SimulatedLedgerClient
+from services.wallet_pool import WalletPool
+from services.wallet_service import WalletFundingError, WalletService
+
+
+async def _until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_empty_pool_and_failing_faucet_raise_instead_of_returning_a_wallet(monkeypatch):
+    async def faucet_down(client):
+        raise ConnectionError("faucet unreachable")
+
+    monkeypatch.setattr('services.wallet_service.fund_new_wallet', faucet_down)
+    service = WalletService(pool=WalletPool(low_watermark=0, high_watermark=0))
+
+    with pytest.raises(WalletFundingError):
+        asyncio.run(service.create_wallet())
+
+
+def test_empty_pool_funds_inline():
+    client = SimulatedLedgerClient(LedgerSimulator(close_interval=0.01))
+    service = WalletService(client=client, pool=WalletPool(client, low_watermark=0, high_watermark=0))
+
+    wallet = asyncio.run(service.create_wallet())
+
+    assert client.simulator.handle('account_info', {'account': wallet['address']})['status'] == 'success'
+
+
+def test_pool_refills_to_high_watermark_below_low_watermark():
+    async def scenario():
+        client = SimulatedLedgerClient(LedgerSimulator(close_interval=0.01))
+        pool = WalletPool(client, low_watermark=2, high_watermark=4, concurrency=2)
+        await pool.start()
+        try:
+            await _until(lambda: pool.stats()['available'] == 4)
+            pool.take()
+            pool.take()
+            await asyncio.sleep(0.05)
+            assert pool.stats()['available'] == 2
+
+            pool.take()
+            await _until(lambda: pool.stats()['available'] == 4)
+            return pool.stats()
+        finally:
+            await pool.stop()
+
+    stats = asyncio.run(scenario())
+    assert stats['funded'] == 7 and stats['failures'] == 0
+
+
+def test_pool_backs_off_while_the_faucet_fails(monkeypatch):
+    sleep = asyncio.sleep
+    backoffs = []
+    outcomes = iter([False, False, False, True, True])
+
+    async def flaky_faucet(client):
+        if not next(outcomes):
+            raise ConnectionError("faucet unreachable")
+        return Wallet.create()
+
+    async def recorded_sleep(delay):
+        if delay >= 1:
+            backoffs.append(delay)
+            delay = 0
+        await sleep(delay)
+
+    monkeypatch.setattr(pool_module, 'fund_new_wallet', flaky_faucet)
+    monkeypatch.setattr(pool_module.asyncio, 'sleep', recorded_sleep)
+
+    async def scenario():
+        pool = WalletPool(None, low_watermark=1, high_watermark=2, concurrency=1)
+        await pool.start()
+        try:
+            await _until(lambda: pool.stats()['available'] == 2)
+            return pool.stats()
+        finally:
+            await pool.stop()
+
+    stats = asyncio.run(scenario())
+    assert backoffs == [1.0, 2.0, 4.0]
+    assert stats['failures'] == 3 and stats['funded'] == 2
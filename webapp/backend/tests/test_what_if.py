@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from conftest import WALLET
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from models import WhatIfRequest
+
+
+def test_subset_mode_finds_the_fastest_subset(make_service):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+
+    success, _, result = service.what_if(car.car_id, WALLET, delta=50)
+
+    assert success and len(result['speeds']) == 1 << 10
+    assert result['best_speed'] == max(result['speeds'])
+    assert result['speeds'][0] == pytest.approx(result['base_speed'])
+
+
+def test_explicit_perturbations_are_clipped_to_the_flag_range(make_service):
+    service = make_service()
+    _, car, _ = service.create_car(WALLET)
+
+    success, _, result = service.what_if(car.car_id, WALLET, perturbations=[[999] * 10, [-999] * 10])
+
+    assert success
+    assert result['speeds'] == pytest.approx(car.speeds_with_deltas(np.array([[999] * 10, [-999] * 10])).tolist())
+
+
+def test_out_of_range_deltas_are_rejected():
+    with pytest.raises(ValidationError):
+        WhatIfRequest(car_id="CAR-1", wallet_address=WALLET, perturbations=[[10 ** 12] + [0] * 9])
+
+    from main import app
+    response = TestClient(app).post("/race/what-if", json={
+        'car_id': "CAR-1", 'wallet_address': WALLET, 'perturbations': [[2 ** 40] * 10]
+    })
+    assert response.status_code == 422